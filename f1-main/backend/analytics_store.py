@@ -0,0 +1,305 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataset_loader import load_dataset
+from metrics import span
+from reference_data import REFERENCE_COLUMNS, ReferenceData
+
+ANALYTICS_SOURCES = ('results.csv', 'drivers.csv', 'constructors.csv', 'races.csv')
+
+# Race result columns the aggregates read
+RESULT_COLUMNS = ['raceId', 'driverId', 'constructorId', 'points', 'positionOrder']
+
+# Columns served per table; the rest are running totals for incremental updates
+PUBLIC_COLUMNS = {
+    'drivers': ['year', 'driverId', 'forename', 'surname', 'points', 'driver_name'],
+    'teams': ['year', 'constructorId', 'name', 'points'],
+    'podiums': ['year', 'driverId', 'forename', 'surname', 'podiums', 'driver_name'],
+}
+
+# Rows per page when paging without a limit, and the largest limit accepted
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+# Rows encoded per chunk of an NDJSON stream
+STREAM_CHUNK_ROWS = 1000
+
+# The settings of ResponseCache.encode(), so a row has the same bytes in every JSON format
+encode_json = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode
+
+
+class AnalyticsStore:
+    """Season aggregates behind the /analytics endpoints, rebuilt when the CSVs change."""
+
+    def __init__(self, dataset_dir='../daasets'):
+        self.dataset_dir = dataset_dir
+        self._lock = threading.Lock()
+        self._stamp = None
+        self.refresh()
+
+    def _source_stamp(self):
+        stamp = []
+        for name in ANALYTICS_SOURCES:
+            stat = os.stat(os.path.join(self.dataset_dir, name))
+            stamp.append((name, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamp)
+
+    def refresh(self):
+        """Rebuild the aggregates if any source CSV changed since the last build."""
+        stamp = self._source_stamp()
+        if stamp == self._stamp:
+            return False
+
+        with self._lock:
+            if stamp != self._stamp:
+                self._build()
+                self._stamp = stamp
+        return True
+
+    def _build(self):
+        results_df = load_dataset('results', self.dataset_dir, columns=RESULT_COLUMNS)
+        drivers_df = load_dataset('drivers', self.dataset_dir, columns=REFERENCE_COLUMNS['drivers'])
+        constructors_df = load_dataset('constructors', self.dataset_dir, columns=REFERENCE_COLUMNS['constructors'])
+        races_df = load_dataset('races', self.dataset_dir, columns=['raceId', 'year'])
+        with span('aggregate'):
+            self._aggregate(results_df, drivers_df, constructors_df, races_df)
+
+    def _aggregate(self, results_df, drivers_df, constructors_df, races_df):
+
+        # Join the year once, then aggregate before attaching names
+        results = results_df[RESULT_COLUMNS] \
+            .merge(races_df[['raceId', 'year']], on='raceId')
+        driver_names = drivers_df[['driverId', 'forename', 'surname']]
+
+        # Average points per season for each driver; the running sum and
+        # race count are kept so a new race can be folded in
+        driver_points = results.groupby(['year', 'driverId'])['points'].agg(['mean', 'sum', 'size']).reset_index()
+        driver_points.columns = ['year', 'driverId', 'points', 'points_sum', 'races']
+        driver_points = driver_points.merge(driver_names, on='driverId')
+        driver_points['driver_name'] = driver_points['forename'] + " " + driver_points['surname']
+
+        # Total points per season for each team
+        team_points = results.groupby(['year', 'constructorId'])['points'].sum().reset_index()
+        team_points = team_points.merge(constructors_df[['constructorId', 'name']], on='constructorId')
+
+        # Podiums per season for each driver
+        podiums = results[results['positionOrder'] <= 3]
+        podium_count = podiums.groupby(['year', 'driverId']).size().reset_index(name='podiums')
+        podium_count = podium_count.merge(driver_names, on='driverId')
+        podium_count['driver_name'] = podium_count['forename'] + " " + podium_count['surname']
+
+        self._reference = ReferenceData(drivers_df, constructors_df)
+
+        # Swap in one snapshot so readers never mix old and new tables;
+        # unfiltered responses are kept as pre-encoded JSON, and the
+        # (year, id) ordered view used for paging is built on first use
+        self._snapshot = {
+            name: self._entry(name, table)
+            for name, table in [('drivers', driver_points), ('teams', team_points), ('podiums', podium_count)]
+        }
+
+    def _entry(self, name, table):
+        key = PUBLIC_COLUMNS[name][1]
+        table = table.set_index(pd.MultiIndex.from_arrays([table[key], table['year']], names=[None, None]))
+        table = table.sort_index()
+        return table, self._encode(table, PUBLIC_COLUMNS[name]), None
+
+    @staticmethod
+    def _encode(table, columns):
+        with span('serialize'):
+            table = table.sort_values(['year', columns[1]])
+            return encode_json(table[columns].to_dict('records')).encode('utf-8')
+
+    def _lookup(self, name, key):
+        self.refresh()
+        entry = table, serialized, ordered = self._snapshot[name]
+        columns = PUBLIC_COLUMNS[name]
+        if not key:
+            if serialized is None:
+                serialized = self._encode(table, columns)
+                self._fill(name, entry, (table, serialized, ordered))
+            return serialized
+        if key not in table.index:
+            return []
+        return table.loc[[key], columns].to_dict('records')
+
+    def driver_performance(self, driverId=None):
+        """Average points per season, optionally for a single driver."""
+        return self._lookup('drivers', driverId)
+
+    def team_standings(self, constructorId=None):
+        """Total points per season, optionally for a single constructor."""
+        return self._lookup('teams', constructorId)
+
+    def podium_frequency(self, driverId=None):
+        """Podium finishes per season, optionally for a single driver."""
+        return self._lookup('podiums', driverId)
+
+    def _ordered(self, name):
+        """Return the public rows of a table in (year, id) order and their int64 (year << 32 | id) keys."""
+        self.refresh()
+        entry = table, serialized, ordered = self._snapshot[name]
+        if ordered is None:
+            columns = PUBLIC_COLUMNS[name]
+            rows = table[columns].sort_values(['year', columns[1]]).reset_index(drop=True)
+            keys = (rows['year'].to_numpy(dtype=np.int64) << 32) | rows[columns[1]].to_numpy(dtype=np.int64)
+            ordered = (rows, keys)
+            self._fill(name, entry, (table, serialized, ordered))
+        return ordered
+
+    def _fill(self, name, entry, filled):
+        """Store a lazily built payload or view, unless the table changed while it was being built."""
+        with self._lock:
+            if self._snapshot[name] is entry:
+                self._snapshot[name] = filled
+
+    def _range(self, name, from_year=None, to_year=None, cursor=None):
+        """Return (rows, keys, start, end): the positions of rows in a year range, after a cursor."""
+        rows, keys = self._ordered(name)
+        start = 0 if from_year is None else np.searchsorted(keys, np.int64(from_year) << 32)
+        end = len(keys) if to_year is None else np.searchsorted(keys, np.int64(to_year + 1) << 32)
+        if cursor is not None:
+            try:
+                after = np.int64(int(cursor))
+            except ValueError:
+                raise ValueError(f"Invalid cursor {cursor!r}")
+            start = max(start, np.searchsorted(keys, after, side='right'))
+        return rows, keys, int(start), int(max(start, end))
+
+    def frame(self, name, key=None, from_year=None, to_year=None):
+        """Return the public columns of a table, or of one id's rows, in (year, id) order as a DataFrame."""
+        if not key:
+            rows, _, start, end = self._range(name, from_year, to_year)
+            return rows.iloc[start:end]
+
+        self.refresh()
+        table = self._snapshot[name][0]
+        rows = table.loc[[key], PUBLIC_COLUMNS[name]] if key in table.index else table.iloc[:0][PUBLIC_COLUMNS[name]]
+        if from_year is not None:
+            rows = rows[rows['year'] >= from_year]
+        if to_year is not None:
+            rows = rows[rows['year'] <= to_year]
+        return rows.reset_index(drop=True)
+
+    def page(self, name, from_year=None, to_year=None, limit=PAGE_SIZE, cursor=None):
+        """Return up to limit rows (all with limit=None) of a table in (year, id) order, with the next cursor.
+
+        The cursor is the key of the last row returned, so pages stay
+        consistent when rows are added by apply_race() between requests.
+        next_cursor is None on the last page.
+        """
+        rows, keys, start, end = self._range(name, from_year, to_year, cursor)
+        stop = end if limit is None else min(end, start + limit)
+        with span('serialize'):
+            items = rows.iloc[start:stop].to_dict('records')
+        return {'items': items, 'next_cursor': str(keys[stop - 1]) if stop < end else None}
+
+    def stream(self, name, from_year=None, to_year=None, limit=None, cursor=None, chunk_size=STREAM_CHUNK_ROWS):
+        """Yield a table's rows as NDJSON, encoding chunk_size rows at a time.
+
+        The rows come from the ordered view taken when streaming starts, so a
+        concurrent apply_race() does not change a stream in progress.
+        """
+        rows, _, start, end = self._range(name, from_year, to_year, cursor)
+        if limit is not None:
+            end = min(end, start + limit)
+        for chunk_start in range(start, end, chunk_size):
+            chunk = rows.iloc[chunk_start:min(end, chunk_start + chunk_size)]
+            with span('serialize'):
+                yield ''.join(encode_json(row) + '\n' for row in chunk.to_dict('records')).encode('utf-8')
+
+    def _with_season_totals(self, name, year, totals, new_row, derive=None):
+        """Return a copy of a table with per-id totals for one season added; the served table is left as is.
+
+        Existing (id, year) rows are updated by position, derive(table,
+        positions) can then recompute columns of those rows, and new rows are
+        appended and put in (id, year) order.
+        """
+        table = self._snapshot[name][0]
+        key = PUBLIC_COLUMNS[name][1]
+        keys = list(totals)
+        # Tables are in (id, year) order, so (id << 32 | year) keys are sorted and binary search finds the rows
+        table_keys = (table[key].to_numpy(dtype=np.int64) << 32) | table['year'].to_numpy(dtype=np.int64)
+        wanted = (np.array(keys, dtype=np.int64) << 32) | np.int64(year)
+        positions = np.searchsorted(table_keys, wanted)
+        found = positions < len(table_keys)
+        found[found] = table_keys[positions[found]] == wanted[found]
+
+        updated = table.copy()
+        if found.any():
+            at = positions[found]
+            rows = [totals[entity_id] for entity_id, exists in zip(keys, found) if exists]
+            for col in rows[0]:
+                column = table.columns.get_loc(col)
+                updated.iloc[at, column] = table.iloc[at, column].to_numpy() + np.array([row[col] for row in rows])
+            if derive is not None:
+                derive(updated, at)
+
+        # Ids missing from the reference tables are dropped, like the inner joins in _build
+        added = [(position, row) for entity_id, position, exists in zip(keys, positions, found) if not exists
+                 for row in [new_row(entity_id, totals[entity_id])] if row is not None]
+        if added:
+            added.sort(key=lambda item: (item[0], item[1][key]))
+            rows = pd.DataFrame([row for _, row in added])[table.columns].astype(table.dtypes.to_dict())
+            rows.index = pd.MultiIndex.from_arrays([rows[key], rows['year']], names=[None, None])
+            # Each new row goes before the row its key was searched to, which keeps the (id, year) order
+            order = np.insert(np.arange(len(table)), [position for position, _ in added],
+                              np.arange(len(table), len(table) + len(added)))
+            updated = pd.concat([updated, rows]).take(order)
+        return updated
+
+    def apply_race(self, year, results_rows):
+        """Fold one race's result rows into the season aggregates.
+
+        Only the (id, year) rows the race touches are updated, on copies of
+        the tables that replace the served snapshot in one assignment, and the
+        unfiltered payloads are re-encoded on their next request. Call it once
+        the same rows have been appended to results.csv; that CSV change is
+        then acknowledged instead of triggering a full rebuild.
+        """
+        race = pd.DataFrame(results_rows)
+        with self._lock:
+            if not race.empty:
+                self._snapshot = self._apply_race(year, race)
+            self._stamp = self._source_stamp()
+
+    def _apply_race(self, year, race):
+        """Return a new snapshot with one race's rows added to every table."""
+        def driver_row(driver_id, values):
+            driver = self._reference.drivers.get(driver_id)
+            if driver is None:
+                return None
+            return {'year': year, 'driverId': driver_id, 'forename': driver['forename'], 'surname': driver['surname'],
+                    'driver_name': driver['name'], **values}
+
+        def team_row(constructor_id, values):
+            if constructor_id not in self._reference.constructor_names:
+                return None
+            return {'year': year, 'constructorId': constructor_id, 'name': self._reference.constructor_names[constructor_id],
+                    **values}
+
+        def driver_averages(table, positions):
+            # Refresh the averages of the rows that already existed
+            column = table.columns.get_loc('points')
+            table.iloc[positions, column] = table['points_sum'].to_numpy()[positions] / table['races'].to_numpy()[positions]
+
+        points = race.groupby('driverId')['points'].agg(['sum', 'size'])
+        driver_totals = {int(d): {'points_sum': float(row['sum']), 'races': int(row['size'])} for d, row in points.iterrows()}
+        drivers = self._with_season_totals('drivers', year, driver_totals,
+                                           lambda d, v: driver_row(d, {**v, 'points': v['points_sum'] / v['races']}),
+                                           driver_averages)
+
+        team_points = race.groupby('constructorId')['points'].sum()
+        teams = self._with_season_totals('teams', year, {int(c): {'points': float(p)} for c, p in team_points.items()},
+                                         team_row)
+
+        podium_count = race[race['positionOrder'] <= 3].groupby('driverId').size()
+        podiums = self._with_season_totals('podiums', year, {int(d): {'podiums': int(n)} for d, n in podium_count.items()},
+                                           driver_row)
+
+        # Payloads and ordered views are rebuilt on first use
+        return {name: (table, None, None) for name, table in [('drivers', drivers), ('teams', teams), ('podiums', podiums)]}
@@ -0,0 +1,292 @@
+"""Benchmark the API, feature building and championship training as the data grows.
+
+Run from backend/:
+
+    python benchmarks/bench_api.py [--scales 1,10,100] [--skip-training] [--repeats 3]
+                                   [--output results.json] [--save-baseline]
+
+Each scale builds a copy of daasets/ holding that many copies of every season
+of race data (copies are shifted to earlier years), then benchmarks it in a
+fresh interpreter:
+
+- startup: importing main.py, then warm_up: loading its data, models and indexes
+- every frontend endpoint through an in-process TestClient, once with the
+  response cache and once with it cleared before each request
+- predict_championships(), create_driver_features() and a full
+  train_championship_models run (wdc + constructors)
+
+The podium endpoints and /simulate need backend/models/podium_model.joblib,
+which is not committed; without it they are skipped (train it with
+train_podium_model.py to include them).
+
+Every scale runs --repeats times and each metric keeps the median of the
+runs' medians. Results are written as JSON and compared with
+benchmarks/baseline.json; a median slower than the baseline by more than
+--tolerance and by more than NOISE_FLOOR_MS exits non-zero. Timings are
+machine specific: refresh the baseline with --save-baseline when moving to
+new hardware or after changing what a metric measures.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+DATASET_DIR = os.path.join(BACKEND_DIR, '..', 'daasets')
+MODEL_DIR = os.path.join(BACKEND_DIR, 'backend', 'models')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Tables holding one row per race (or per race and entry); every other table is copied as-is
+RACE_TABLES = ['races', 'results', 'driver_standings', 'constructor_standings', 'constructor_results',
+               'qualifying', 'pit_stops', 'sprint_results']
+# Columns that identify a row rather than a driver, constructor, circuit or status
+REFERENCE_IDS = {'driverId', 'constructorId', 'circuitId', 'statusId'}
+
+# Slowdowns smaller than this many milliseconds are noise, however large the ratio; cached
+# endpoints take 1-4 ms and vary by 2x between runs on a busy machine
+NOISE_FLOOR_MS = 5.0
+
+CHILD = r"""
+import contextlib, io, json, statistics, sys, time
+sys.path.insert(0, sys.argv[1])
+skip_training = sys.argv[2] == '1'
+
+def stats(samples):
+    samples = sorted(samples)
+    return {
+        'median_ms': statistics.median(samples) * 1000,
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        'min_ms': samples[0] * 1000,
+        'runs': len(samples),
+    }
+
+def measure(fn, before=None, runs=20, budget=3.0):
+    fn()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < runs and (not samples or time.perf_counter() - started < budget):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return stats(samples)
+
+metrics = {}
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import main
+metrics['startup'] = stats([time.perf_counter() - start])
+start = time.perf_counter()
+main.resources.warm_up()
+metrics['warm_up'] = stats([time.perf_counter() - start])
+
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+# podium_model.joblib is not committed; the endpoints that need it are skipped without it
+podium_ready = main.resources.status()[0]['models']['podium_model']['state'] == 'ready'
+if not podium_ready:
+    print('podium_model.joblib is missing: skipping predict_podium, predict_podium_batch and simulate',
+          file=sys.stderr)
+podium_grid = [{'driverId': d, 'constructorId': c, 'grid': g + 1}
+               for g, (d, c) in enumerate([(830, 9), (815, 9), (1, 131), (847, 131), (844, 6), (832, 6),
+                                           (846, 1), (857, 1), (4, 117), (840, 117)])]
+GETS = {
+    'analytics_drivers': '/analytics/drivers',
+    'analytics_drivers_one': '/analytics/drivers?driverId=830',
+    'analytics_teams': '/analytics/teams',
+    'analytics_podiums': '/analytics/podiums',
+    'drivers': '/drivers',
+    'constructors': '/constructors',
+    'seasons': '/seasons',
+    'predict_championships': '/predict/2030/championships',
+    'predict_driver': '/predict/driver/830/2025',
+    'predict_constructor': '/predict/constructor/9/2025',
+}
+POSTS = {}
+if podium_ready:
+    GETS['simulate'] = '/simulate/2024?seasons=2000&seed=0'
+    POSTS['predict_podium'] = ('/predict/podium', podium_grid[0])
+    POSTS['predict_podium_batch'] = ('/predict/podium/batch', podium_grid)
+
+def get(url):
+    def call():
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+    return call
+
+def post(url, body):
+    def call():
+        response = client.post(url, json=body)
+        assert response.status_code == 200, (url, response.status_code)
+    return call
+
+for name, url in GETS.items():
+    metrics[f'api/{name}/cached'] = measure(get(url))
+    metrics[f'api/{name}/uncached'] = measure(get(url), before=main.response_cache.clear)
+for name, (url, body) in POSTS.items():
+    metrics[f'api/{name}'] = measure(post(url, body))
+
+import train_championship_models as tcm
+data = tcm.load_and_preprocess_data(load_qualifying=False)
+results_with_race, driver_standings_df, _, drivers_df, _, races_df, _, _ = data
+metrics['create_driver_features'] = measure(
+    lambda: tcm.create_driver_features(results_with_race, driver_standings_df, drivers_df, races_df), runs=5)
+pipeline = tcm.FeaturePipeline(data)
+metrics['predict_championships'] = measure(lambda: tcm.predict_championships(2030, pipeline), runs=5)
+
+if not skip_training:
+    def train():
+        fresh = tcm.FeaturePipeline()
+        with contextlib.redirect_stdout(io.StringIO()):
+            tcm.train_wdc_model(fresh)
+            tcm.train_constructors_model(fresh)
+    metrics['train_championship_models'] = measure(train, runs=1)
+
+print(json.dumps({'rows': {'results': int(len(main.resources.get('season_results'))),
+                           'races': int(len(main.resources.get('races')))},
+                  'metrics': metrics}))
+"""
+
+
+def scale_table(df, copies, year_span, id_offsets):
+    """Stack `copies` copies of a race-keyed table, shifting ids and years for each extra copy."""
+    frames = [df]
+    for i in range(1, copies):
+        copy = df.copy()
+        for col, offset in id_offsets.items():
+            if col in copy.columns:
+                copy[col] = copy[col] + offset * i
+        if 'year' in copy.columns:
+            copy['year'] = copy['year'] - year_span * i
+        frames.append(copy)
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_scaled_tree(root, copies):
+    """Lay out root/daasets (scaled) and root/backend/backend/models (copied) so main.py runs from root/backend."""
+    dataset_dir = os.path.join(root, 'daasets')
+    model_dir = os.path.join(root, 'backend', 'backend', 'models')
+    os.makedirs(dataset_dir)
+    os.makedirs(model_dir)
+    for path in glob.glob(os.path.join(MODEL_DIR, '*.joblib')):
+        shutil.copy(path, model_dir)
+
+    races = pd.read_csv(os.path.join(DATASET_DIR, 'races.csv'))
+    year_span = int(races['year'].max() - races['year'].min() + 1)
+    for path in glob.glob(os.path.join(DATASET_DIR, '*.csv')):
+        name = os.path.basename(path)[:-4]
+        if name not in RACE_TABLES or copies == 1:
+            shutil.copy(path, dataset_dir)
+            continue
+
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        # Offset the race id and the table's own row id; leave reference ids alone
+        id_cols = [col for col in df.columns if col.endswith('Id') and col not in REFERENCE_IDS]
+        for col in id_cols + ['year']:
+            if col in df.columns:
+                df[col] = df[col].astype(int)
+        offsets = {col: int(df[col].max()) + 1 for col in id_cols}
+        scale_table(df, copies, year_span, offsets).to_csv(os.path.join(dataset_dir, f'{name}.csv'), index=False)
+    return os.path.join(root, 'backend')
+
+
+def run_scale(copies, skip_training, repeats=1):
+    """Benchmark one scale in `repeats` fresh interpreters and combine the runs."""
+    root = tempfile.mkdtemp(prefix=f'f1-bench-x{copies}-')
+    try:
+        workdir = build_scaled_tree(root, copies)
+        runs = []
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, '-c', CHILD, BACKEND_DIR, '1' if skip_training else '0'],
+                                 cwd=workdir, capture_output=True, text=True)
+            if out.returncode != 0:
+                raise RuntimeError(f"benchmark at x{copies} failed:\n{out.stderr}")
+            sys.stderr.write(out.stderr)
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        return combine_runs(runs)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def combine_runs(runs):
+    """Merge repeated runs of one scale: the median of the medians and p95s, the overall minimum."""
+    metrics = {}
+    for name in runs[0]['metrics']:
+        values = [run['metrics'][name] for run in runs]
+        metrics[name] = {
+            'median_ms': statistics.median(value['median_ms'] for value in values),
+            'p95_ms': statistics.median(value['p95_ms'] for value in values),
+            'min_ms': min(value['min_ms'] for value in values),
+            'runs': sum(value['runs'] for value in values),
+        }
+    return {'rows': runs[0]['rows'], 'repeats': len(runs), 'metrics': metrics}
+
+
+def compare(report, baseline, tolerance):
+    """Print every metric against the baseline and return the names that regressed."""
+    regressions = []
+    print(f"{'metric':<48} {'median ms':>11} {'baseline':>11} {'ratio':>7}")
+    for scale, result in report['scales'].items():
+        base_metrics = baseline.get('scales', {}).get(scale, {}).get('metrics', {})
+        for name, values in result['metrics'].items():
+            key = f'x{scale}/{name}'
+            median = values['median_ms']
+            base = base_metrics.get(name)
+            if base is None:
+                print(f"{key:<48} {median:>11.2f} {'-':>11} {'-':>7}")
+                continue
+            ratio = median / base['median_ms'] if base['median_ms'] else float('inf')
+            regressed = ratio > 1 + tolerance and median - base['median_ms'] > NOISE_FLOOR_MS
+            print(f"{key:<48} {median:>11.2f} {base['median_ms']:>11.2f} {ratio:>7.2f}{'  REGRESSION' if regressed else ''}")
+            if regressed:
+                regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scales', default='1,10,100', help='comma-separated season multipliers')
+    parser.add_argument('--skip-training', action='store_true', help='leave out the full training run')
+    parser.add_argument('--repeats', type=int, default=3, help='fresh runs per scale, combined by median')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before failing')
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'cpus': os.cpu_count(), 'scales': {}}
+    for copies in [int(scale) for scale in args.scales.split(',')]:
+        print(f"Running x{copies}...", file=sys.stderr)
+        report['scales'][str(copies)] = run_scale(copies, args.skip_training, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(report, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
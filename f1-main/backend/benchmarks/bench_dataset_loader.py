@@ -0,0 +1,93 @@
+"""Compare CSV parsing against the columnar dataset cache.
+
+Run from backend/:
+
+    python benchmarks/bench_dataset_loader.py
+
+Each measurement runs in a fresh interpreter so that load time and peak
+resident memory reflect what a newly started uvicorn worker pays. The
+'columns' mode loads only the columns main.py keeps resident. Every mode also
+times the season groupbys the analytics and championship code run over
+results joined with races.
+"""
+import json
+import os
+import subprocess
+import sys
+
+# Tables main.py keeps resident in every worker
+WORKER_TABLES = ['results', 'drivers', 'constructors', 'races']
+ALL_TABLES = ['circuits', 'constructor_results', 'constructor_standings', 'constructors', 'driver_standings',
+              'drivers', 'pit_stops', 'qualifying', 'races', 'results', 'seasons', 'sprint_results', 'status']
+
+CHILD = """
+import json, resource, sys, time
+import pandas as pd
+sys.path.insert(0, '.')
+from analytics_store import RESULT_COLUMNS
+from dataset_loader import load_dataset
+from reference_data import REFERENCE_COLUMNS
+
+# Columns main.py loads each worker table with
+COLUMNS = {'results': RESULT_COLUMNS, 'races': ['raceId', 'year', 'round'], **REFERENCE_COLUMNS}
+
+def load(name):
+    if mode == 'csv':
+        return pd.read_csv(f'../daasets/{name}.csv')
+    return load_dataset(name, columns=COLUMNS.get(name) if mode == 'columns' else None)
+
+mode, tables = sys.argv[1], sys.argv[2].split(',')
+start = time.perf_counter()
+frames = {name: load(name) for name in tables}
+elapsed = time.perf_counter() - start
+
+results = load('results').merge(load('races')[['raceId', 'year']], on='raceId')
+start = time.perf_counter()
+for _ in range(20):
+    results.groupby(['year', 'driverId'])['points'].agg(['mean', 'sum', 'size'])
+    results.groupby(['year', 'constructorId'])['points'].sum()
+    results[results['positionOrder'] <= 3].groupby(['year', 'driverId']).size()
+groupby_seconds = (time.perf_counter() - start) / 20
+
+print(json.dumps({
+    'seconds': elapsed,
+    'frame_bytes': int(sum(df.memory_usage(deep=True).sum() for df in frames.values())),
+    'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'groupby_seconds': groupby_seconds,
+}))
+"""
+
+
+def measure(mode, tables, repeat=5):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', CHILD, mode, ','.join(tables)],
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out))
+    return min(runs, key=lambda r: r['seconds'])
+
+
+def main():
+    # Make sure the cache is populated before timing cached loads
+    sys.path.insert(0, os.getcwd())
+    from dataset_loader import load_dataset
+    for name in ALL_TABLES:
+        load_dataset(name)
+
+    print(f"{'tables':<8} {'mode':<8} {'load ms':>9} {'frames MB':>10} {'peak RSS MB':>12} {'groupby ms':>11}")
+    report = {}
+    for label, tables, modes in [('worker', WORKER_TABLES, ('csv', 'cache', 'columns')),
+                                 ('all', ALL_TABLES, ('csv', 'cache'))]:
+        for mode in modes:
+            result = measure(mode, tables)
+            report[f'{label}/{mode}'] = result
+            print(f"{label:<8} {mode:<8} {result['seconds'] * 1000:>9.1f} "
+                  f"{result['frame_bytes'] / 1e6:>10.2f} {result['peak_rss_kb'] / 1024:>12.1f} "
+                  f"{result['groupby_seconds'] * 1000:>11.2f}")
+
+    if '--json' in sys.argv:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Measure season simulator throughput in simulated seasons per second.
+
+Run from backend/:
+
+    python benchmarks/bench_season_simulator.py [--json]
+
+Simulates the rest of the latest season in the data with the podium
+model, across several season counts and process pool sizes.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from compact_forest import load_model
+from dataset_loader import load_dataset
+from history_index import PartitionedTable
+from season_simulator import SeasonSimulator, season_field, simulation_pool
+
+SEASON_COUNTS = [1000, 10000, 50000, 100000]
+PROCESS_COUNTS = [0, 2, 4]
+
+
+def main():
+    results = load_dataset('results')
+    races = load_dataset('races')
+    season_results = PartitionedTable(results.merge(races[['raceId', 'year']], on='raceId'), 'year')
+    year = season_results.keys()[-1]
+    field = season_field(year, season_results, races, PartitionedTable(load_dataset('driver_standings'), 'raceId'),
+                         PartitionedTable(load_dataset('constructor_standings'), 'raceId'))
+
+    start = time.perf_counter()
+    simulator = SeasonSimulator(load_model('backend/models/podium_model.joblib'), *field)
+    setup_seconds = time.perf_counter() - start
+    print(f"{year}: {len(simulator.driver_ids)} drivers, {simulator.remaining_races} races left, "
+          f"setup {setup_seconds * 1000:.1f} ms")
+
+    print(f"{'seasons':>8} {'processes':>10} {'seconds':>9} {'seasons/s':>11}")
+    report = {'year': year, 'remaining_races': simulator.remaining_races, 'setup_seconds': setup_seconds, 'runs': []}
+    for processes in PROCESS_COUNTS:
+        # One pool per size, reused across runs as the API does; its start-up is not timed
+        pool = simulation_pool(processes) if processes else None
+        if pool is not None:
+            list(pool.map(abs, range(processes)))
+        for seasons in SEASON_COUNTS:
+            start = time.perf_counter()
+            simulator.run(seasons, seed=0, pool=pool)
+            elapsed = time.perf_counter() - start
+            report['runs'].append({'seasons': seasons, 'processes': processes, 'seconds': elapsed,
+                                   'seasons_per_second': seasons / elapsed})
+            print(f"{seasons:>8} {processes:>10} {elapsed:>9.3f} {seasons / elapsed:>11.0f}")
+        if pool is not None:
+            pool.shutdown()
+
+    if '--json' in sys.argv:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""Load-test the API with frontend traffic mixes against a locally started uvicorn.
+
+Run from backend/:
+
+    python benchmarks/load_test.py [--concurrency 1,4,16,64] [--duration 20]
+                                   [--workers 1,2,4] [--mix analytics=3,podium=2,championship=1]
+                                   [--output report.json] [--url http://host:8000]
+
+For every worker count a uvicorn server is started on a free local port with
+`--workers N` and left to warm up until /ready answers, unless --url points at
+a running server. At each concurrency level that many virtual users replay
+page sessions back to back for --duration seconds (after a --ramp-up that is
+not recorded). Each session is picked from the mix by weight:
+
+- analytics: the page's parallel /analytics/drivers, teams and podiums trio
+  with /drivers and /constructors, then driver filter changes
+- podium: /drivers and /constructors, then a podium prediction per
+  driver/team/grid selection change
+- championship: championship prediction polls over the selectable years and
+  a what-if scenario comparison
+
+Throughput and p50/p95/p99 latency are reported per endpoint and overall, and
+written as JSON with --output. The load generator shares the machine with
+the server, so leave it a core when measuring scaling across workers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+CHAMPIONSHIP_YEARS = [2025, 2026, 2027, 2028, 2029, 2030]
+DEFAULT_MIX = 'analytics=3,podium=2,championship=1'
+
+# How long a server gets to import and warm up before the run is abandoned
+STARTUP_TIMEOUT = 180
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of sorted samples."""
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def summarize(latencies, statuses, seconds):
+    samples = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if status >= 400 or status == 0)
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': len(samples) / seconds,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+    }
+    if samples:
+        summary.update({
+            'p50_ms': percentile(samples, 0.50) * 1000,
+            'p95_ms': percentile(samples, 0.95) * 1000,
+            'p99_ms': percentile(samples, 0.99) * 1000,
+            'max_ms': samples[-1] * 1000,
+        })
+    return summary
+
+
+class Recorder:
+    """Latencies and status codes per endpoint label, collected only while recording is on."""
+
+    def __init__(self):
+        self.recording = False
+        self.latencies = {}
+        self.statuses = {}
+
+    def add(self, endpoint, seconds, status):
+        if not self.recording:
+            return
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        statuses = self.statuses.setdefault(endpoint, {})
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def report(self, seconds):
+        endpoints = {endpoint: summarize(self.latencies[endpoint], self.statuses[endpoint], seconds)
+                     for endpoint in sorted(self.latencies)}
+        statuses = {}
+        for endpoint_statuses in self.statuses.values():
+            for status, count in endpoint_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+        latencies = [sample for samples in self.latencies.values() for sample in samples]
+        return {'overall': summarize(latencies, statuses, seconds), 'endpoints': endpoints}
+
+
+class Sessions:
+    """Page sessions modelled on the frontend's requests; `endpoint` labels group URLs by route."""
+
+    def __init__(self, client, recorder, rng, entities):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.drivers, self.constructors, self.contenders = entities
+
+    async def request(self, endpoint, method, url, body=None):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, json=body)
+            await response.aread()
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        self.recorder.add(endpoint, time.perf_counter() - start, status)
+
+    async def parallel(self, *requests):
+        await asyncio.gather(*(self.request(*request) for request in requests))
+
+    async def analytics(self):
+        await self.parallel(
+            ('GET /analytics/drivers', 'GET', '/analytics/drivers'),
+            ('GET /analytics/teams', 'GET', '/analytics/teams'),
+            ('GET /analytics/podiums', 'GET', '/analytics/podiums'),
+        )
+        await self.parallel(
+            ('GET /drivers', 'GET', '/drivers'),
+            ('GET /constructors', 'GET', '/constructors'),
+        )
+        for _ in range(self.rng.randint(1, 3)):
+            driver_id = self.rng.choice(self.drivers)
+            await self.parallel(
+                ('GET /analytics/drivers?driverId', 'GET', f'/analytics/drivers?driverId={driver_id}'),
+                ('GET /analytics/podiums?driverId', 'GET', f'/analytics/podiums?driverId={driver_id}'),
+            )
+
+    async def podium(self):
+        await self.parallel(
+            ('GET /drivers', 'GET', '/drivers'),
+            ('GET /constructors', 'GET', '/constructors'),
+        )
+        for _ in range(self.rng.randint(1, 4)):
+            body = {'driverId': self.rng.choice(self.drivers), 'constructorId': self.rng.choice(self.constructors),
+                    'grid': self.rng.randint(1, 20)}
+            await self.request('POST /predict/podium', 'POST', '/predict/podium', body)
+
+    async def championship(self):
+        for _ in range(self.rng.randint(1, 3)):
+            year = self.rng.choice(CHAMPIONSHIP_YEARS)
+            await self.request('GET /predict/{year}/championships', 'GET', f'/predict/{year}/championships')
+        body = {'years': CHAMPIONSHIP_YEARS,
+                'scenarios': [{'name': 'what-if', 'points': {str(self.rng.choice(self.contenders)): 50}}]}
+        await self.request('POST /predict/championships/scenarios', 'POST', '/predict/championships/scenarios', body)
+
+
+async def run_level(base_url, concurrency, duration, ramp_up, mix, seed, entities):
+    """Run `concurrency` virtual users for ramp_up + duration seconds and report the recorded part."""
+    recorder = Recorder()
+    stop = asyncio.Event()
+    pages, weights = zip(*mix.items())
+    # Room for every user's parallel trio, so users never queue for a connection
+    limits = httpx.Limits(max_connections=concurrency * 3, max_keepalive_connections=concurrency * 3)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def user(index):
+            rng = random.Random(seed * 100003 + index)
+            sessions = Sessions(client, recorder, rng, entities)
+            while not stop.is_set():
+                await getattr(sessions, rng.choices(pages, weights)[0])()
+
+        users = [asyncio.create_task(user(i)) for i in range(concurrency)]
+        await asyncio.sleep(ramp_up)
+        recorder.recording = True
+        start = time.perf_counter()
+        await asyncio.sleep(duration)
+        recorder.recording = False
+        seconds = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*users)
+    return recorder.report(seconds)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers, log):
+    """Start uvicorn serving main:app from backend/ and wait until /ready answers for every worker."""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--no-access-log'],
+        cwd=BACKEND_DIR, stdout=log, stderr=subprocess.STDOUT,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    # Requests land on any worker, so wait for a run of ready answers rather than one
+    ready_in_a_row = 0
+    while ready_in_a_row < workers * 3:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}; see {log.name}")
+        if time.monotonic() > deadline:
+            stop_server(server)
+            raise RuntimeError(f"uvicorn was not ready after {STARTUP_TIMEOUT}s; see {log.name}")
+        try:
+            ready = httpx.get(f'{base_url}/ready', timeout=5).status_code == 200
+        except httpx.HTTPError:
+            ready = False
+        ready_in_a_row = ready_in_a_row + 1 if ready else 0
+        time.sleep(0.05 if ready else 0.5)
+    return server, base_url
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def entity_ids(base_url):
+    """Ids for selection-change requests: (drivers, constructors) the frontend offers and championship contenders.
+
+    Contenders are the drivers of the season future championships are scored
+    on, the only ones a what-if scenario can adjust.
+    """
+    drivers = httpx.get(f'{base_url}/drivers', timeout=60).json()
+    constructors = httpx.get(f'{base_url}/constructors', timeout=60).json()
+    championships = httpx.get(f'{base_url}/predict/{CHAMPIONSHIP_YEARS[-1]}/championships', timeout=60).json()
+    return ([d['driverId'] for d in drivers], [c['constructorId'] for c in constructors],
+            [p['driver_id'] for p in championships['world_drivers_championship']['predictions']])
+
+
+def sweep(base_url, args, mix):
+    entities = entity_ids(base_url)
+    levels = {}
+    for concurrency in args.concurrency:
+        print(f"  {concurrency} users...", file=sys.stderr)
+        levels[str(concurrency)] = asyncio.run(run_level(
+            base_url, concurrency, args.duration, args.ramp_up, mix, args.seed, entities
+        ))
+    return levels
+
+
+def print_report(report):
+    print(f"{'workers':>7} {'users':>5}  {'endpoint':<40} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'errors':>6}")
+    for workers, levels in report['runs'].items():
+        for concurrency, result in levels.items():
+            rows = [('(all)', result['overall'])] + list(result['endpoints'].items())
+            for endpoint, values in rows:
+                if not values['requests']:
+                    continue
+                print(f"{workers:>7} {concurrency:>5}  {endpoint:<40} {values['throughput_rps']:>8.1f} "
+                      f"{values['p50_ms']:>8.1f} {values['p95_ms']:>8.1f} {values['p99_ms']:>8.1f} "
+                      f"{values['errors']:>6}")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        page, _, weight = part.partition('=')
+        if page not in ('analytics', 'podium', 'championship'):
+            raise argparse.ArgumentTypeError(f"unknown page {page!r} in mix")
+        mix[page] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--concurrency', type=lambda s: [int(c) for c in s.split(',')], default=[1, 4, 16, 64],
+                        help='comma-separated virtual user counts')
+    parser.add_argument('--duration', type=float, default=20, help='recorded seconds per concurrency level')
+    parser.add_argument('--ramp-up', type=float, default=3, help='unrecorded seconds before each level')
+    parser.add_argument('--workers', type=lambda s: [int(w) for w in s.split(',')], default=[1],
+                        help='comma-separated uvicorn worker counts')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'page session weights (default {DEFAULT_MIX})')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', help='load-test this running server instead of starting uvicorn')
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    report = {
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'mix': args.mix,
+        'duration_s': args.duration,
+        'runs': {},
+    }
+    if args.url:
+        print(f"Load-testing {args.url}...", file=sys.stderr)
+        report['runs']['external'] = sweep(args.url.rstrip('/'), args, args.mix)
+    else:
+        for workers in args.workers:
+            print(f"Starting uvicorn with {workers} worker(s)...", file=sys.stderr)
+            with tempfile.NamedTemporaryFile('w', prefix=f'f1-load-w{workers}-', suffix='.log', delete=False) as log:
+                server, base_url = start_server(workers, log)
+                try:
+                    report['runs'][str(workers)] = sweep(base_url, args, args.mix)
+                finally:
+                    stop_server(server)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
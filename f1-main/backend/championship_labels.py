@@ -0,0 +1,20 @@
+import pandas as pd
+
+
+def season_champions(standings, id_col):
+    """Return one (year, id_col) row per season for the championship winner.
+
+    standings needs 'year', 'points' and id_col columns, e.g. driver_standings
+    joined with the race year. The winner is the first row, in standings order,
+    that holds the season's maximum points.
+    """
+    season_max_points = standings.groupby('year')['points'].transform('max')
+    leaders = standings.loc[standings['points'] == season_max_points, ['year', id_col]]
+    return leaders.drop_duplicates(subset=['year'])
+
+
+def label_champions(frame, champions, id_col):
+    """Return a 0/1 array marking the rows of frame whose (year, id_col) won that season."""
+    keys = pd.MultiIndex.from_arrays([frame['year'].astype('int64'), frame[id_col].astype('int64')])
+    winners = pd.MultiIndex.from_arrays([champions['year'].astype('int64'), champions[id_col].astype('int64')])
+    return keys.isin(winners).astype(int)
@@ -0,0 +1,131 @@
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import average_precision_score
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+from sklearn.preprocessing import StandardScaler
+
+from metrics import span
+
+# Candidate families: fixed parameters plus the grid searched on top of them
+SEARCH_SPACE = [
+    (RandomForestClassifier,
+     {'random_state': 42, 'class_weight': 'balanced'},
+     {'n_estimators': [100, 300], 'max_depth': [None, 8], 'min_samples_leaf': [1, 3],
+      'max_features': ['sqrt', None]}),
+    (HistGradientBoostingClassifier,
+     {'random_state': 42, 'class_weight': 'balanced', 'max_iter': 200},
+     {'learning_rate': [0.05, 0.1], 'max_depth': [3, None], 'l2_regularization': [0.0, 1.0]}),
+]
+
+
+def search_candidates(space=SEARCH_SPACE):
+    """Return one unfitted estimator per point of every grid in the search space."""
+    return [estimator_cls(**fixed, **params) for estimator_cls, fixed, grid in space for params in ParameterGrid(grid)]
+
+
+def season_folds(years, n_splits=5):
+    """Forward-chaining folds over whole seasons: train on earlier seasons, validate on the next block.
+
+    Returns (train_rows, test_rows) index pairs, so no season is split between
+    train and test and no fold is validated on seasons older than its training data.
+    """
+    years = np.asarray(years)
+    seasons = np.unique(years)
+    folds = []
+    for train_seasons, test_seasons in TimeSeriesSplit(n_splits=n_splits).split(seasons):
+        folds.append((np.flatnonzero(np.isin(years, seasons[train_seasons])),
+                      np.flatnonzero(np.isin(years, seasons[test_seasons]))))
+    return folds
+
+
+def prepare_folds(X, y, years, n_splits=5):
+    """Slice and scale every fold once; all candidates then share the same matrices."""
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    years = np.asarray(years)
+    prepared = []
+    for train_rows, test_rows in season_folds(years, n_splits):
+        # The scaler only sees the fold's training seasons, as it would in production
+        scaler = StandardScaler().fit(X[train_rows])
+        prepared.append({
+            'X_train': scaler.transform(X[train_rows]),
+            'y_train': y[train_rows],
+            'X_test': scaler.transform(X[test_rows]),
+            'y_test': y[test_rows],
+            'years_test': years[test_rows],
+        })
+    return prepared
+
+
+def champion_hit_rate(y_true, probabilities, years):
+    """Share of seasons with a champion where the top-scored entry is that champion."""
+    hits = seasons = 0
+    for year in np.unique(years):
+        rows = years == year
+        if not y_true[rows].any():
+            continue
+        seasons += 1
+        hits += bool(y_true[rows][np.argmax(probabilities[rows])])
+    return hits / seasons if seasons else 0.0
+
+
+def score_fold(estimator, fold):
+    """Fit a fresh copy of estimator on one fold and score it on the fold's held-out seasons."""
+    model = clone(estimator).fit(fold['X_train'], fold['y_train'])
+    probabilities = model.predict_proba(fold['X_test'])[:, 1]
+    return (champion_hit_rate(fold['y_test'], probabilities, fold['years_test']),
+            average_precision_score(fold['y_test'], probabilities))
+
+
+def describe(estimator):
+    changed = {key: value for key, value in estimator.get_params().items()
+               if key not in ('random_state', 'class_weight')}
+    defaults = type(estimator)().get_params()
+    params = ', '.join(f'{key}={value}' for key, value in changed.items() if defaults.get(key) != value)
+    return f'{type(estimator).__name__}({params})'
+
+
+def search_championship_model(X, y, years, n_splits=5, n_jobs=-1, candidates=None):
+    """Pick the best candidate by season-based cross-validation and refit it on every season.
+
+    Every (candidate, fold) fit is an independent job spread over n_jobs
+    workers. Candidates are ranked by the mean share of held-out seasons
+    whose champion they score highest, with mean average precision breaking
+    ties. Returns the refitted model, a scaler fitted on all rows and the
+    ranking as a list of dicts, best first.
+    """
+    candidates = search_candidates() if candidates is None else candidates
+    with span('scale'):
+        folds = prepare_folds(X, y, years, n_splits)
+
+    with span('cross_validate'):
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(score_fold)(candidate, fold) for candidate in candidates for fold in folds
+        )
+
+    ranking = []
+    for i, candidate in enumerate(candidates):
+        hit_rates, precisions = zip(*scores[i * len(folds):(i + 1) * len(folds)])
+        ranking.append({
+            'candidate': describe(candidate),
+            'estimator': candidate,
+            'champion_hit_rate': float(np.mean(hit_rates)),
+            'average_precision': float(np.mean(precisions)),
+            'average_precision_std': float(np.std(precisions)),
+        })
+    ranking.sort(key=lambda entry: (entry['champion_hit_rate'], entry['average_precision']), reverse=True)
+
+    scaler = StandardScaler()
+    with span('scale'):
+        X_scaled = scaler.fit_transform(X)
+    model = clone(ranking[0]['estimator'])
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=n_jobs)
+    with span('fit'):
+        model.fit(X_scaled, np.asarray(y))
+    if 'n_jobs' in model.get_params():
+        # Keep inference single-threaded; predicting a few rows on a thread pool only adds overhead
+        model.set_params(n_jobs=None)
+    return model, scaler, ranking
@@ -0,0 +1,226 @@
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from compact_forest import load_model
+from metrics import span
+from pace_features import PACE_MODEL_COLS
+from train_championship_models import (
+    CONSTRUCTORS_FEATURE_COLS,
+    WDC_FEATURE_COLS,
+    FeaturePipeline,
+    championship_results,
+    model_feature_cols,
+    rank_championship_candidates,
+    rollup_season_stats,
+    score_championship_candidates,
+)
+
+# Season whose features stand in for future years
+PROXY_YEAR = 2023
+
+
+def scenario_overrides(blocks, field):
+    """Flatten one override field of every (scenario, source) block into a (year, driverId, field) frame, the block number as year."""
+    return pd.DataFrame([(block, driver_id, value)
+                         for block, (scenario, _) in enumerate(blocks)
+                         for driver_id, value in (scenario.get(field) or {}).items()],
+                        columns=['year', 'driverId', field])
+
+
+def apply_overrides(stacked, sources, driver_teams, points):
+    """Apply what-if overrides to stacked season partials, in place.
+
+    driver_teams (driverId -> constructorId) moves a driver's season results
+    to another team; points (driverId -> delta) adds points to a driver's
+    season, on the team they raced for most. Both flow through to the team's
+    totals. Raises LookupError for a driver who did not race in the season.
+    """
+    requested = pd.concat([driver_teams[['year', 'driverId']], points[['year', 'driverId']]]).astype('int64')
+    if len(requested):
+        raced = requested.merge(stacked[['year', 'driverId']].drop_duplicates(), how='left', indicator=True)
+        missing = raced[raced['_merge'] == 'left_only']
+        if len(missing):
+            block, driver_id = missing.iloc[0][['year', 'driverId']]
+            raise LookupError(f"Driver {driver_id} did not race in {sources[block]}")
+
+    if len(driver_teams):
+        teams = stacked[['year', 'driverId']].merge(driver_teams, how='left')['driver_teams']
+        stacked['constructorId'] = teams.fillna(stacked['constructorId']).to_numpy().astype('int64')
+    if len(points):
+        main_rows = stacked.sort_values('races', ascending=False, kind='stable').drop_duplicates(['year', 'driverId'])
+        deltas = main_rows[['year', 'driverId']].reset_index().merge(points)
+        stacked.loc[deltas['index'].to_numpy(), 'points_sum'] += deltas['points'].to_numpy()
+
+
+def with_season_columns(stats, sources, features, key, columns):
+    """Join per-season columns (experience, age) onto block stats from the block's source season."""
+    stats = stats.rename(columns={'year': 'block'})
+    stats['year'] = sources[stats['block'].to_numpy()]
+    return stats.merge(features[['year', key] + columns], on=['year', key], how='left').fillna(0)
+
+
+class ChampionshipPredictor:
+    """Long-lived championship predictor holding models, scalers and feature frames.
+
+    Models and features are loaded once; ranked predictions are cached per
+    year with least-recently-used eviction.
+    """
+
+    def __init__(self, model_dir='backend/models', cache_size=32, pipeline=None, reference=None):
+        self.model_dir = model_dir
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Load models and scalers
+        self.wdc_model = load_model(os.path.join(model_dir, 'wdc_model.joblib'))
+        self.wdc_scaler = joblib.load(os.path.join(model_dir, 'wdc_scaler.joblib'))
+        self.constructors_model = load_model(os.path.join(model_dir, 'constructors_model.joblib'))
+        self.constructors_scaler = joblib.load(os.path.join(model_dir, 'constructors_scaler.joblib'))
+        # Models trained with --pace-features also take the pace columns
+        self.wdc_feature_cols = model_feature_cols(self.wdc_scaler, WDC_FEATURE_COLS)
+        self.constructors_feature_cols = model_feature_cols(self.constructors_scaler, CONSTRUCTORS_FEATURE_COLS)
+
+        # Build the season features once
+        self.pipeline = pipeline or FeaturePipeline()
+        self._slice_features()
+
+        reference = reference or self.pipeline.reference
+        self.driver_names = reference.driver_names
+        self.constructor_names = reference.constructor_names
+
+    def _slice_features(self):
+        driver_features = self.pipeline.model_features('driverId', self.wdc_feature_cols)
+        constructor_features = self.pipeline.model_features('constructorId', self.constructors_feature_cols)
+        self.driver_features = driver_features[driver_features['year'] == PROXY_YEAR].reset_index(drop=True)
+        self.constructor_features = constructor_features[constructor_features['year'] == PROXY_YEAR].reset_index(drop=True)
+
+    def _predict(self, year):
+        driver_features_year = self.driver_features.assign(year=year)
+        constructor_features_year = self.constructor_features.assign(year=year)
+
+        wdc_results = rank_championship_candidates(
+            driver_features_year, self.wdc_feature_cols, self.wdc_model, self.wdc_scaler,
+            'driverId', self.driver_names, 'driver_id', 'driver_name', 'Driver'
+        )
+        constructors_results = rank_championship_candidates(
+            constructor_features_year, self.constructors_feature_cols, self.constructors_model, self.constructors_scaler,
+            'constructorId', self.constructor_names, 'constructor_id', 'constructor_name', 'Constructor'
+        )
+        return wdc_results, constructors_results
+
+    @staticmethod
+    def _rank_blocks(features, feature_cols, model, scaler, block_count, id_col, names, id_key, name_key, fallback):
+        """Score stacked block features in one pass and return each block's results ranked by probability."""
+        predictions, probabilities = score_championship_candidates(features, feature_cols, model, scaler)
+        blocks = features['block'].to_numpy()
+        # Sort by block, then by descending probability; lexsort is stable, so ties keep feature order
+        order = np.lexsort((-probabilities, blocks))
+        results = championship_results(features[id_col].to_numpy().astype(int)[order], predictions[order],
+                                       probabilities[order], names, id_key, name_key, fallback)
+        ends = np.cumsum(np.bincount(blocks, minlength=block_count)).tolist()
+        return [results[start:end] for start, end in zip([0] + ends[:-1], ends)]
+
+    def predict_scenarios(self, years, scenarios):
+        """Score every scenario for every year and return [(name, year, wdc_results, constructors_results)].
+
+        scenarios are dicts with a name and optional driver_teams and points
+        overrides (see apply_overrides()). Years with a recorded season are
+        scored on that season; later years use the PROXY_YEAR season, as
+        predict() does, and so all get the same result. Every (scenario,
+        season) pair becomes a block of rows, and all blocks go through one
+        rollup and one predict_proba call per model. Raises ValueError for a
+        year before the last recorded season that has no data, and
+        LookupError for an unknown constructor id in driver_teams.
+        """
+        partials = self.pipeline.season_partials
+        seasons = {year: season for year, season in partials.groupby('year')}
+        first_season, last_season = min(seasons), max(seasons)
+        for year in years:
+            if year not in seasons and year <= last_season:
+                raise ValueError(f"No season data for {year}; recorded seasons run from {first_season} to "
+                                 f"{last_season}, later years are projected from {PROXY_YEAR}")
+        unknown = sorted({team for scenario in scenarios for team in (scenario.get('driver_teams') or {}).values()}
+                         - self.constructor_names.keys())
+        if unknown:
+            raise LookupError(f"Unknown constructor ids {unknown}")
+
+        # Years scored on the same season give the same result, so each (scenario, season) is scored once
+        requested = [(i, year, year if year in seasons else PROXY_YEAR) for i in range(len(scenarios)) for year in years]
+        block_index = {}
+        for i, _, source in requested:
+            block_index.setdefault((i, source), len(block_index))
+        blocks = [(scenarios[i], source) for i, source in block_index]
+        sources = np.array([source for _, source in blocks])
+
+        # The block number stands in for the year, so one groupby rolls up every block
+        with span('features'):
+            stacked = pd.concat([seasons[source] for source in sources], ignore_index=True)
+            stacked['year'] = np.repeat(np.arange(len(blocks)), [len(seasons[source]) for source in sources])
+            apply_overrides(stacked, sources, scenario_overrides(blocks, 'driver_teams'),
+                            scenario_overrides(blocks, 'points'))
+
+            # Experience, age and pace are per season, not per race, so they come from the source season
+            driver_features = with_season_columns(
+                rollup_season_stats(stacked, 'driverId'), sources,
+                self.pipeline.model_features('driverId', self.wdc_feature_cols), 'driverId',
+                ['seasons_experience', 'age'] + [col for col in self.wdc_feature_cols if col in PACE_MODEL_COLS]
+            )
+            constructor_stats = rollup_season_stats(stacked, 'constructorId').merge(
+                stacked.groupby(['year', 'constructorId'])['driverId'].nunique().rename('num_drivers').reset_index(),
+                on=['year', 'constructorId']
+            )
+            constructor_features = with_season_columns(
+                constructor_stats, sources,
+                self.pipeline.model_features('constructorId', self.constructors_feature_cols), 'constructorId',
+                ['seasons_experience'] + [col for col in self.constructors_feature_cols if col in PACE_MODEL_COLS]
+            )
+
+        wdc_results = self._rank_blocks(
+            driver_features, self.wdc_feature_cols, self.wdc_model, self.wdc_scaler, len(blocks),
+            'driverId', self.driver_names, 'driver_id', 'driver_name', 'Driver'
+        )
+        constructors_results = self._rank_blocks(
+            constructor_features, self.constructors_feature_cols, self.constructors_model, self.constructors_scaler,
+            len(blocks), 'constructorId', self.constructor_names, 'constructor_id', 'constructor_name', 'Constructor'
+        )
+        return [(scenarios[i]['name'], year, wdc_results[block_index[(i, source)]],
+                 constructors_results[block_index[(i, source)]])
+                for i, year, source in requested]
+
+    def predict(self, year):
+        """Return (wdc_results, constructors_results) for a year, serving repeats from the cache."""
+        with self._lock:
+            if year in self._cache:
+                self._cache.move_to_end(year)
+                return self._cache[year]
+
+        predictions = self._predict(year)
+
+        with self._lock:
+            self._cache[year] = predictions
+            self._cache.move_to_end(year)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return predictions
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def apply_update(self, update):
+        """Pick up features changed by IncrementalFeatureStore.apply_race(); return whether predictions changed.
+
+        Predictions only read the proxy season, so races from other seasons
+        leave the cache untouched.
+        """
+        if update['year'] != PROXY_YEAR:
+            return False
+        self._slice_features()
+        self.clear_cache()
+        return True
@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from metrics import span
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; columnar JSON is always available
+    pa = None
+
+COLUMNAR_MEDIA_TYPE = 'application/vnd.f1.columnar+json'
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+ARROW_AVAILABLE = pa is not None
+
+
+def _is_text(values):
+    return values.dtype == object or isinstance(values.dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+
+def encode_columnar(frame):
+    """Encode a frame as JSON arrays, one per column, with text columns dictionary-encoded.
+
+    {"length": n, "columns": {"year": [...], "driver_name": {"dictionary": [...], "indices": [...]}}}
+    Each column is converted straight from its NumPy array; missing values become null.
+    """
+    with span('serialize'):
+        columns = {}
+        for name in frame.columns:
+            values = frame[name]
+            if _is_text(values):
+                codes, uniques = pd.factorize(values)
+                # factorize marks missing values with -1; they are sent as null indices
+                indices = codes.tolist() if (codes >= 0).all() else np.where(codes >= 0, codes, None).tolist()
+                columns[name] = {'dictionary': uniques.tolist(), 'indices': indices}
+            elif values.isna().any():
+                columns[name] = values.astype(object).where(values.notna(), None).tolist()
+            else:
+                columns[name] = values.to_numpy().tolist()
+        return json.dumps({'length': len(frame), 'columns': columns}, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+
+
+def encode_arrow(frame):
+    """Encode a frame as an Arrow IPC stream, with text columns dictionary-encoded."""
+    with span('serialize'):
+        arrays = []
+        for name in frame.columns:
+            values = frame[name]
+            array = pa.array(values.to_numpy(), from_pandas=True)
+            arrays.append(array.dictionary_encode() if _is_text(values) else array)
+        table = pa.Table.from_arrays(arrays, names=list(frame.columns))
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
@@ -0,0 +1,158 @@
+import os
+
+import joblib
+import numpy as np
+
+from metrics import span
+
+# Suffix of the compact artifact written next to each sklearn model
+COMPACT_SUFFIX = '.forest.joblib'
+
+
+def compact_path(model_path):
+    """Return the compact artifact path for a model path, e.g. backend/models/wdc_model.forest.joblib."""
+    stem = model_path[:-len('.joblib')] if model_path.endswith('.joblib') else model_path
+    return stem + COMPACT_SUFFIX
+
+
+def export_forest(model, model_path):
+    """Write a fitted RandomForestClassifier or RandomForestRegressor as flat node arrays next to model_path.
+
+    All trees are concatenated into one set of arrays, with child pointers
+    offset to global node ids, and stored uncompressed so load_model() can
+    memory-map them; workers loading the same file share its pages.
+    """
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+
+    is_classifier = hasattr(model, 'classes_')
+    feature, threshold, left, right, values = [], [], [], [], []
+    for tree, offset in zip(trees, offsets):
+        is_leaf = tree.children_left == -1
+        # Leaves point at themselves so a traversal can keep stepping once it has arrived
+        own_ids = np.arange(tree.node_count) + offset
+        left.append(np.where(is_leaf, own_ids, tree.children_left + offset))
+        right.append(np.where(is_leaf, own_ids, tree.children_right + offset))
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+
+        if is_classifier:
+            # Per-node class distribution, as used by predict_proba
+            counts = tree.value[:, 0, :]
+            values.append(counts / counts.sum(axis=1, keepdims=True))
+        else:
+            # Per-node mean target, one column per output
+            values.append(tree.value[:, :, 0])
+
+    n_features = model.n_features_in_
+    arrays = {
+        'roots': offsets[:-1].astype(np.int32),
+        'feature': np.concatenate(feature).astype(np.int8 if n_features < 2 ** 7 else np.int32),
+        'threshold': np.concatenate(threshold),
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'max_depth': np.int32(max(tree.max_depth for tree in trees)),
+        'n_features': np.int32(n_features),
+    }
+    if is_classifier:
+        arrays['classes'] = np.asarray(model.classes_)
+        arrays['proba'] = np.concatenate(values).astype(np.float32)
+    else:
+        arrays['value'] = np.concatenate(values)
+    if hasattr(model, 'feature_names_in_'):
+        arrays['feature_names'] = np.asarray(model.feature_names_in_, dtype=str)
+
+    path = compact_path(model_path)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    joblib.dump(arrays, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_model(model, model_path):
+    """Export model's compact artifact if it is a forest; otherwise remove any stale one.
+
+    load_model() prefers the compact file, so one left over from an earlier
+    forest would shadow a model of another kind saved at the same path.
+    """
+    # Imported here so serving, which only loads models, does not pay for importing sklearn
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+    if isinstance(model, (RandomForestClassifier, RandomForestRegressor)):
+        return export_forest(model, model_path)
+    path = compact_path(model_path)
+    if os.path.exists(path):
+        os.remove(path)
+    return None
+
+
+class CompactForest:
+    """Inference-only random forest over the arrays written by export_forest().
+
+    For a classifier, predict_proba() matches RandomForestClassifier.predict_proba
+    to within float32 rounding of the leaf distributions. For a regressor,
+    predict() averages the float64 leaf values as RandomForestRegressor.predict does.
+    """
+
+    def __init__(self, arrays):
+        self.classes_ = arrays.get('classes')
+        self.n_features_in_ = int(arrays['n_features'])
+        self.n_estimators = len(arrays['roots'])
+        self._roots = np.asarray(arrays['roots'])
+        self._feature = arrays['feature']
+        self._threshold = arrays['threshold']
+        self._left = arrays['left']
+        self._right = arrays['right']
+        self._proba = arrays.get('proba')
+        self._value = arrays.get('value')
+        self._max_depth = int(arrays['max_depth'])
+        self.feature_names_in_ = arrays.get('feature_names')
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        return cls(joblib.load(path, mmap_mode=mmap_mode))
+
+    def apply(self, X):
+        """Return the leaf node id reached in every tree, shape (n_samples, n_estimators)."""
+        if self.feature_names_in_ is not None and hasattr(X, 'columns'):
+            X = X[list(self.feature_names_in_)]
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the forest is expecting {self.n_features_in_} features as input")
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self._roots, (len(X), self.n_estimators))
+
+        # Step every (sample, tree) pair one level at a time; leaves loop onto themselves
+        for _ in range(self._max_depth):
+            go_left = X[rows, self._feature[nodes]] <= self._threshold[nodes]
+            nodes = np.where(go_left, self._left[nodes], self._right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        return self._proba[leaves].mean(axis=1, dtype=np.float64)
+
+    def predict(self, X):
+        if self.classes_ is None:
+            predictions = self._value[self.apply(X)].mean(axis=1)
+            return predictions[:, 0] if predictions.shape[1] == 1 else predictions
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def load_model(model_path):
+    """Load a forest for inference, preferring its compact artifact when one was exported."""
+    path = compact_path(model_path)
+    with span('load'):
+        if os.path.exists(path):
+            return CompactForest.load(path)
+        return joblib.load(model_path)
+
+
+if __name__ == "__main__":
+    # Export compact artifacts for already trained models, e.g.
+    # python compact_forest.py backend/models/wdc_model.joblib
+    import sys
+
+    for model_path in sys.argv[1:]:
+        print(f"Exported {export_forest(joblib.load(model_path), model_path)}")
@@ -1,54 +1,118 @@
 import fastf1 as ff1
 import pandas as pd
 from fastf1.core import NoLapDataError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
 import warnings
 warnings.filterwarnings('ignore')
 
-def fetch_f1_data(seasons):
+# Completed sessions are cached here, one file per (season, round)
+SESSION_CACHE_DIR = 'backend/session_cache'
+
+RESULT_COLUMNS = ['Season', 'Round', 'RaceName', 'DriverName', 'TeamName',
+                  'GridPosition', 'FinalPosition', 'Points']
+
+
+class FastF1SessionSource:
+    """Session source backed by the FastF1 API.
+
+    fetch_f1_data() accepts any object with the same two methods, so it can
+    run offline against a stub that returns canned results.
+    """
+
+    def round_count(self, season):
+        return len(ff1.get_event_schedule(season))
+
+    def race_results(self, season, round_num):
+        """Return (event name, results frame) for a race session."""
+        session = ff1.get_session(season, round_num, 'R')
+        session.load()
+        return session.event['EventName'], session.results
+
+
+def session_cache_path(cache_dir, season, round_num):
+    return os.path.join(cache_dir, f'{season}-{round_num:02d}.pkl')
+
+
+def results_to_frame(season, round_num, race_name, results):
+    """Build the dataset rows for one race column-wise from a session results frame."""
+    if results is None or results.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    return pd.DataFrame({
+        'Season': season,
+        'Round': round_num,
+        'RaceName': race_name,
+        'DriverName': results['FullName'].to_numpy(),
+        'TeamName': results['TeamName'].to_numpy(),
+        'GridPosition': results['GridPosition'].to_numpy(),
+        'FinalPosition': results['Position'].to_numpy(),
+        'Points': results['Points'].to_numpy()
+    }, columns=RESULT_COLUMNS)
+
+
+def fetch_session(source, season, round_num, cache_dir):
+    """Fetch one race, reusing the on-disk result if a previous run completed it.
+
+    Races without results (not run yet, or missing data) are not cached, so a
+    later run fetches them again.
+    """
+    path = session_cache_path(cache_dir, season, round_num)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+
+    race_name, results = source.race_results(season, round_num)
+    frame = results_to_frame(season, round_num, race_name, results)
+    if frame.empty:
+        return frame
+
+    # Write atomically so an interrupted run never leaves a partial session behind
+    tmp_path = f'{path}.tmp'
+    frame.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+    return frame
+
+
+def fetch_f1_data(seasons, workers=4, cache_dir=SESSION_CACHE_DIR, source=None):
     """
     Fetch F1 race data for given seasons and prepare dataset.
+
+    Races are loaded concurrently by a pool of `workers` threads. Each
+    completed race is cached in `cache_dir`, so an interrupted or repeated run
+    resumes from the races it has not finished yet.
     """
-    all_races = []
+    source = source or FastF1SessionSource()
+    os.makedirs(cache_dir, exist_ok=True)
 
+    # Get all events for each season
+    tasks = []
     for season in seasons:
         try:
-            # Get all events for the season
-            events = ff1.get_event_schedule(season)
+            rounds = source.round_count(season)
             print(f"Processing season {season}...")
-
-            for round_num in range(1, len(events) + 1):
-                try:
-                    # Load session data
-                    session = ff1.get_session(season, round_num, 'R')
-                    session.load()
-
-                    # Get results
-                    results = session.results
-
-                    if results is not None and not results.empty:
-                        for _, driver in results.iterrows():
-                            race_data = {
-                                'Season': season,
-                                'Round': round_num,
-                                'RaceName': session.event['EventName'],
-                                'DriverName': driver['FullName'],
-                                'TeamName': driver['TeamName'],
-                                'GridPosition': driver['GridPosition'],
-                                'FinalPosition': driver['Position'],
-                                'Points': driver['Points']
-                            }
-                            all_races.append(race_data)
-
-                except (NoLapDataError, KeyError, ValueError) as e:
-                    print(f"Skipping round {round_num} in season {season}: {e}")
-                    continue
-
+            tasks.extend((season, round_num) for round_num in range(1, rounds + 1))
         except Exception as e:
             print(f"Error processing season {season}: {e}")
             continue
 
+    frames = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(fetch_session, source, season, round_num, cache_dir): (season, round_num)
+            for season, round_num in tasks
+        }
+        for future in as_completed(futures):
+            season, round_num = futures[future]
+            try:
+                frames[(season, round_num)] = future.result()
+            except (NoLapDataError, KeyError, ValueError) as e:
+                print(f"Skipping round {round_num} in season {season}: {e}")
+            except Exception as e:
+                print(f"Error processing round {round_num} in season {season}: {e}")
+
     # Create DataFrame
-    df = pd.DataFrame(all_races)
+    ordered = [frames[key] for key in sorted(frames) if not frames[key].empty]
+    df = pd.concat(ordered, ignore_index=True) if ordered else pd.DataFrame(columns=RESULT_COLUMNS)
 
     # Clean data
     df = df.dropna(subset=['FinalPosition', 'GridPosition'])
@@ -66,4 +130,4 @@ if __name__ == "__main__":
     seasons = list(range(2016, 2024))  # 2016 to 2023
     df = fetch_f1_data(seasons)
     df.to_csv('backend/f1_data.csv', index=False)
-    print(f"Data saved to f1_data.csv with {len(df)} records")
\ No newline at end of file
+    print(f"Data saved to f1_data.csv with {len(df)} records")
@@ -0,0 +1,157 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset_schema import NA_VALUES, SCHEMAS
+from metrics import span
+
+DATASET_DIR = '../daasets'
+CACHE_DIRNAME = '.cache'
+
+# String columns with at most this share of distinct values load as categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _file_hash(path, schema=None):
+    """Hash a file's contents, and the schema it is read with, so that changing either invalidates the cache."""
+    digest = hashlib.sha1(repr(sorted(schema.items())).encode() if schema else b'')
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_csv(source, schema):
+    """Parse a CSV with the schema's column types, failing on values that do not fit them."""
+    if not schema:
+        # Infer each column's type from all of it; chunked inference can mix ints and strings in large files
+        return pd.read_csv(source, low_memory=False, na_values=NA_VALUES, keep_default_na=False)
+
+    # Integers are parsed at 64 bits and narrowed after, since read_csv wraps values that overflow
+    wide = {col: 'int64' if dtype.startswith('int') else 'Int64' if dtype.startswith('Int') else
+            object if dtype == 'str' else dtype for col, dtype in schema.items()}
+    df = pd.read_csv(source, dtype=wide, na_values=NA_VALUES, keep_default_na=False, low_memory=False)
+    for col, dtype in schema.items():
+        if col in df.columns and wide[col] != dtype and wide[col] is not object:
+            narrow = df[col].astype(dtype)
+            if not narrow.astype(wide[col]).equals(df[col]):
+                raise ValueError(f"{os.path.basename(source)}: {col} has values outside {dtype}")
+            df[col] = narrow
+    return df
+
+
+def _encode_frame(df, schema=None):
+    """Convert a parsed CSV frame into narrow, typed NumPy column arrays.
+
+    Columns in the schema keep their declared types; other columns are
+    narrowed as far as their values allow.
+    """
+    schema = schema or {}
+    arrays = {}
+    kinds = []
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(values):
+            # Nullable integers are stored as values plus a missing-value mask
+            arrays[col] = values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0)
+            arrays[f'{col}.__mask__'] = values.isna().to_numpy()
+            kinds.append('nullable')
+        elif pd.api.types.is_integer_dtype(values):
+            arrays[col] = values.to_numpy() if col in schema else pd.to_numeric(values, downcast='integer').to_numpy()
+            kinds.append('num')
+        elif pd.api.types.is_float_dtype(values) and col in schema:
+            arrays[col] = values.to_numpy()
+            kinds.append('num')
+        elif pd.api.types.is_float_dtype(values):
+            # Narrow to float32 only when no value changes, e.g. points of 1.33 stay float64
+            narrow = values.to_numpy(dtype=np.float32)
+            exact = np.array_equal(narrow.astype(np.float64), values.to_numpy(), equal_nan=True)
+            arrays[col] = narrow if exact else values.to_numpy()
+            kinds.append('num')
+        else:
+            # Strings are dictionary-encoded on disk either way
+            categorical = pd.Categorical(values)
+            arrays[col] = categorical.codes.astype(np.int16 if len(categorical.categories) < 2 ** 15 else np.int32)
+            arrays[f'{col}.__categories__'] = np.asarray(categorical.categories, dtype=str)
+            if col in schema:
+                kinds.append('cat' if schema[col] == 'category' else 'str')
+            else:
+                ratio = len(categorical.categories) / max(1, len(values))
+                kinds.append('cat' if ratio <= CATEGORY_MAX_RATIO else 'str')
+
+    arrays['__columns__'] = np.asarray(df.columns, dtype=str)
+    arrays['__kinds__'] = np.asarray(kinds, dtype=str)
+    return arrays
+
+
+def _decode_frame(data, columns=None):
+    """Rebuild a frame from _encode_frame() arrays; only the given columns are read, in that order."""
+    kinds = dict(zip(data['__columns__'], data['__kinds__']))
+    for col in columns or ():
+        if col not in kinds:
+            raise KeyError(f"No column {col}")
+
+    decoded = {}
+    for col in columns or kinds:
+        kind = kinds[col]
+        values = data[col]
+        if kind == 'num':
+            decoded[col] = values
+            continue
+        if kind == 'nullable':
+            decoded[col] = pd.arrays.IntegerArray(values, data[f'{col}.__mask__'])
+            continue
+
+        categorical = pd.Categorical.from_codes(values, categories=data[f'{col}.__categories__'].astype(object))
+        decoded[col] = categorical if kind == 'cat' else np.asarray(categorical, dtype=object)
+    return pd.DataFrame(decoded)
+
+
+def cache_path(name, dataset_dir=DATASET_DIR):
+    """Return the columnar cache file for the current contents of a dataset CSV."""
+    stem = name[:-4] if name.endswith('.csv') else name
+    source = os.path.join(dataset_dir, f'{stem}.csv')
+    schema = SCHEMAS.get(stem)
+    return source, os.path.join(dataset_dir, CACHE_DIRNAME, f'{stem}-{_file_hash(source, schema)[:16]}.npz')
+
+
+def load_dataset(name, dataset_dir=DATASET_DIR, columns=None):
+    """Load a daasets/ table, e.g. load_dataset('results'), typed by dataset_schema.SCHEMAS.
+
+    The first load parses the CSV and writes a typed columnar copy keyed by the
+    source file's (and schema's) hash. Later loads read the copy, until the CSV
+    changes. Pass columns to load only those; the others are never read, so
+    long-lived frames hold just what their users need.
+    """
+    with span('load'):
+        return _load_dataset(name, dataset_dir, columns)
+
+
+def _load_dataset(name, dataset_dir, columns):
+    source, path = cache_path(name, dataset_dir)
+    if os.path.exists(path):
+        with np.load(path) as data:
+            return _decode_frame(data, columns)
+
+    stem = os.path.basename(source)[:-4]
+    schema = SCHEMAS.get(stem)
+    arrays = _encode_frame(_read_csv(source, schema), schema)
+
+    # Write atomically and drop copies of older versions of this file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for stale in glob.glob(os.path.join(os.path.dirname(path), f'{stem}-*.npz')):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+    with np.load(path) as data:
+        return _decode_frame(data, columns)
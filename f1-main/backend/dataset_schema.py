@@ -0,0 +1,76 @@
+"""Column types for every daasets/ table.
+
+Types are numpy dtypes, pandas nullable integers ('Int8', 'Int16', 'Int32')
+for the integer columns that have missing values, 'category' for repeated strings and
+'str' for strings that are mostly distinct or are concatenated (kept as
+Python objects). Ergast's \\N placeholder and empty fields load as missing.
+"""
+
+# Ergast marks missing values with \N
+MISSING = '\\N'
+NA_VALUES = [MISSING, '']
+
+# Race and row ids grow with the data (benchmarks stack copies of every season),
+# so they get 32 bits; driver, constructor, circuit and status ids stay 16 bits
+RACE_ID = 'int32'
+ROW_ID = 'int32'
+REF_ID = 'int16'
+
+SCHEMAS = {
+    'circuits': {
+        'circuitId': REF_ID, 'circuitRef': 'str', 'name': 'str', 'location': 'str', 'country': 'category',
+        'lat': 'float64', 'lng': 'float64', 'alt': 'int16', 'url': 'str',
+    },
+    'constructor_results': {
+        'constructorResultsId': ROW_ID, 'raceId': RACE_ID, 'constructorId': REF_ID, 'points': 'float64',
+        'status': 'category',
+    },
+    'constructor_standings': {
+        'constructorStandingsId': ROW_ID, 'raceId': RACE_ID, 'constructorId': REF_ID, 'points': 'float64',
+        'position': 'int8', 'positionText': 'category', 'wins': 'int8',
+    },
+    'constructors': {
+        'constructorId': REF_ID, 'constructorRef': 'str', 'name': 'str', 'nationality': 'category', 'url': 'str',
+    },
+    'driver_standings': {
+        'driverStandingsId': ROW_ID, 'raceId': RACE_ID, 'driverId': REF_ID, 'points': 'float64',
+        'position': 'int8', 'positionText': 'category', 'wins': 'int8',
+    },
+    'drivers': {
+        'driverId': REF_ID, 'driverRef': 'str', 'number': 'Int16', 'code': 'category', 'forename': 'str',
+        'surname': 'str', 'dob': 'str', 'nationality': 'category', 'url': 'str',
+    },
+    'pit_stops': {
+        'raceId': RACE_ID, 'driverId': REF_ID, 'stop': 'int8', 'lap': 'int16', 'time': 'str', 'duration': 'str',
+        'milliseconds': 'int32',
+    },
+    'qualifying': {
+        'qualifyId': ROW_ID, 'raceId': RACE_ID, 'driverId': REF_ID, 'constructorId': REF_ID, 'number': 'int16',
+        'position': 'int8', 'q1': 'category', 'q2': 'category', 'q3': 'category',
+    },
+    'races': {
+        'raceId': RACE_ID, 'year': 'int16', 'round': 'int8', 'circuitId': REF_ID, 'name': 'category',
+        'date': 'str', 'time': 'category', 'url': 'str',
+        'fp1_date': 'category', 'fp1_time': 'category', 'fp2_date': 'category', 'fp2_time': 'category',
+        'fp3_date': 'category', 'fp3_time': 'category', 'quali_date': 'category', 'quali_time': 'category',
+        'sprint_date': 'category', 'sprint_time': 'category',
+    },
+    'results': {
+        'resultId': ROW_ID, 'raceId': RACE_ID, 'driverId': REF_ID, 'constructorId': REF_ID, 'number': 'Int16',
+        'grid': 'int8', 'position': 'Int8', 'positionText': 'category', 'positionOrder': 'int8',
+        'points': 'float64', 'laps': 'int16', 'time': 'category', 'milliseconds': 'Int32', 'fastestLap': 'Int16',
+        'rank': 'Int8', 'fastestLapTime': 'category', 'fastestLapSpeed': 'float64', 'statusId': REF_ID,
+    },
+    'seasons': {
+        'year': 'int16', 'url': 'str',
+    },
+    'sprint_results': {
+        'resultId': ROW_ID, 'raceId': RACE_ID, 'driverId': REF_ID, 'constructorId': REF_ID, 'number': 'int16',
+        'grid': 'int8', 'position': 'Int8', 'positionText': 'category', 'positionOrder': 'int8',
+        'points': 'float64', 'laps': 'int16', 'time': 'category', 'milliseconds': 'Int32', 'fastestLap': 'Int16',
+        'fastestLapTime': 'category', 'statusId': REF_ID,
+    },
+    'status': {
+        'statusId': REF_ID, 'status': 'str',
+    },
+}
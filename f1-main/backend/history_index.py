@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+
+class ResultHistoryIndex:
+    """Race-level results grouped by one id column and sorted by year.
+
+    Each id owns its own year, points and positionOrder arrays, so the races
+    of a year range are found by binary search over them instead of
+    filtering the whole results table, and add_race() only replaces the
+    arrays of the ids that took part.
+    """
+
+    def __init__(self, results_with_year, key):
+        results = results_with_year.sort_values([key, 'year'], kind='stable')
+        self.key = key
+        years = results['year'].to_numpy(dtype=np.int64)
+        points = results['points'].to_numpy(dtype=np.float64)
+        positions = results['positionOrder'].to_numpy(dtype=np.int64)
+
+        ids = results[key].to_numpy(dtype=np.int64)
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], dtype=np.int64)
+        ends = np.r_[starts[1:], len(ids)]
+        # One (years, points, positions) tuple per id, replaced whole so readers never see a partial update
+        self._races = {
+            entity_id: (years[start:end], points[start:end], positions[start:end])
+            for entity_id, start, end in zip(ids[starts].tolist(), starts.tolist(), ends.tolist())
+        }
+
+    def window(self, entity_id, first_year, last_year):
+        """Return the (years, points, positions) arrays of an id's races in first_year..last_year."""
+        races = self._races.get(int(entity_id))
+        if races is None:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float64), np.array([], dtype=np.int64)
+        years = races[0]
+        start = int(np.searchsorted(years, first_year, side='left'))
+        end = int(np.searchsorted(years, last_year, side='right'))
+        return tuple(values[start:end] for values in races)
+
+    @staticmethod
+    def season_points(years, points):
+        """Points per season for a window, in year order."""
+        if not len(years):
+            return np.array([], dtype=np.float64)
+        boundaries = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+        return np.add.reduceat(points, boundaries)
+
+    def add_race(self, year, results):
+        """Add one race's result rows; the cost grows with the race and its ids' histories, not with all results."""
+        for entity_id, rows in results.groupby(self.key):
+            entity_id = int(entity_id)
+            years, points, positions = self._races.get(
+                entity_id, (np.array([], dtype=np.int64), np.array([], dtype=np.float64), np.array([], dtype=np.int64))
+            )
+            # After any races already recorded for the same year, as a stable sort would place them
+            at = int(np.searchsorted(years, year, side='right'))
+            self._races[entity_id] = (
+                np.insert(years, at, np.full(len(rows), year, dtype=np.int64)),
+                np.insert(points, at, rows['points'].to_numpy(dtype=np.float64)),
+                np.insert(positions, at, rows['positionOrder'].to_numpy(dtype=np.int64)),
+            )
+
+
+class PartitionedTable:
+    """A table split into one frame per value of a key column, e.g. one per season or per race.
+
+    Readers fetch the partitions they need instead of filtering the whole
+    table, and append() only rebuilds the partitions the new rows fall in.
+    Each partition is replaced with one assignment, so a reader sees it
+    either before or after an append.
+    """
+
+    def __init__(self, frame, key):
+        self.key = key
+        self._empty = frame.iloc[:0]
+        self._parts = {int(value): part.reset_index(drop=True) for value, part in frame.groupby(key, sort=True)}
+        self._rows = len(frame)
+
+    def __len__(self):
+        return self._rows
+
+    def keys(self):
+        return sorted(self._parts)
+
+    def get(self, value):
+        """Return the rows of one partition, empty if there are none."""
+        return self._parts.get(int(value), self._empty)
+
+    def frame(self, values=None):
+        """Return the rows of the given partitions (all by default) as one frame, in key order."""
+        values = self.keys() if values is None else sorted(int(value) for value in values)
+        parts = [self._parts[value] for value in values if value in self._parts]
+        return pd.concat(parts, ignore_index=True) if parts else self._empty
+
+    def append(self, rows):
+        """Add rows, concatenating each onto its own partition only."""
+        rows = rows[self._empty.columns].astype(self._empty.dtypes.to_dict())
+        for value, part in rows.groupby(self.key):
+            value = int(value)
+            current = self._parts.get(value)
+            self._parts[value] = part.reset_index(drop=True) if current is None else \
+                pd.concat([current, part], ignore_index=True)
+        self._rows += len(rows)
@@ -0,0 +1,312 @@
+import numpy as np
+import pandas as pd
+
+from championship_labels import season_champions
+from train_championship_models import rollup_season_sums
+
+DRIVER_COLUMNS = ['year', 'driverId', 'total_points', 'avg_points', 'max_points', 'avg_position', 'best_position',
+                  'avg_grid', 'total_laps', 'avg_laps', 'seasons_experience', 'age', 'is_champion']
+CONSTRUCTOR_COLUMNS = ['year', 'constructorId', 'total_points', 'avg_points', 'max_points', 'avg_position',
+                       'best_position', 'avg_grid', 'total_laps', 'avg_laps', 'seasons_experience', 'num_drivers',
+                       'is_champion']
+INTEGER_COLUMNS = {'year', 'driverId', 'constructorId', 'best_position', 'total_laps',
+                   'seasons_experience', 'age', 'num_drivers', 'is_champion'}
+
+# Keys and running values of the season partials, in the order _accumulate() keeps them
+PARTIAL_KEYS = ['year', 'driverId', 'constructorId']
+PARTIAL_VALUES = ['points_sum', 'points_max', 'position_sum', 'position_min', 'grid_sum', 'laps_sum', 'races']
+
+# Columns apply_race() reads from each kind of row
+RACE_RESULT_COLUMNS = ['driverId', 'constructorId', 'points', 'positionOrder', 'grid', 'laps']
+STANDINGS_COLUMNS = {'driverId': ['driverId', 'points'], 'constructorId': ['constructorId', 'points']}
+
+
+class IncrementalFeatureStore:
+    """Keeps a FeaturePipeline's season features current one race at a time.
+
+    Building the store costs one pass over the pipeline's season partials.
+    After that, apply_race() folds a single race into the affected
+    (year, driverId, constructorId) partials, (year, driverId) and
+    (year, constructorId) rows, experience counts and champion labels
+    without revisiting the rest of history. Each race builds new
+    driver_features, constructor_features and season_partials frames with
+    the changed rows written by position, and publishes all three on the
+    pipeline in one swap, so everything reading features through the
+    pipeline sees either the old or the new season. The pipeline's raw
+    loaded frames are left as loaded.
+
+    swap, when given, is called with a function that publishes the frames
+    on the pipeline it is passed, e.g. through ResourceRegistry.replace()
+    so the swap happens under the registry's lock for the pipeline.
+    """
+
+    def __init__(self, pipeline, swap=None):
+        self.pipeline = pipeline
+        self._swap = swap
+        results_with_race, driver_standings_df, constructor_standings_df, drivers_df, _, races_df, _, _ = pipeline.data
+        season_partials = self.season_partials = pipeline.season_partials.reset_index(drop=True)
+
+        self.driver_features = self._indexed(pipeline.driver_features, DRIVER_COLUMNS)
+        self.constructor_features = self._indexed(pipeline.constructor_features, CONSTRUCTOR_COLUMNS)
+        self._publish()
+
+        # Row position of every key, so changed rows are written without index lookups
+        self._driver_positions = self._positions(self.driver_features.index)
+        self._constructor_positions = self._positions(self.constructor_features.index)
+        partial_keys = season_partials[PARTIAL_KEYS]
+        self._partial_positions = self._positions(zip(*(partial_keys[col].tolist() for col in PARTIAL_KEYS)))
+        # Running partials per (year, driverId, constructorId), in PARTIAL_VALUES order
+        self._partials = dict(zip(self._partial_positions,
+                                  season_partials[PARTIAL_VALUES].to_numpy(dtype=float).tolist()))
+
+        # Running season sums, so averages can be updated without the race-level rows
+        self._driver_sums = self._season_sums(season_partials, 'driverId')
+        self._constructor_sums = self._season_sums(season_partials, 'constructorId')
+
+        # Seasons raced per id, and drivers per team season
+        self._driver_years = self._years_by_id(season_partials, 'driverId')
+        self._constructor_years = self._years_by_id(season_partials, 'constructorId')
+        self._team_drivers = {
+            key: set(driver_ids)
+            for key, driver_ids in season_partials.groupby(['year', 'constructorId'])['driverId'].unique().items()
+        }
+
+        birth_years = pd.to_datetime(drivers_df['dob']).dt.year
+        self._birth_years = dict(zip(drivers_df['driverId'], birth_years))
+
+        # Current points leader of every season, as (points, id)
+        driver_standings_with_year = driver_standings_df.merge(races_df[['raceId', 'year']], on='raceId', how='left')
+        constructor_standings_with_year = constructor_standings_df.merge(
+            results_with_race[['raceId', 'year']].drop_duplicates(), on='raceId', how='left'
+        )
+        self._driver_leaders = self._season_leaders(driver_standings_with_year, 'driverId')
+        self._constructor_leaders = self._season_leaders(constructor_standings_with_year, 'constructorId')
+
+    @staticmethod
+    def _indexed(features, columns):
+        features = features[columns].astype({
+            col: 'int64' if col in INTEGER_COLUMNS else 'float64' for col in columns
+        })
+        features.index = pd.MultiIndex.from_arrays([features['year'], features[columns[1]]], names=[None, None])
+        return features
+
+    @staticmethod
+    def _positions(keys):
+        return {tuple(int(value) for value in key): position for position, key in enumerate(keys)}
+
+    def _publish(self):
+        frames = {'driver_features': self.driver_features, 'constructor_features': self.constructor_features,
+                  'season_partials': self.season_partials}
+
+        def swap(pipeline):
+            # cached_property stores its value in the instance dict; one update swaps all three
+            pipeline.__dict__.update(frames)
+            return pipeline
+
+        if self._swap is None:
+            swap(self.pipeline)
+        else:
+            self._swap(swap)
+
+    @staticmethod
+    def _season_sums(season_partials, key):
+        sums = rollup_season_sums(season_partials, key)
+        values = sums[['total_points', 'max_points', 'position_sum', 'best_position',
+                       'grid_sum', 'total_laps', 'races']].to_numpy(dtype=float).tolist()
+        return dict(zip(zip(sums['year'].tolist(), sums[key].tolist()), values))
+
+    @staticmethod
+    def _years_by_id(season_partials, key):
+        return {entity_id: set(years) for entity_id, years in season_partials.groupby(key)['year'].unique().items()}
+
+    @staticmethod
+    def _season_leaders(standings, id_col):
+        max_points = standings.groupby('year')['points'].max()
+        champions = season_champions(standings, id_col)
+        return {
+            int(year): (float(max_points[year]), int(entity_id))
+            for year, entity_id in zip(champions['year'], champions[id_col])
+        }
+
+    @staticmethod
+    def _accumulate(sums, key, row):
+        current = sums.get(key)
+        if current is None:
+            sums[key] = [row.points, row.points, row.positionOrder, row.positionOrder, row.grid, row.laps, 1]
+            return
+
+        current[0] += row.points
+        current[1] = max(current[1], row.points)
+        current[2] += row.positionOrder
+        current[3] = min(current[3], row.positionOrder)
+        current[4] += row.grid
+        current[5] += row.laps
+        current[6] += 1
+
+    @staticmethod
+    def _checked(rows, columns, label):
+        """Return rows as a frame, raising ValueError if any required value is missing."""
+        frame = pd.DataFrame(rows)
+        if frame.empty:
+            return frame
+        missing = [col for col in columns if col not in frame.columns]
+        if missing:
+            raise ValueError(f"{label} rows lack {', '.join(missing)}")
+        if frame[columns].isna().any().any():
+            raise ValueError(f"{label} rows have missing {', '.join(columns)} values")
+        return frame
+
+    @staticmethod
+    def _update_leader(leaders, year, standings, id_col):
+        """Fold standings rows into the season leader; return the ids whose label changed."""
+        if standings.empty:
+            return set()
+
+        best = standings['points'].max()
+        previous = leaders.get(year)
+        # Earlier rows win ties, so only a strictly higher total takes the lead
+        if previous is not None and best <= previous[0]:
+            return set()
+
+        leader_id = int(standings.loc[standings['points'] == best, id_col].iloc[0])
+        leaders[year] = (float(best), leader_id)
+        if previous is None or previous[1] == leader_id:
+            return {leader_id}
+        return {previous[1], leader_id}
+
+    @staticmethod
+    def _stats(year, entity_id, sums):
+        total_points, max_points, position_sum, best_position, grid_sum, total_laps, races = sums
+        return [year, entity_id, total_points, total_points / races, max_points, position_sum / races,
+                best_position, grid_sum / races, total_laps, total_laps / races]
+
+    def _driver_row(self, year, driver_id):
+        birth_year = self._birth_years.get(driver_id)
+        leader = self._driver_leaders.get(year)
+        return self._stats(year, driver_id, self._driver_sums[(year, driver_id)]) + [
+            len(self._driver_years[driver_id]),
+            year - birth_year if birth_year is not None and birth_year == birth_year else 0,
+            int(leader is not None and leader[1] == driver_id),
+        ]
+
+    def _constructor_row(self, year, constructor_id):
+        leader = self._constructor_leaders.get(year)
+        return self._stats(year, constructor_id, self._constructor_sums[(year, constructor_id)]) + [
+            len(self._constructor_years[constructor_id]),
+            len(self._team_drivers[(year, constructor_id)]),
+            int(leader is not None and leader[1] == constructor_id),
+        ]
+
+    @staticmethod
+    def _rebuilt(frame, positions, rows, updates=None):
+        """Return a copy of frame with rows written by position and unseen keys appended.
+
+        rows maps a key to the full row of values, and updates maps a column
+        to {key: value} for keys already in the frame. positions is extended
+        with the appended keys. The copy is built column by column, so the
+        frame being served is never written to.
+        """
+        if not rows and not any((updates or {}).values()):
+            return frame
+        columns = list(frame.columns)
+        data = {col: frame[col].to_numpy(copy=True) for col in columns}
+
+        existing = [(positions[key], values) for key, values in rows.items() if key in positions]
+        if existing:
+            at = np.array([position for position, _ in existing])
+            block = np.array([values for _, values in existing], dtype=float)
+            for i, col in enumerate(columns):
+                data[col][at] = block[:, i]
+        for col, values in (updates or {}).items():
+            data[col][[positions[key] for key in values]] = list(values.values())
+
+        index = frame.index
+        added = [(key, values) for key, values in rows.items() if key not in positions]
+        if added:
+            block = np.array([values for _, values in added], dtype=float)
+            for i, col in enumerate(columns):
+                data[col] = np.concatenate([data[col], block[:, i].astype(data[col].dtype)])
+            for offset, (key, _) in enumerate(added):
+                positions[key] = len(frame) + offset
+            if isinstance(index, pd.MultiIndex):
+                index = index.append(pd.MultiIndex.from_tuples([key for key, _ in added]))
+            else:
+                index = pd.RangeIndex(len(frame) + len(added))
+        return pd.DataFrame(data, index=index, columns=columns)
+
+    @staticmethod
+    def _experience(years_by_id, positions, entity_ids, skip_year):
+        """Return {key: seasons} for the earlier season rows of ids that raced their first race of a season."""
+        return {
+            (year, entity_id): len(years_by_id[entity_id])
+            for entity_id in entity_ids for year in years_by_id[entity_id]
+            if year != skip_year and (year, entity_id) in positions
+        }
+
+    def apply_race(self, year, results_rows, driver_standings_rows=None, constructor_standings_rows=None):
+        """Fold one race into the season features.
+
+        results_rows, driver_standings_rows and constructor_standings_rows take
+        the rows of that race as appended to results.csv, driver_standings.csv
+        and constructor_standings.csv (a DataFrame or a list of dicts). Every
+        row is checked before any state changes; a row without one of the
+        columns the features need raises ValueError. Returns the year and the
+        driver and constructor ids whose features changed.
+        """
+        race = self._checked(results_rows, RACE_RESULT_COLUMNS, 'Result')
+        driver_standings = self._checked(driver_standings_rows, STANDINGS_COLUMNS['driverId'], 'Driver standings')
+        constructor_standings = self._checked(constructor_standings_rows, STANDINGS_COLUMNS['constructorId'],
+                                              'Constructor standings')
+        if not race.empty:
+            race = race[race['positionOrder'] > 0]
+
+        driver_ids, constructor_ids = set(), set()
+        new_driver_seasons, new_constructor_seasons = set(), set()
+        partial_keys = set()
+        for row in race.itertuples(index=False):
+            driver_id, constructor_id = int(row.driverId), int(row.constructorId)
+            self._accumulate(self._partials, (year, driver_id, constructor_id), row)
+            partial_keys.add((year, driver_id, constructor_id))
+            self._accumulate(self._driver_sums, (year, driver_id), row)
+            self._accumulate(self._constructor_sums, (year, constructor_id), row)
+            self._team_drivers.setdefault((year, constructor_id), set()).add(driver_id)
+
+            driver_years = self._driver_years.setdefault(driver_id, set())
+            if year not in driver_years:
+                driver_years.add(year)
+                new_driver_seasons.add(driver_id)
+            constructor_years = self._constructor_years.setdefault(constructor_id, set())
+            if year not in constructor_years:
+                constructor_years.add(year)
+                new_constructor_seasons.add(constructor_id)
+
+            driver_ids.add(driver_id)
+            constructor_ids.add(constructor_id)
+
+        # Champion labels; a label can only move if the season leader changed
+        driver_ids |= self._update_leader(self._driver_leaders, year, driver_standings, 'driverId')
+        constructor_ids |= self._update_leader(self._constructor_leaders, year, constructor_standings, 'constructorId')
+
+        # Only ids that actually have a feature row for this season are written
+        driver_rows = {(year, d): self._driver_row(year, d) for d in driver_ids if (year, d) in self._driver_sums}
+        constructor_rows = {(year, c): self._constructor_row(year, c) for c in constructor_ids
+                            if (year, c) in self._constructor_sums}
+
+        # A first race in a new season raises experience on every earlier season row
+        driver_experience = self._experience(self._driver_years, self._driver_positions, new_driver_seasons, year)
+        constructor_experience = self._experience(self._constructor_years, self._constructor_positions,
+                                                  new_constructor_seasons, year)
+
+        self.driver_features = self._rebuilt(self.driver_features, self._driver_positions, driver_rows,
+                                             {'seasons_experience': driver_experience})
+        self.constructor_features = self._rebuilt(self.constructor_features, self._constructor_positions,
+                                                  constructor_rows, {'seasons_experience': constructor_experience})
+        self.season_partials = self._rebuilt(self.season_partials, self._partial_positions,
+                                             {key: list(key) + self._partials[key] for key in partial_keys})
+        self._publish()
+
+        return {
+            'year': year,
+            'driverIds': sorted(key[1] for key in driver_rows),
+            'constructorIds': sorted(key[1] for key in constructor_rows),
+        }
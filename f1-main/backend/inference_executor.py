@@ -0,0 +1,54 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import run_profiled
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the executor already has its maximum number of pending tasks."""
+
+
+class InferenceExecutor:
+    """Runs CPU-bound handler work off the asyncio event loop.
+
+    Work goes to a thread pool: tree prediction and most of pandas and NumPy
+    release the GIL, and the handlers read models and frames that only live
+    in this process. At most max_pending tasks may be queued or running;
+    beyond that, submissions fail fast with InferenceQueueFull so callers can
+    shed load.
+    """
+
+    def __init__(self, threads=4, max_pending=64):
+        self.threads = threads
+        self.max_pending = max_pending
+        self.pending = 0
+        self._thread_pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='inference')
+
+    @classmethod
+    def from_env(cls):
+        """Build an executor configured by F1_INFERENCE_* environment variables."""
+        return cls(
+            threads=int(os.environ.get('F1_INFERENCE_THREADS', 4)),
+            max_pending=int(os.environ.get('F1_INFERENCE_MAX_PENDING', 64)),
+        )
+
+    async def run_thread(self, fn, *args):
+        """Run fn(*args) on the thread pool."""
+        # Only touched from the event loop thread, so no lock is needed
+        if self.pending >= self.max_pending:
+            raise InferenceQueueFull(f"{self.pending} inference tasks pending")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Carry the request context (route label, profiler) into the worker thread
+            call = functools.partial(contextvars.copy_context().run, run_profiled, fn, *args)
+            return await loop.run_in_executor(self._thread_pool, call)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        self._thread_pool.shutdown(wait=False, cancel_futures=True)
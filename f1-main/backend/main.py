@@ -1,10 +1,27 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import joblib
+from typing import Dict, List, Optional
+import asyncio
+import hmac
+import os
+import threading
 import pandas as pd
 import numpy as np
 
+from analytics_store import MAX_PAGE_SIZE, PAGE_SIZE, RESULT_COLUMNS, AnalyticsStore
+from columnar import ARROW_AVAILABLE, ARROW_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE, encode_arrow, encode_columnar
+from compact_forest import compact_path, load_model
+from dataset_loader import load_dataset
+from history_index import PartitionedTable, ResultHistoryIndex
+from inference_executor import InferenceExecutor, InferenceQueueFull
+from metrics import PROFILE_DIR, MetricsMiddleware, registry, span
+from reference_data import ReferenceData
+from resource_registry import ResourceNotReady, ResourceRegistry, ResourceUnavailable
+from response_cache import ResponseCache
+from season_simulator import SeasonSimulator, season_field, simulation_pool
+
 app = FastAPI(title="F1 Prediction API")
 
 # Enable CORS
@@ -16,18 +33,99 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load models
-podium_model = joblib.load('backend/models/podium_model.joblib')
-wdc_model = joblib.load('backend/models/wdc_model.joblib')
-constructors_model = joblib.load('backend/models/constructors_model.joblib')
-wdc_scaler = joblib.load('backend/models/wdc_scaler.joblib')
-constructors_scaler = joblib.load('backend/models/constructors_scaler.joblib')
-
-# Load data for analytics
-results_df = pd.read_csv('../daasets/results.csv')
-drivers_df = pd.read_csv('../daasets/drivers.csv')
-constructors_df = pd.read_csv('../daasets/constructors.csv')
-races_df = pd.read_csv('../daasets/races.csv')
+# Per-route latency histograms for /metrics; F1_PROFILING=1 enables X-Profile request dumps
+app.add_middleware(MetricsMiddleware, profile_dir=PROFILE_DIR if os.environ.get('F1_PROFILING') == '1' else None)
+
+# Models and datasets, loaded on first use or by the warm-up started with the server
+resources = ResourceRegistry()
+
+def load_season_results():
+    results_df = load_dataset('results', columns=RESULT_COLUMNS)
+    races_df = resources.get('races')
+    return PartitionedTable(results_df.merge(races_df[['raceId', 'year']], on='raceId'), 'year')
+
+def load_trained_model(path, script):
+    """Load a model artifact, naming the script that trains it when it is missing (it is not committed)."""
+    if not any(os.path.exists(candidate) for candidate in (path, compact_path(path))):
+        raise FileNotFoundError(f"{path} is missing; train it with `python {script}` from backend/, "
+                                f"then reload it with POST /admin/models/reload")
+    return load_model(path)
+
+def load_feature_pipeline():
+    # sklearn comes in with the championship code, so it is imported on first use rather than at startup
+    from train_championship_models import FeaturePipeline
+    return FeaturePipeline()
+
+def load_championship_predictor():
+    from championship_service import ChampionshipPredictor
+    return ChampionshipPredictor('backend/models', pipeline=resources.get('feature_pipeline'),
+                                 reference=resources.get('reference_data'))
+
+# Registration order is warm-up order: what the frontend needs first comes first.
+# Tables are loaded with only the columns the endpoints read, since every worker keeps them resident.
+# Id -> name/code/nationality lookups for drivers, constructors, circuits and status
+resources.register('reference_data', lambda: ReferenceData.load('../daasets'))
+resources.register('races', lambda: load_dataset('races', columns=['raceId', 'year', 'round']))
+# Race results with their year, one partition per season, so a new race only touches its own season
+resources.register('season_results', load_season_results)
+# Race results per driver and per constructor, sorted by year
+resources.register('driver_history', lambda: ResultHistoryIndex(resources.get('season_results').frame(), 'driverId'))
+resources.register('constructor_history',
+                   lambda: ResultHistoryIndex(resources.get('season_results').frame(), 'constructorId'))
+# Precomputed season aggregates for the analytics endpoints
+resources.register('analytics_store', lambda: AnalyticsStore('../daasets'))
+# Memory-mapping the compact forest exports when present
+resources.register('podium_model', lambda: load_trained_model('backend/models/podium_model.joblib',
+                                                            'train_podium_model.py'), kind='model',
+                   sources=['backend/models/podium_model*.joblib'])
+# Season points model written by train_wdc_model.py; wdc_model.joblib is the championship predictor's
+resources.register('wdc_model', lambda: load_trained_model('backend/models/wdc_points_model.joblib',
+                                                          'train_wdc_model.py'), kind='model',
+                   sources=['backend/models/wdc_points_model*.joblib'])
+# Standings after every race, one partition per race, used as the starting point of season simulations
+resources.register('driver_standings', lambda: PartitionedTable(
+    load_dataset('driver_standings', columns=['raceId', 'driverId', 'points']), 'raceId'))
+resources.register('constructor_standings', lambda: PartitionedTable(
+    load_dataset('constructor_standings', columns=['raceId', 'constructorId', 'points']), 'raceId'))
+# Championship models and season features
+resources.register('feature_pipeline', load_feature_pipeline)
+resources.register('championship_predictor', load_championship_predictor, kind='model',
+                   sources=['backend/models/wdc_model*.joblib', 'backend/models/wdc_scaler.joblib',
+                            'backend/models/constructors_*.joblib'])
+
+# Set F1_WARMUP=0 to load everything lazily, on first use only
+warm_up_enabled = os.environ.get('F1_WARMUP', '1') != '0'
+
+# Seconds between checks of backend/models/ for retrained artifacts; 0 leaves reloads to /admin/models/reload
+model_watch_interval = float(os.environ.get('F1_MODEL_WATCH_INTERVAL', 0))
+
+# When set, /admin endpoints require it in an X-Admin-Token header
+admin_token = os.environ.get('F1_ADMIN_TOKEN')
+
+# Worker processes for large season simulations, shared by every request; 0 simulates in the calling thread
+simulation_processes = int(os.environ.get('F1_SIMULATION_PROCESSES', 0))
+simulation_workers = simulation_pool(simulation_processes) if simulation_processes > 0 else None
+
+# Largest body the batch prediction endpoints accept
+MAX_BATCH_SIZE = 100
+
+# Largest what-if comparison one request can ask for (years x scenarios, plus the baseline)
+MAX_SCENARIO_YEARS = 20
+MAX_SCENARIOS = 10
+
+# Race-by-race feature updates, built on the first ingested race; ingests run one at a time
+incremental_features = None
+ingest_lock = threading.Lock()
+
+# Pre-encoded, compressed GET responses, dropped when the CSVs or models change; misses are
+# built and encoded on the inference threads
+response_cache = ResponseCache(run=lambda fn, *args: run_inference(fn, *args))
+
+# Responses built with a swapped-out model must not be served, or stored by builds still running
+resources.on_swap(lambda name: response_cache.clear())
+
+# Thread pool for CPU-bound handler work
+inference_executor = InferenceExecutor.from_env()
 
 class PodiumPredictionRequest(BaseModel):
     driverId: int
@@ -39,259 +137,685 @@ class WDCPredictionRequest(BaseModel):
     driverId: int
     points: float
 
-@app.get("/health")
-async def health_check():
-    return {"status": "service running"}
-
-@app.post("/predict/podium")
-async def predict_podium(request: PodiumPredictionRequest):
-    try:
-        # Prepare input data
-        input_data = pd.DataFrame([{
-            'driverId': request.driverId,
-            'constructorId': request.constructorId,
-            'grid': request.grid
-        }])
+class ChampionshipScenario(BaseModel):
+    name: str
+    # driverId -> constructorId the driver's season results move to
+    driver_teams: Dict[int, int] = {}
+    # driverId -> points added to the driver's season
+    points: Dict[int, float] = {}
 
-        # Make prediction
-        prediction = podium_model.predict(input_data)[0]
-        probabilities = podium_model.predict_proba(input_data)[0]
+class ChampionshipScenarioRequest(BaseModel):
+    years: List[int]
+    scenarios: List[ChampionshipScenario] = []
 
-        # Get probability of podium (class 1)
-        podium_probability = float(probabilities[1])
+class RaceResultRow(BaseModel):
+    raceId: int
+    driverId: int
+    constructorId: int
+    points: float
+    positionOrder: int
+    grid: int
+    laps: int
 
-        return {
-            "prediction": int(prediction),
-            "podium_probability": podium_probability,
-            "confidence": "high" if podium_probability > 0.7 else "medium" if podium_probability > 0.4 else "low"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+class DriverStandingRow(BaseModel):
+    raceId: int
+    driverId: int
+    points: float
 
-@app.post("/predict/wdc")
-async def predict_wdc(request: WDCPredictionRequest):
-    try:
-        # Prepare input data
-        input_data = pd.DataFrame([{
-            'year': request.year,
-            'driverId': request.driverId,
-            'points': request.points
-        }])
+class ConstructorStandingRow(BaseModel):
+    raceId: int
+    constructorId: int
+    points: float
 
-        # Make prediction
-        prediction = wdc_model.predict(input_data)[0]
-        probabilities = wdc_model.predict_proba(input_data)[0]
+class RaceIngestRequest(BaseModel):
+    year: int
+    results: List[RaceResultRow]
+    driver_standings: List[DriverStandingRow] = []
+    constructor_standings: List[ConstructorStandingRow] = []
+
+@app.on_event("startup")
+async def start_warm_up():
+    # Runs in a background thread, so /health answers while models and datasets load
+    if warm_up_enabled:
+        resources.start_warm_up()
+    if model_watch_interval > 0:
+        resources.start_watching(model_watch_interval)
+
+@app.on_event("shutdown")
+async def shutdown_inference_executor():
+    resources.stop_watching()
+    inference_executor.shutdown()
+    if simulation_workers is not None:
+        simulation_workers.shutdown(cancel_futures=True)
+
+@app.exception_handler(ResourceNotReady)
+async def resource_not_ready(request: Request, e: ResourceNotReady):
+    return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(ResourceUnavailable)
+async def resource_unavailable(request: Request, e: ResourceUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(e)})
+
+@app.get("/metrics")
+async def get_metrics():
+    """Request and stage latency histograms in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
-        # Get probability of being champion (class 1)
-        champion_probability = float(probabilities[1])
+@app.get("/health")
+async def health_check():
+    return {"status": "service running"}
 
-        # Get driver name
-        driver_name = drivers_df[drivers_df['driverId'] == request.driverId]['forename'].iloc[0] + " " + \
-                     drivers_df[drivers_df['driverId'] == request.driverId]['surname'].iloc[0]
+@app.get("/ready")
+async def readiness():
+    """Load state of every model and dataset; 503 until none is still pending or loading."""
+    report, loaded = resources.status()
+    failed = any(details['state'] == 'failed' for group in report.values() for details in group.values())
+    status = "loading" if not loaded else "degraded" if failed else "ready"
+    return JSONResponse(status_code=200 if loaded else 503, content={"status": status, **report})
+
+def check_admin(request: Request):
+    if admin_token and not hmac.compare_digest(request.headers.get('x-admin-token', ''), admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def reloadable_models(model):
+    models = resources.names(kind='model')
+    if model is None:
+        return models
+    if model not in models:
+        raise HTTPException(status_code=404, detail=f"Unknown model {model}")
+    return [model]
+
+@app.post("/admin/models/reload")
+async def reload_models(request: Request, model: Optional[str] = None):
+    """Load new versions of one or all models from backend/models/ and swap them in.
+
+    Requests keep being served by the current versions while the new ones
+    load; a model that fails to load keeps its current version.
+    """
+    check_admin(request)
+    loop = asyncio.get_running_loop()
+    reloaded, failed = {}, {}
+    for name in reloadable_models(model):
+        try:
+            reloaded[name] = await loop.run_in_executor(None, resources.reload, name)
+        except ResourceUnavailable as e:
+            failed[name] = str(e)
+    report, _ = resources.status()
+    return JSONResponse(status_code=500 if failed else 200,
+                        content={"reloaded": reloaded, "failed": failed, "models": report['models']})
+
+@app.post("/admin/models/rollback")
+async def rollback_model(request: Request, model: str):
+    """Swap a model's previous version back in; rolling back twice returns to the newer one."""
+    check_admin(request)
+    name = reloadable_models(model)[0]
+    try:
+        version = resources.rollback(name)
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"model": name, "version": version}
 
-        return {
-            "prediction": int(prediction),
-            "champion_probability": champion_probability,
-            "driver_name": driver_name,
-            "confidence": "high" if champion_probability > 0.7 else "medium" if champion_probability > 0.4 else "low"
-        }
+async def run_inference(fn, *args):
+    """Run a blocking prediction function off the event loop and map its errors to HTTP responses."""
+    try:
+        return await inference_executor.run_thread(fn, *args)
+    except InferenceQueueFull:
+        raise HTTPException(status_code=429, detail="Too many pending predictions", headers={"Retry-After": "1"})
+    except (ResourceNotReady, ResourceUnavailable, HTTPException):
+        raise
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/analytics/drivers")
-async def get_driver_performance(driverId: int = None):
-    # Merge results with drivers and races
-    merged = results_df.merge(drivers_df[['driverId', 'forename', 'surname']], on='driverId') \
-                        .merge(races_df[['raceId', 'year']], on='raceId')
-
-    if driverId:
-        merged = merged[merged['driverId'] == driverId]
+def confidence_level(probability):
+    return "high" if probability > 0.7 else "medium" if probability > 0.4 else "low"
+
+def predict_with_proba(model, input_data):
+    """Run a single predict_proba pass and derive the predicted class from it."""
+    with span('predict_proba'):
+        probabilities = model.predict_proba(input_data)
+    predictions = model.classes_[probabilities.argmax(axis=1)]
+    # Probability of the positive class (1)
+    return predictions, probabilities[:, 1]
+
+def podium_predictions(requests):
+    podium_model = resources.get('podium_model')
+    reference_data = resources.get('reference_data')
+    for r in requests:
+        reference_data.driver(r.driverId)
+        reference_data.constructor(r.constructorId)
+
+    # Prepare input data
+    input_data = pd.DataFrame({
+        'driverId': [r.driverId for r in requests],
+        'constructorId': [r.constructorId for r in requests],
+        'grid': [r.grid for r in requests]
+    })
+
+    predictions, podium_probabilities = predict_with_proba(podium_model, input_data)
+
+    return [{
+        "prediction": int(prediction),
+        "podium_probability": float(podium_probability),
+        "confidence": confidence_level(podium_probability)
+    } for prediction, podium_probability in zip(predictions, podium_probabilities)]
+
+def wdc_predictions(requests):
+    wdc_model = resources.get('wdc_model')
+    reference_data = resources.get('reference_data')
+    driver_names = [reference_data.driver_name(r.driverId) for r in requests]
+
+    # Prepare input data
+    input_data = pd.DataFrame({
+        'year': [r.year for r in requests],
+        'driverId': [r.driverId for r in requests],
+        'points': [r.points for r in requests]
+    })
+
+    predictions, champion_probabilities = predict_with_proba(wdc_model, input_data)
+
+    return [{
+        "prediction": int(prediction),
+        "champion_probability": float(champion_probability),
+        "driver_name": driver_name,
+        "confidence": confidence_level(champion_probability)
+    } for prediction, champion_probability, driver_name in zip(predictions, champion_probabilities, driver_names)]
+
+def check_batch_size(requests):
+    if len(requests) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} predictions per batch")
 
-    # Calculate average points per season for each driver
-    driver_performance = merged.groupby(['year', 'driverId', 'forename', 'surname'])['points'].mean().reset_index()
-    driver_performance['driver_name'] = driver_performance['forename'] + " " + driver_performance['surname']
-
-    return driver_performance.to_dict('records')
+@app.post("/predict/podium")
+async def predict_podium(request: PodiumPredictionRequest):
+    results = await run_inference(podium_predictions, [request])
+    return results[0]
 
-@app.get("/analytics/teams")
-async def get_team_standings(constructorId: int = None):
-    # Merge results with constructors and races
-    merged = results_df.merge(constructors_df[['constructorId', 'name']], on='constructorId') \
-                        .merge(races_df[['raceId', 'year']], on='raceId')
+@app.post("/predict/podium/batch")
+async def predict_podium_batch(requests: List[PodiumPredictionRequest]):
+    """Predict podium finishes for a whole grid with one model call."""
+    if not requests:
+        return []
+    check_batch_size(requests)
+    return await run_inference(podium_predictions, requests)
 
-    if constructorId:
-        merged = merged[merged['constructorId'] == constructorId]
+@app.post("/predict/wdc")
+async def predict_wdc(request: WDCPredictionRequest):
+    results = await run_inference(wdc_predictions, [request])
+    return results[0]
+
+@app.post("/predict/wdc/batch")
+async def predict_wdc_batch(requests: List[WDCPredictionRequest]):
+    """Predict championship winners for several drivers with one model call."""
+    if not requests:
+        return []
+    check_batch_size(requests)
+    return await run_inference(wdc_predictions, requests)
+
+# Representations of the /analytics listings, by format name
+ANALYTICS_MEDIA_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'columnar': COLUMNAR_MEDIA_TYPE,
+    'arrow': ARROW_MEDIA_TYPE,
+}
+
+def negotiate_format(format, accept):
+    """Pick a listing format from ?format= or, failing that, the Accept header."""
+    if format is not None:
+        if format not in ANALYTICS_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(ANALYTICS_MEDIA_TYPES)}")
+        if format == 'arrow' and not ARROW_AVAILABLE:
+            raise HTTPException(status_code=406, detail="Arrow output needs pyarrow installed on the server")
+        return format
+    return accepted_format(accept)
+
+def accepted_format(accept):
+    """Return the listing format the Accept header ranks highest, by q value, then header order.
+
+    Types with q=0 are excluded, wildcards count as JSON, and JSON is the
+    fallback when nothing supported is accepted.
+    """
+    formats = {media_type: name for name, media_type in ANALYTICS_MEDIA_TYPES.items()
+               if name != 'arrow' or ARROW_AVAILABLE}
+    best, best_q = 'json', 0.0
+    for entry in accept.split(','):
+        media_type, *params = [part.strip() for part in entry.split(';')]
+        media_type = media_type.lower()
+        name = 'json' if media_type in ('*/*', 'application/*') else formats.get(media_type)
+        if name is None:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+class AnalyticsListing:
+    """Paging, streaming and format options shared by the /analytics endpoints.
+
+    With limit or cursor the response is one page, {"items": [...],
+    "next_cursor": ...}, in (year, id) order; pass next_cursor back as
+    cursor for the next page. format=ndjson streams one JSON row per line
+    instead, and format=columnar (or arrow, with pyarrow installed) returns
+    column arrays with dictionary-encoded names; each also has an Accept
+    media type. from_year/to_year narrow any of them.
+    """
+
+    def __init__(self, request: Request, from_year: Optional[int] = None, to_year: Optional[int] = None,
+                 limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                 format: Optional[str] = None):
+        self.from_year = from_year
+        self.to_year = to_year
+        self.limit = limit
+        self.cursor = cursor
+        self.format = negotiate_format(format, request.headers.get('accept', ''))
+        self.paged = limit is not None or cursor is not None
+
+    @property
+    def ranged(self):
+        return self.format == 'ndjson' or self.paged or self.from_year is not None or self.to_year is not None
+
+def analytics_call(fn):
+    """Call fn() with the analytics store, reporting bad year ranges and cursors as 400s."""
+    try:
+        return fn(resources.get('analytics_store'))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def analytics_build(fn):
+    # Run by the response cache on the inference threads, so loading the store, and rebuilding
+    # it after a CSV change, never runs on the event loop
+    return lambda: analytics_call(fn)
+
+def start_stream(analytics_store, name, listing):
+    chunks = analytics_store.stream(name, listing.from_year, listing.to_year, listing.limit, listing.cursor)
+    # Prime the generator so a bad cursor is a 400 rather than a broken stream
+    return next(chunks, b''), chunks
+
+async def analytics_response(request, name, entity_id, lookup, listing):
+    if listing.format in ('columnar', 'arrow'):
+        if listing.paged:
+            raise HTTPException(status_code=400, detail="Columnar formats return whole listings; drop limit and cursor")
+        encode = encode_arrow if listing.format == 'arrow' else encode_columnar
+        return await response_cache.respond(
+            request,
+            analytics_build(lambda store: encode(store.frame(name, entity_id, listing.from_year, listing.to_year))),
+            variant=listing.format, media_type=ANALYTICS_MEDIA_TYPES[listing.format]
+        )
+    if not listing.ranged:
+        return await response_cache.respond(request, analytics_build(lookup), variant=listing.format)
+    if entity_id is not None:
+        raise HTTPException(status_code=400, detail="Paging, year ranges and streaming apply to unfiltered listings")
+
+    if listing.format == 'ndjson':
+        first, chunks = await run_inference(analytics_call, lambda store: start_stream(store, name, listing))
+        # Starlette pulls the remaining chunks in its thread pool
+        return StreamingResponse(iter_chunks(first, chunks), media_type='application/x-ndjson')
+    if listing.paged:
+        return await response_cache.respond(request, analytics_build(lambda store: store.page(
+            name, listing.from_year, listing.to_year, listing.limit or PAGE_SIZE, listing.cursor)),
+            variant=listing.format)
+    return await response_cache.respond(request, analytics_build(lambda store: store.page(
+        name, listing.from_year, listing.to_year, limit=None)['items']), variant=listing.format)
+
+def iter_chunks(first, chunks):
+    yield first
+    yield from chunks
 
-    # Calculate total points per season for each team
-    team_standings = merged.groupby(['year', 'constructorId', 'name'])['points'].sum().reset_index()
+@app.get("/analytics/drivers")
+async def get_driver_performance(request: Request, driverId: int = None, listing: AnalyticsListing = Depends()):
+    # Average points per season for each driver
+    return await analytics_response(request, 'drivers', driverId,
+                                    lambda store: store.driver_performance(driverId), listing)
 
-    return team_standings.to_dict('records')
+@app.get("/analytics/teams")
+async def get_team_standings(request: Request, constructorId: int = None, listing: AnalyticsListing = Depends()):
+    # Total points per season for each team
+    return await analytics_response(request, 'teams', constructorId,
+                                    lambda store: store.team_standings(constructorId), listing)
 
 @app.get("/analytics/podiums")
-async def get_podium_frequency(driverId: int = None):
-    # Filter podium finishes
-    podiums = results_df[results_df['positionOrder'] <= 3].copy()
-
-    # Merge with drivers and races
-    merged = podiums.merge(drivers_df[['driverId', 'forename', 'surname']], on='driverId') \
-                    .merge(races_df[['raceId', 'year']], on='raceId')
-
-    if driverId:
-        merged = merged[merged['driverId'] == driverId]
-
-    # Count podiums per driver per season
-    podium_count = merged.groupby(['year', 'driverId', 'forename', 'surname']).size().reset_index(name='podiums')
-    podium_count['driver_name'] = podium_count['forename'] + " " + podium_count['surname']
-
-    return podium_count.to_dict('records')
+async def get_podium_frequency(request: Request, driverId: int = None, listing: AnalyticsListing = Depends()):
+    # Podiums per driver per season
+    return await analytics_response(request, 'podiums', driverId,
+                                    lambda store: store.podium_frequency(driverId), listing)
 
 @app.get("/drivers")
-async def get_drivers():
+async def get_drivers(request: Request):
+    return await response_cache.respond(request, active_drivers)
+
+def active_drivers():
+    reference_data = resources.get('reference_data')
     # Filter for drivers active in the last 5 years (2020-2024)
     active_years = [2020, 2021, 2022, 2023, 2024]
-    active_races = races_df[races_df['year'].isin(active_years)]['raceId']
-    active_driver_ids = results_df[results_df['raceId'].isin(active_races)]['driverId'].unique()
+    active_driver_ids = resources.get('season_results').frame(active_years)['driverId'].unique()
 
-    drivers = drivers_df[drivers_df['driverId'].isin(active_driver_ids)][['driverId', 'forename', 'surname']].copy()
-    drivers['name'] = drivers['forename'] + " " + drivers['surname']
-    return drivers[['driverId', 'name']].to_dict('records')
+    active_driver_ids = set(active_driver_ids.tolist())
+    return [{'driverId': driver_id, 'name': name}
+            for driver_id, name in reference_data.driver_names.items() if driver_id in active_driver_ids]
 
 @app.get("/constructors")
-async def get_constructors():
+async def get_constructors(request: Request):
+    return await response_cache.respond(request, active_constructors)
+
+def active_constructors():
+    reference_data = resources.get('reference_data')
     # Filter for constructors active in the last 5 years (2020-2024)
     active_years = [2020, 2021, 2022, 2023, 2024]
-    active_races = races_df[races_df['year'].isin(active_years)]['raceId']
-    active_constructor_ids = results_df[results_df['raceId'].isin(active_races)]['constructorId'].unique()
+    active_constructor_ids = resources.get('season_results').frame(active_years)['constructorId'].unique()
 
-    constructors = constructors_df[constructors_df['constructorId'].isin(active_constructor_ids)]
-    return constructors[['constructorId', 'name']].to_dict('records')
+    active_constructor_ids = set(active_constructor_ids.tolist())
+    return [{'constructorId': constructor_id, 'name': name}
+            for constructor_id, name in reference_data.constructor_names.items() if constructor_id in active_constructor_ids]
 
 @app.get("/seasons")
-async def get_seasons():
-    seasons = races_df['year'].unique()
+async def get_seasons(request: Request):
+    return await response_cache.respond(request, season_list)
+
+def season_list():
+    seasons = resources.get('races')['year'].unique()
     return sorted(seasons.tolist(), reverse=True)
 
 @app.get("/predict/{year}/championships")
-async def predict_championships(year: int):
+async def predict_championships(request: Request, year: int):
     """Predict World Drivers' and Constructors' Championship winners for a given year."""
+    return await response_cache.respond(request, lambda: championship_predictions(year))
+
+def predict_championship_year(year: int):
+    return resources.get('championship_predictor').predict(year)
+
+def championship_predictions(year: int):
+    wdc_predictions, constructors_predictions = predict_championship_year(year)
+    return championship_payload(wdc_predictions, constructors_predictions)
+
+def championship_payload(wdc_predictions, constructors_predictions):
+    return {
+        "world_drivers_championship": {
+            "predictions": wdc_predictions,
+            "top_prediction": wdc_predictions[0] if wdc_predictions else None
+        },
+        "constructors_championship": {
+            "predictions": constructors_predictions,
+            "top_prediction": constructors_predictions[0] if constructors_predictions else None
+        }
+    }
+
+@app.post("/predict/championships/scenarios")
+async def predict_championship_scenarios(request: ChampionshipScenarioRequest):
+    """Predict both championships for several years under what-if scenarios, in one call.
+
+    A baseline scenario without overrides always comes first. Scenarios can
+    move drivers to other teams (driver_teams) and add points to drivers'
+    seasons (points); every scenario is scored for every year.
+    """
+    if not 0 < len(request.years) <= MAX_SCENARIO_YEARS:
+        raise HTTPException(status_code=400, detail=f"Pass between 1 and {MAX_SCENARIO_YEARS} years")
+    if len(request.scenarios) > MAX_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SCENARIOS} scenarios can be compared at once")
+    scenarios = [{'name': 'baseline'}] + [
+        {'name': s.name, 'driver_teams': s.driver_teams, 'points': s.points} for s in request.scenarios
+    ]
+    if len({s['name'] for s in scenarios}) < len(scenarios):
+        raise HTTPException(status_code=400, detail="Scenario names must be unique and not 'baseline'")
+
+    predictions = await run_inference(score_championship_scenarios, request.years, scenarios)
+    return {
+        "results": [
+            {"scenario": name, "year": year, **championship_payload(wdc_predictions, constructors_predictions)}
+            for name, year, wdc_predictions, constructors_predictions in predictions
+        ]
+    }
+
+def score_championship_scenarios(years, scenarios):
     try:
-        # Import the prediction function
-        from train_championship_models import predict_championships
+        return resources.get('championship_predictor').predict_scenarios(years, scenarios)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/ingest/race")
+async def ingest_race(request: Request, race: RaceIngestRequest):
+    """Fold one new race into the season features, analytics and result history without a full rebuild.
+
+    Send the rows appended to results.csv, driver_standings.csv and
+    constructor_standings.csv for that race. The whole race is checked
+    before anything changes, and only the cached responses that depend on
+    it are dropped.
+    """
+    check_admin(request)
+    return await run_inference(apply_ingested_race, race)
+
+def race_frame(rows):
+    return pd.DataFrame([row.model_dump() for row in rows])
+
+def check_ingested_race(race, results, races_df, season_results, reference_data):
+    """Reject a race whose rows disagree with each other or with the loaded data, before any update."""
+    if results.empty:
+        raise HTTPException(status_code=400, detail="A race needs at least one result row")
+    race_ids = set(results['raceId'].tolist())
+    race_ids |= {row.raceId for row in race.driver_standings} | {row.raceId for row in race.constructor_standings}
+    if len(race_ids) != 1:
+        raise HTTPException(status_code=400, detail="All rows must belong to one race")
+    race_id = race_ids.pop()
+    calendar_years = races_df.loc[races_df['raceId'] == race_id, 'year'].tolist()
+    if calendar_years and calendar_years[0] != race.year:
+        raise HTTPException(status_code=400, detail=f"Race {race_id} is in {calendar_years[0]}, not {race.year}")
+    # A loaded race is in its calendar year, or in the year it was ingested with if it has none
+    if (season_results.get(race.year)['raceId'] == race_id).any():
+        raise HTTPException(status_code=409, detail=f"Race {race_id} is already loaded")
+
+    driver_ids = set(results['driverId'].tolist()) | {row.driverId for row in race.driver_standings}
+    constructor_ids = set(results['constructorId'].tolist()) | {row.constructorId for row in race.constructor_standings}
+    unknown = sorted(driver_ids - reference_data.driver_names.keys())
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown driver ids {unknown}")
+    unknown = sorted(constructor_ids - reference_data.constructor_names.keys())
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown constructor ids {unknown}")
+
+def stale_after_ingest(year, driver_ids, constructor_ids, championships_changed):
+    """Return a predicate over response cache keys whose payloads an ingested race changes."""
+    def stale(key):
+        parts = key[0].strip('/').split('/')
+        if parts[0] in ('analytics', 'drivers', 'constructors'):
+            return True
+        if parts[0] == 'simulate':
+            # Later seasons start from the latest line-up
+            return int(parts[1]) >= year
+        if parts[0] == 'predict' and parts[-1] == 'championships':
+            return championships_changed
+        # Driver and constructor predictions read the three seasons before the requested year
+        if parts[:2] == ['predict', 'driver']:
+            return int(parts[2]) in driver_ids and year < int(parts[3]) <= year + 3
+        if parts[:2] == ['predict', 'constructor']:
+            return int(parts[2]) in constructor_ids and year < int(parts[3]) <= year + 3
+        return False
+    return stale
+
+def apply_ingested_race(race):
+    global incremental_features
+    results = race_frame(race.results)
+    driver_standings = race_frame(race.driver_standings)
+    constructor_standings = race_frame(race.constructor_standings)
+
+    with ingest_lock:
+        # Everything the race updates is loaded before any of it changes
+        championship_predictor = resources.get('championship_predictor')
+        analytics_store = resources.get('analytics_store')
+        races_df = resources.get('races')
+        season_results = resources.get('season_results')
+        tables = [resources.get(name) for name in ('driver_history', 'constructor_history',
+                                                   'driver_standings', 'constructor_standings')]
+        driver_history, constructor_history, driver_standings_table, constructor_standings_table = tables
+        check_ingested_race(race, results, races_df, season_results, resources.get('reference_data'))
+
+        if incremental_features is None:
+            from incremental_features import IncrementalFeatureStore
+            # New feature frames are swapped onto the pipeline under its registry lock
+            incremental_features = IncrementalFeatureStore(
+                resources.get('feature_pipeline'), swap=lambda publish: resources.replace('feature_pipeline', publish)
+            )
+        update = incremental_features.apply_race(race.year, results, driver_standings, constructor_standings)
+        championships_changed = championship_predictor.apply_update(update)
+        analytics_store.apply_race(race.year, results)
+
+        # Race-level tables behind /drivers, /constructors, /simulate and the per-id history; each
+        # only adds the race to the partitions and ids it touches instead of copying the history
+        results = results[RESULT_COLUMNS]
+        season_results.append(results.assign(year=race.year))
+        driver_history.add_race(race.year, results)
+        constructor_history.add_race(race.year, results)
+        if len(driver_standings):
+            driver_standings_table.append(driver_standings)
+        if len(constructor_standings):
+            constructor_standings_table.append(constructor_standings)
+
+        response_cache.discard(stale_after_ingest(
+            race.year, set(results['driverId'].tolist()), set(results['constructorId'].tolist()), championships_changed
+        ))
+    return update
+
+def simulate_championships(year: int, seasons: int, seed: Optional[int]):
+    """Simulate the rest of a season with the podium model and return championship odds."""
+    reference_data = resources.get('reference_data')
+    driver_ids, constructor_ids, remaining, driver_points, constructor_points = season_field(
+        year, resources.get('season_results'), resources.get('races'), resources.get('driver_standings'),
+        resources.get('constructor_standings')
+    )
+    simulator = SeasonSimulator(resources.get('podium_model'), driver_ids, constructor_ids, remaining, driver_points, constructor_points)
+    outcome = simulator.run(seasons, seed=seed, pool=simulation_workers)
+
+    drivers = [{
+        "driver_id": int(driver_id),
+        "driver_name": reference_data.driver_name(driver_id),
+        "current_points": float(simulator.driver_points[i]),
+        "expected_points": round(float(outcome['driver_expected_points'][i]), 1),
+        "title_probability": float(outcome['driver_title_probability'][i])
+    } for i, driver_id in enumerate(simulator.driver_ids)]
+    constructors = [{
+        "constructor_id": int(constructor_id),
+        "constructor_name": reference_data.constructor_name(constructor_id),
+        "current_points": float(simulator.constructor_points[i]),
+        "expected_points": round(float(outcome['constructor_expected_points'][i]), 1),
+        "title_probability": float(outcome['constructor_title_probability'][i])
+    } for i, constructor_id in enumerate(simulator.constructor_ids)]
+
+    drivers.sort(key=lambda x: (x['title_probability'], x['expected_points']), reverse=True)
+    constructors.sort(key=lambda x: (x['title_probability'], x['expected_points']), reverse=True)
+    return {
+        "year": year,
+        "seasons": seasons,
+        "remaining_races": remaining,
+        "world_drivers_championship": drivers,
+        "constructors_championship": constructors
+    }
+
+@app.get("/simulate/{year}")
+async def simulate_season(request: Request, year: int, seasons: int = Query(10000, ge=1, le=200000),
+                          seed: Optional[int] = None):
+    """Monte Carlo championship odds for the rest of a season; pass seed for reproducible results."""
+    if seed is None:
+        return await run_inference(simulate_championships, year, seasons, seed)
+    return await response_cache.respond(request, lambda: simulate_championships(year, seasons, seed))
+
+def driver_performance_prediction(driverId: int, year: int):
+    """Predict driver performance for a given year."""
+    driver_history = resources.get('driver_history')
+    # Get driver name; unknown ids raise LookupError
+    driver_name = resources.get('reference_data').driver_name(driverId)
 
-        wdc_predictions, constructors_predictions = predict_championships(year)
+    # Races from the three previous seasons
+    with span('features'):
+        _, points, positions = driver_history.window(driverId, year - 3, year - 1)
 
+    if not len(points):
         return {
-            "world_drivers_championship": {
-                "predictions": wdc_predictions,
-                "top_prediction": wdc_predictions[0] if wdc_predictions else None
+            "driver_name": driver_name,
+            "predictions": {
+                "points": 0,
+                "podium_probability": 0.0,
+                "championship_probability": 0.0
             },
-            "constructors_championship": {
-                "predictions": constructors_predictions,
-                "top_prediction": constructors_predictions[0] if constructors_predictions else None
-            }
+            "confidence": "low",
+            "note": "Insufficient historical data"
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+    # Calculate recent performance metrics
+    avg_points = points.mean()
+    podium_count = int(np.count_nonzero(positions <= 3))
+    total_races = len(points)
+
+    # Simple prediction based on recent performance
+    predicted_points = max(0, avg_points * 0.9)  # Slight regression to mean
+    podium_probability = min(0.8, podium_count / max(1, total_races) * 1.2)
+
+    # Championship prediction (simplified)
+    championship_probability = podium_probability * 0.3 if predicted_points > 200 else 0.0
+
+    return {
+        "driver_name": driver_name,
+        "predictions": {
+            "points": round(predicted_points, 1),
+            "podium_probability": round(podium_probability, 3),
+            "championship_probability": round(championship_probability, 3)
+        },
+        "confidence": "medium" if total_races >= 10 else "low",
+        "based_on_races": total_races
+    }
 
 @app.get("/predict/driver/{driverId}/{year}")
-async def predict_driver_performance(driverId: int, year: int):
+async def predict_driver_performance(request: Request, driverId: int, year: int):
     """Predict driver performance for a given year."""
-    try:
-        # Get driver name
-        driver_info = drivers_df[drivers_df['driverId'] == driverId]
-        if driver_info.empty:
-            raise HTTPException(status_code=404, detail="Driver not found")
-
-        driver_name = f"{driver_info['forename'].iloc[0]} {driver_info['surname'].iloc[0]}"
-
-        # Get recent performance data for prediction
-        recent_results = results_df.merge(races_df[['raceId', 'year']], on='raceId')
-        recent_results = recent_results[(recent_results['driverId'] == driverId) &
-                                       (recent_results['year'] >= year - 3) &
-                                       (recent_results['year'] < year)]
-
-        if recent_results.empty:
-            return {
-                "driver_name": driver_name,
-                "predictions": {
-                    "points": 0,
-                    "podium_probability": 0.0,
-                    "championship_probability": 0.0
-                },
-                "confidence": "low",
-                "note": "Insufficient historical data"
-            }
-
-        # Calculate recent performance metrics
-        avg_points = recent_results['points'].mean()
-        podium_count = len(recent_results[recent_results['positionOrder'] <= 3])
-        total_races = len(recent_results)
-
-        # Simple prediction based on recent performance
-        predicted_points = max(0, avg_points * 0.9)  # Slight regression to mean
-        podium_probability = min(0.8, podium_count / max(1, total_races) * 1.2)
-
-        # Championship prediction (simplified)
-        championship_probability = podium_probability * 0.3 if predicted_points > 200 else 0.0
+    return await response_cache.respond(request, lambda: driver_performance_prediction(driverId, year))
 
-        return {
-            "driver_name": driver_name,
-            "predictions": {
-                "points": round(predicted_points, 1),
-                "podium_probability": round(podium_probability, 3),
-                "championship_probability": round(championship_probability, 3)
-            },
-            "confidence": "medium" if total_races >= 10 else "low",
-            "based_on_races": total_races
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/predict/constructor/{constructorId}/{year}")
-async def predict_constructor_performance(constructorId: int, year: int):
+def constructor_performance_prediction(constructorId: int, year: int):
     """Predict constructor performance for a given year."""
-    try:
-        # Get constructor name
-        constructor_info = constructors_df[constructors_df['constructorId'] == constructorId]
-        if constructor_info.empty:
-            raise HTTPException(status_code=404, detail="Constructor not found")
-
-        constructor_name = constructor_info['name'].iloc[0]
-
-        # Get recent performance data for prediction
-        recent_results = results_df.merge(races_df[['raceId', 'year']], on='raceId')
-        recent_results = recent_results[(recent_results['constructorId'] == constructorId) &
-                                       (recent_results['year'] >= year - 3) &
-                                       (recent_results['year'] < year)]
-
-        if recent_results.empty:
-            return {
-                "constructor_name": constructor_name,
-                "predictions": {
-                    "points": 0,
-                    "championship_probability": 0.0
-                },
-                "confidence": "low",
-                "note": "Insufficient historical data"
-            }
-
-        # Calculate recent performance metrics
-        total_points = recent_results.groupby('year')['points'].sum().mean()
-
-        # Simple prediction based on recent performance
-        predicted_points = max(0, total_points * 0.9)  # Slight regression to mean
-
-        # Championship prediction (simplified)
-        championship_probability = 0.4 if predicted_points > 400 else 0.1 if predicted_points > 200 else 0.0
+    constructor_history = resources.get('constructor_history')
+    # Get constructor name; unknown ids raise LookupError
+    constructor_name = resources.get('reference_data').constructor_name(constructorId)
 
+    # Races from the three previous seasons
+    with span('features'):
+        years, points, _ = constructor_history.window(constructorId, year - 3, year - 1)
+
+    if not len(years):
         return {
             "constructor_name": constructor_name,
             "predictions": {
-                "points": round(predicted_points, 1),
-                "championship_probability": round(championship_probability, 3)
+                "points": 0,
+                "championship_probability": 0.0
             },
-            "confidence": "medium",
-            "based_on_seasons": len(recent_results.groupby('year'))
+            "confidence": "low",
+            "note": "Insufficient historical data"
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+
+    # Calculate recent performance metrics
+    season_points = constructor_history.season_points(years, points)
+    total_points = season_points.mean()
+
+    # Simple prediction based on recent performance
+    predicted_points = max(0, total_points * 0.9)  # Slight regression to mean
+
+    # Championship prediction (simplified)
+    championship_probability = 0.4 if predicted_points > 400 else 0.1 if predicted_points > 200 else 0.0
+
+    return {
+        "constructor_name": constructor_name,
+        "predictions": {
+            "points": round(predicted_points, 1),
+            "championship_probability": round(championship_probability, 3)
+        },
+        "confidence": "medium",
+        "based_on_seasons": len(season_points)
+    }
+
+@app.get("/predict/constructor/{constructorId}/{year}")
+async def predict_constructor_performance(request: Request, constructorId: int, year: int):
+    """Predict constructor performance for a given year."""
+    return await response_cache.respond(request, lambda: constructor_performance_prediction(constructorId, year))
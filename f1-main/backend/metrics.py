@@ -0,0 +1,231 @@
+import contextvars
+import cProfile
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from starlette.routing import Match
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+                   60.0, 300.0)
+
+REQUEST_SECONDS = 'f1_http_request_duration_seconds'
+STAGE_SECONDS = 'f1_stage_duration_seconds'
+HELP = {
+    REQUEST_SECONDS: 'HTTP request latency by route template, method and status.',
+    STAGE_SECONDS: 'Latency of instrumented stages (load, features, scale, predict_proba, serialize, ...) by route.',
+}
+
+# Route template of the request being handled; spans outside a request use 'none'
+current_route = contextvars.ContextVar('current_route', default='none')
+
+# Profiler of the request being handled, when it asked for one
+current_profile = contextvars.ContextVar('current_profile', default=None)
+
+# Opt-in per-request profiling: set F1_PROFILING=1 and send the header below
+PROFILE_HEADER = b'x-profile'
+# X-Profile values that turn profiling on; anything else, e.g. 0 or false, leaves it off
+PROFILE_ON_VALUES = {b'1', b'true', b'yes', b'on'}
+PROFILE_DIR = 'backend/profiles'
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Labelled latency histograms, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self):
+        with self._lock:
+            snapshot = sorted((key, list(h.counts), h.sum, h.buckets) for key, h in self._histograms.items())
+
+        lines = []
+        last_name = None
+        for (name, labels), counts, total, buckets in snapshot:
+            if name != last_name:
+                lines.append(f'# HELP {name} {HELP.get(name, name)}')
+                lines.append(f'# TYPE {name} histogram')
+                last_name = name
+            label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+            prefix = f'{label_text},' if label_text else ''
+            cumulative = 0
+            for bound, count in zip(buckets, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label_text}}} {total}')
+            lines.append(f'{name}_count{{{label_text}}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+    def stage_summary(self):
+        """One line per stage with its count, total and mean time, e.g. for training scripts."""
+        with self._lock:
+            stages = {}
+            for (name, labels), histogram in self._histograms.items():
+                if name != STAGE_SECONDS:
+                    continue
+                stage = dict(labels)['stage']
+                count, total = stages.get(stage, (0, 0.0))
+                stages[stage] = (count + sum(histogram.counts), total + histogram.sum)
+        return '\n'.join(f'{stage:<14} {count:>6} calls {total:>9.3f} s total {total / count * 1000:>9.2f} ms mean'
+                         for stage, (count, total) in sorted(stages.items(), key=lambda item: -item[1][1]))
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def span(stage):
+    """Record how long the block takes as one observation of `stage` for the current route."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(STAGE_SECONDS, time.perf_counter() - start, stage=stage, route=current_route.get())
+
+
+class RequestProfile:
+    """cProfile data for one request, across the event loop and inference threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self.loop_profiler = cProfile.Profile()
+        self._thread_profilers = []
+        self._lock = threading.Lock()
+
+    def run(self, fn, *args):
+        # cProfile only sees the thread that enabled it, so each worker call gets its own
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(fn, *args)
+        finally:
+            with self._lock:
+                self._thread_profilers.append(profiler)
+
+    def dump(self):
+        stats = pstats.Stats(self.loop_profiler)
+        with self._lock:
+            for profiler in self._thread_profilers:
+                stats.add(profiler)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        stats.dump_stats(self.path)
+
+
+def run_profiled(fn, *args):
+    """Call fn(*args), under the current request's profiler if it asked for one."""
+    profile = current_profile.get()
+    if profile is None:
+        return fn(*args)
+    return profile.run(fn, *args)
+
+
+def route_template(scope):
+    """Return the path template of the route matching an ASGI scope, e.g. /predict/driver/{driverId}/{year}."""
+    app = scope.get('app')
+    for route in getattr(app, 'routes', ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return 'unmatched'
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request latency and, on request, a cProfile dump.
+
+    Profiling is opt-in: with profile_dir set (F1_PROFILING=1 in main.py), a
+    request carrying an `X-Profile: 1` header (or true, yes or on) is
+    profiled on the event loop thread and in the inference threads it uses.
+    The stats are written to a .prof file named in the `X-Profile-File`
+    response header. The loop
+    thread profiler also sees other requests running concurrently, and only
+    one request is profiled at a time.
+    """
+
+    def __init__(self, app, profile_dir=None):
+        self.app = app
+        self.profile_dir = profile_dir
+        self._profiling = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        route = route_template(scope)
+        route_token = current_route.set(route)
+        profile = self._start_profile(scope, route)
+        profile_token = current_profile.set(profile)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if profile is not None:
+                    message['headers'] = list(message.get('headers', [])) + [
+                        (b'x-profile-file', profile.path.encode())
+                    ]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.observe(REQUEST_SECONDS, time.perf_counter() - start,
+                             route=route, method=scope['method'], status=str(status))
+            current_route.reset(route_token)
+            current_profile.reset(profile_token)
+            if profile is not None:
+                self._finish_profile(profile)
+
+    def _start_profile(self, scope, route):
+        if self.profile_dir is None:
+            return None
+        if dict(scope['headers']).get(PROFILE_HEADER, b'').strip().lower() not in PROFILE_ON_VALUES:
+            return None
+        if not self._profiling.acquire(blocking=False):
+            return None
+
+        name = route.strip('/').replace('/', '_').replace('{', '').replace('}', '') or 'root'
+        profile = RequestProfile(os.path.join(self.profile_dir, f'{time.time_ns() // 1000000}-{name}.prof'))
+        profile.loop_profiler.enable()
+        return profile
+
+    def _finish_profile(self, profile):
+        profile.loop_profiler.disable()
+        try:
+            profile.dump()
+        finally:
+            self._profiling.release()
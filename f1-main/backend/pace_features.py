@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# 'm:ss.sss' or 'ss.sss'; anything else (\N, empty) is a missing time
+LAP_TIME_PATTERN = r'^(?:(\d+):)?(\d+(?:\.\d+)?)$'
+
+# Stops longer than this are red-flag or repair stops, left out of duration stats
+PIT_STOP_OUTLIER_MS = 120000
+
+# Qualifying columns the pace features read
+QUALIFYING_COLUMNS = ['raceId', 'driverId', 'constructorId', 'position', 'q1', 'q2', 'q3']
+
+QUALI_PACE_COLS = ['avg_quali_gap_pct', 'best_quali_gap_pct', 'avg_quali_position', 'q3_rate']
+PIT_STOP_COLS = ['pit_stops_per_race', 'avg_pit_ms', 'median_pit_ms', 'best_pit_ms']
+PACE_FEATURE_COLS = QUALI_PACE_COLS + PIT_STOP_COLS
+
+# Model inputs: the pace features with NaN filled, plus a 0/1 flag per source telling real values from fills
+PACE_MODEL_COLS = PACE_FEATURE_COLS + ['has_quali_pace', 'has_pit_stops']
+
+
+def parse_lap_times(times):
+    """Parse lap time strings to seconds without a Python-level loop.
+
+    Only the distinct strings are parsed, through a categorical view of the
+    column, and the result is mapped back by category code.
+    """
+    categorical = pd.Series(times).astype('category')
+    parts = categorical.cat.categories.astype(str).str.extract(LAP_TIME_PATTERN)
+    parsed = (parts[0].astype(float).fillna(0) * 60 + parts[1].astype(float)).to_numpy()
+    codes = categorical.cat.codes.to_numpy()
+    # Code -1 (a missing value) picks the trailing NaN
+    return pd.Series(np.append(parsed, np.nan)[codes], index=categorical.index)
+
+
+def qualifying_laps(qualifying_df, races_df):
+    """One row per qualifying entry with its best time, gap to pole and whether it reached Q3."""
+    sessions = pd.DataFrame({
+        'q1': parse_lap_times(qualifying_df['q1']),
+        'q2': parse_lap_times(qualifying_df['q2']),
+        'q3': parse_lap_times(qualifying_df['q3']),
+    })
+    laps = qualifying_df[['raceId', 'driverId', 'constructorId', 'position']].copy()
+    laps['best_time'] = sessions.min(axis=1)
+    laps['reached_q3'] = sessions['q3'].notna()
+    laps['gap_pct'] = (laps['best_time'] / laps.groupby('raceId')['best_time'].transform('min') - 1) * 100
+    return laps.merge(races_df[['raceId', 'year']], on='raceId')
+
+
+def qualifying_pace(laps, key):
+    """Per-(year, key) qualifying pace: mean and best gap to pole, mean position and Q3 rate."""
+    return laps.groupby(['year', key]).agg(
+        avg_quali_gap_pct=('gap_pct', 'mean'),
+        best_quali_gap_pct=('gap_pct', 'min'),
+        avg_quali_position=('position', 'mean'),
+        q3_rate=('reached_q3', 'mean'),
+    ).reset_index()
+
+
+def pit_stop_entries(pit_stops_df, results_with_race):
+    """Pit stops with the year and the constructor the driver raced for."""
+    entries = results_with_race[['raceId', 'driverId', 'constructorId', 'year']].drop_duplicates(['raceId', 'driverId'])
+    return pit_stops_df[['raceId', 'driverId', 'milliseconds']].merge(entries, on=['raceId', 'driverId'])
+
+
+def pit_stop_stats(stops, key):
+    """Per-(year, key) pit-stop counts and durations, ignoring red-flag length stops for the durations."""
+    counts = stops.groupby(['year', key]).agg(stops=('milliseconds', 'size'), races=('raceId', 'nunique'))
+    durations = stops[stops['milliseconds'] <= PIT_STOP_OUTLIER_MS].groupby(['year', key])['milliseconds'].agg(
+        avg_pit_ms='mean', median_pit_ms='median', best_pit_ms='min'
+    )
+    stats = counts.join(durations)
+    stats['pit_stops_per_race'] = stats['stops'] / stats['races']
+    return stats.reset_index()[['year', key, 'pit_stops_per_race', 'avg_pit_ms', 'median_pit_ms', 'best_pit_ms']]
+
+
+def pace_features(laps, stops, key):
+    """Qualifying pace and pit-stop stats per (year, key).
+
+    Seasons before timed qualifying (and before 2011 for pit stops) have NaN
+    for the columns they lack, rather than a misleading zero.
+    """
+    features = qualifying_pace(laps, key).merge(pit_stop_stats(stops, key), on=['year', key], how='outer')
+    return features.sort_values(['year', key]).reset_index(drop=True)[['year', key] + PACE_FEATURE_COLS]
+
+
+def with_pace_features(features, pace, key):
+    """Left-join pace features onto season features, e.g. to train on them; rows without pace data get NaN."""
+    return features.merge(pace, on=['year', key], how='left')
+
+
+def pace_model_features(features, pace, key):
+    """with_pace_features() ready for the models, which do not accept NaN.
+
+    Most seasons predate timed qualifying or pit-stop data, so every missing
+    value is filled with 0 and has_quali_pace / has_pit_stops flag the rows
+    whose values are real.
+    """
+    features = with_pace_features(features, pace, key)
+    features['has_quali_pace'] = features[QUALI_PACE_COLS].notna().any(axis=1).astype(int)
+    features['has_pit_stops'] = features[PIT_STOP_COLS].notna().any(axis=1).astype(int)
+    features[PACE_FEATURE_COLS] = features[PACE_FEATURE_COLS].fillna(0)
+    return features
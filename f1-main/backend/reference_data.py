@@ -0,0 +1,76 @@
+import pandas as pd
+
+from dataset_loader import DATASET_DIR, load_dataset
+
+# Columns each lookup reads, so the tables can be loaded without the rest
+REFERENCE_COLUMNS = {
+    'drivers': ['driverId', 'forename', 'surname', 'code', 'nationality'],
+    'constructors': ['constructorId', 'name', 'nationality'],
+    'circuits': ['circuitId', 'name', 'location', 'country'],
+    'status': ['statusId', 'status'],
+}
+
+
+def _column(df, col):
+    # Missing values (Ergast's \N) load as NaN and are returned as None
+    return [None if pd.isna(value) else value for value in df[col].tolist()]
+
+
+def _lookup(df, id_col, cols):
+    """Map each id to a dict of the given columns."""
+    ids = df[id_col].astype(int).tolist()
+    values = zip(*[_column(df, col) for col in cols])
+    return {entity_id: dict(zip(cols, row)) for entity_id, row in zip(ids, values)}
+
+
+class ReferenceData:
+    """Id-keyed lookups for drivers, constructors, circuits and finishing status.
+
+    Built once from the reference tables; every lookup is a dict access.
+    The *_name() and record methods raise LookupError for unknown ids, which
+    the API maps to 404.
+    """
+
+    def __init__(self, drivers_df, constructors_df, circuits_df=None, status_df=None):
+        self.drivers = _lookup(drivers_df, 'driverId', ['forename', 'surname', 'code', 'nationality'])
+        for driver in self.drivers.values():
+            driver['name'] = f"{driver['forename']} {driver['surname']}"
+        self.constructors = _lookup(constructors_df, 'constructorId', ['name', 'nationality'])
+        self.circuits = {} if circuits_df is None else _lookup(circuits_df, 'circuitId', ['name', 'location', 'country'])
+        self.statuses = {} if status_df is None else dict(zip(status_df['statusId'].astype(int).tolist(),
+                                                              status_df['status'].tolist()))
+
+        # Plain id -> display name maps, in file order
+        self.driver_names = {driver_id: driver['name'] for driver_id, driver in self.drivers.items()}
+        self.constructor_names = {constructor_id: constructor['name']
+                                  for constructor_id, constructor in self.constructors.items()}
+
+    @classmethod
+    def load(cls, dataset_dir=DATASET_DIR):
+        return cls(*[load_dataset(name, dataset_dir, columns=columns) for name, columns in REFERENCE_COLUMNS.items()])
+
+    @staticmethod
+    def _get(table, entity_id, label):
+        try:
+            return table[int(entity_id)]
+        except KeyError:
+            raise LookupError(f"{label} not found") from None
+
+    def driver(self, driver_id):
+        """Return forename, surname, name, code and nationality for a driver."""
+        return self._get(self.drivers, driver_id, 'Driver')
+
+    def constructor(self, constructor_id):
+        return self._get(self.constructors, constructor_id, 'Constructor')
+
+    def circuit(self, circuit_id):
+        return self._get(self.circuits, circuit_id, 'Circuit')
+
+    def status(self, status_id):
+        return self._get(self.statuses, status_id, 'Status')
+
+    def driver_name(self, driver_id):
+        return self.driver(driver_id)['name']
+
+    def constructor_name(self, constructor_id):
+        return self.constructor(constructor_id)['name']
@@ -0,0 +1,241 @@
+import threading
+import time
+
+from response_cache import source_version
+
+
+class ResourceNotReady(Exception):
+    """Raised when a resource is being loaded by another thread."""
+
+
+class ResourceUnavailable(Exception):
+    """Raised when a resource failed to load."""
+
+
+class Resource:
+    def __init__(self, name, loader, kind, sources):
+        self.name = name
+        self.loader = loader
+        self.kind = kind
+        # Glob patterns of the files the resource is loaded from, watched for changes
+        self.sources = tuple(sources)
+        self.state = 'pending'
+        self.value = None
+        self.error = None
+        self.seconds = None
+        # Bumped on every swap, including rollbacks
+        self.version = 0
+        # Stamp of the files at the last load or reload attempt, successful or not
+        self.attempted_stamp = None
+        # (value, version) of the version replaced by the last swap
+        self.previous = None
+        self.reload_error = None
+        self.lock = threading.Lock()
+        self.reload_lock = threading.Lock()
+
+
+class ResourceRegistry:
+    """Named models and datasets, loaded on first use or by a background warm-up.
+
+    get() returns a loaded resource, loading it in the calling thread the
+    first time. While another thread is loading it, get() raises
+    ResourceNotReady instead of waiting, so requests that need it fail fast
+    and requests that don't keep being served. Loaders that get() their
+    dependencies do wait for them. A failed load is remembered and raises
+    ResourceUnavailable, e.g. for a model file that is not there.
+
+    reload() builds a new version next to the one being served and swaps it
+    in with one assignment: requests already holding the old value finish
+    with it, later get() calls see the new one. The replaced version is kept
+    for rollback(), and on_swap() callbacks run after every swap.
+    """
+
+    def __init__(self):
+        self._resources = {}
+        self._local = threading.local()
+        self._swap_callbacks = []
+        self._watcher_stop = threading.Event()
+
+    def register(self, name, loader, kind='dataset', sources=()):
+        self._resources[name] = Resource(name, loader, kind, sources)
+
+    def names(self, kind=None):
+        return [name for name, resource in self._resources.items() if kind is None or resource.kind == kind]
+
+    def on_swap(self, callback):
+        """Call callback(name) whenever a reloaded or rolled back version of a resource is swapped in."""
+        self._swap_callbacks.append(callback)
+
+    def get(self, name):
+        resource = self._resources[name]
+        if resource.state == 'ready':
+            return resource.value
+
+        # Only loaders block on a resource another thread is loading
+        if not resource.lock.acquire(blocking=getattr(self._local, 'depth', 0) > 0):
+            raise ResourceNotReady(f"{name} is still loading")
+        try:
+            if resource.state == 'pending':
+                self._load(resource)
+            if resource.state == 'failed':
+                raise ResourceUnavailable(f"{name} is unavailable: {resource.error}")
+            return resource.value
+        finally:
+            resource.lock.release()
+
+    def _call_loader(self, resource):
+        # Stamp the files first, so a change while loading is seen as a change
+        resource.attempted_stamp = source_version(resource.sources) if resource.sources else None
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        try:
+            return resource.loader()
+        finally:
+            self._local.depth -= 1
+
+    def _load(self, resource):
+        resource.state = 'loading'
+        start = time.perf_counter()
+        try:
+            resource.value = self._call_loader(resource)
+            resource.version += 1
+            resource.error = None
+            resource.state = 'ready'
+        except Exception as e:
+            resource.error = f"{type(e).__name__}: {e}"
+            resource.state = 'failed'
+        finally:
+            resource.seconds = time.perf_counter() - start
+
+    def reload(self, name):
+        """Load a new version of a resource, swap it in and return its version number.
+
+        The version being served stays in place until the new one has loaded,
+        and keeps being served if loading fails (ResourceUnavailable is
+        raised). A resource that never loaded, or failed to, is loaded as on
+        first use.
+        """
+        resource = self._resources[name]
+        with resource.reload_lock:
+            if resource.state != 'ready':
+                with resource.lock:
+                    if resource.state != 'ready':
+                        self._load(resource)
+                if resource.state == 'failed':
+                    raise ResourceUnavailable(f"{name} is unavailable: {resource.error}")
+            else:
+                start = time.perf_counter()
+                try:
+                    value = self._call_loader(resource)
+                except Exception as e:
+                    resource.reload_error = f"{type(e).__name__}: {e}"
+                    raise ResourceUnavailable(f"{name} reload failed, still serving version "
+                                              f"{resource.version}: {resource.reload_error}") from e
+
+                with resource.lock:
+                    resource.previous = (resource.value, resource.version)
+                    resource.value = value
+                    resource.seconds = time.perf_counter() - start
+                    resource.version += 1
+                    resource.reload_error = None
+        self._notify(name)
+        return resource.version
+
+    def replace(self, name, update):
+        """Swap in update(current value) for a resource, e.g. after changing its data in memory.
+
+        The resource is loaded first if it is not yet. Unlike reload(), no
+        on_swap() callbacks run; the caller drops whatever depends on the change.
+        """
+        resource = self._resources[name]
+        with resource.reload_lock:
+            value = update(self.get(name))
+            with resource.lock:
+                resource.value = value
+                resource.version += 1
+        return resource.version
+
+    def rollback(self, name):
+        """Swap back the version replaced by the last reload and return the version number it now has."""
+        resource = self._resources[name]
+        with resource.reload_lock:
+            if resource.previous is None:
+                raise LookupError(f"{name} has no previous version")
+            with resource.lock:
+                resource.previous, resource.value = (resource.value, resource.version), resource.previous[0]
+                resource.version += 1
+        self._notify(name)
+        return resource.version
+
+    def _notify(self, name):
+        for callback in self._swap_callbacks:
+            callback(name)
+
+    def changed(self):
+        """Return {name: stamp} for loaded or failed resources whose files changed since the last load attempt."""
+        stamps = {}
+        for name, resource in self._resources.items():
+            if resource.sources and resource.state in ('ready', 'failed'):
+                stamp = source_version(resource.sources)
+                if stamp != resource.attempted_stamp:
+                    stamps[name] = stamp
+        return stamps
+
+    def watch(self, interval):
+        """Reload resources whose files changed and then stayed the same for another interval.
+
+        Waiting for a second identical stamp avoids loading artifacts that a
+        training run is still writing.
+        """
+        seen = {}
+        while not self._watcher_stop.wait(interval):
+            changed = self.changed()
+            for name, stamp in changed.items():
+                if seen.get(name) != stamp:
+                    seen[name] = stamp
+                    continue
+                try:
+                    self.reload(name)
+                except ResourceUnavailable:
+                    pass
+            seen = {name: stamp for name, stamp in seen.items() if changed.get(name) == stamp}
+
+    def start_watching(self, interval):
+        thread = threading.Thread(target=self.watch, args=(interval,), name='resource-watcher', daemon=True)
+        thread.start()
+        return thread
+
+    def stop_watching(self):
+        self._watcher_stop.set()
+
+    def warm_up(self):
+        """Load every registered resource in registration order, recording failures."""
+        for name in self._resources:
+            try:
+                self.get(name)
+            except (ResourceNotReady, ResourceUnavailable):
+                pass
+
+    def start_warm_up(self):
+        thread = threading.Thread(target=self.warm_up, name='resource-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        """Return ({'models': {name: details}, 'datasets': {...}}, loaded); loaded once nothing is pending or loading."""
+        report = {}
+        loaded = True
+        for resource in self._resources.values():
+            details = {'state': resource.state}
+            if resource.version:
+                details['version'] = resource.version
+            if resource.previous is not None:
+                details['previous_version'] = resource.previous[1]
+            if resource.seconds is not None:
+                details['load_seconds'] = round(resource.seconds, 3)
+            if resource.error is not None:
+                details['error'] = resource.error
+            if resource.reload_error is not None:
+                details['reload_error'] = resource.reload_error
+            report.setdefault(f'{resource.kind}s', {})[resource.name] = details
+            loaded = loaded and resource.state in ('ready', 'failed')
+        return report, loaded
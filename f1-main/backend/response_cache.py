@@ -0,0 +1,160 @@
+import asyncio
+import glob
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from metrics import span
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; responses fall back to gzip
+    brotli = None
+
+# Files whose changes invalidate every cached response
+VERSION_SOURCES = ('../daasets/*.csv', 'backend/models/*.joblib')
+
+
+def source_version(patterns=VERSION_SOURCES):
+    """Return a short stamp of the path, size and mtime of every matching file."""
+    digest = hashlib.sha1()
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            stat = os.stat(path)
+            digest.update(f'{path}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()[:16]
+
+
+class CachedResponse:
+    """One response body, pre-encoded as JSON and pre-compressed."""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.encoded = {'gzip': gzip.compress(body, compresslevel=6)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(body, quality=5)
+
+    def select(self, accept_encoding):
+        """Return (content-encoding, bytes) for the smallest encoding the client accepts."""
+        accepted = {token.split(';')[0].strip() for token in accept_encoding.lower().split(',')}
+        for encoding in ('br', 'gzip'):
+            if encoding in accepted and encoding in self.encoded:
+                return encoding, self.encoded[encoding]
+        return None, self.body
+
+
+class ResponseCache:
+    """Cache of GET responses keyed by path, query string and data version.
+
+    The version is a stamp of the dataset CSVs and model artifacts, checked
+    at most every check_interval seconds, so replacing any of them starts a
+    fresh cache. Clients get an ETag, can revalidate with If-None-Match and
+    receive gzip (or brotli, when installed) bytes encoded once per entry.
+
+    Misses are built, encoded and compressed by run(fn), a coroutine
+    function that calls fn off the event loop; asyncio.to_thread by default.
+    """
+
+    def __init__(self, max_entries=256, max_age=60, check_interval=1.0, version=source_version, run=None):
+        self.max_entries = max_entries
+        self.cache_control = f'public, max-age={max_age}'
+        self.check_interval = check_interval
+        self._version_fn = version
+        self._run = run or asyncio.to_thread
+        self._version = None
+        self._checked_at = float('-inf')
+        self._entries = OrderedDict()
+        # Bumped whenever entries are dropped, so builds started before that are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def version(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            version = self._version_fn()
+            with self._lock:
+                if version != self._version:
+                    self._version = version
+                    self._entries.clear()
+                    self._generation += 1
+                self._checked_at = now
+        return self._version
+
+    def clear(self):
+        """Drop every entry, e.g. after the served data was updated in memory."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def discard(self, stale):
+        """Drop the entries whose (path, query, variant) key stale() matches, e.g. after an in-memory update."""
+        with self._lock:
+            for key in [key for key in self._entries if stale(key)]:
+                del self._entries[key]
+            self._generation += 1
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def encode(payload):
+        """Encode a handler payload as JSON bytes; bytes are taken as already encoded."""
+        if isinstance(payload, bytes):
+            return payload
+        return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                          separators=(',', ':')).encode('utf-8')
+
+    def _build(self, build):
+        payload = build()
+        with span('serialize'):
+            return CachedResponse(self.encode(payload))
+
+    async def respond(self, request, build, variant=None, media_type='application/json'):
+        """Serve request from the cache, calling build() to fill a miss.
+
+        build() is a blocking function returning the payload; it runs through
+        run() together with the JSON encoding and compression of its result,
+        so a miss never blocks the event loop. Exceptions from it propagate
+        uncached, so errors are never stored. Endpoints that pick a
+        representation from the Accept header pass it as variant, which is
+        added to the cache key and makes the response Vary on Accept.
+        """
+        self.version()
+        generation = self._generation
+        key = (request.url.path, request.url.query, variant)
+        entry = self._get(key)
+        if entry is None:
+            entry = await self._run(self._build, build)
+            self._put(key, entry, generation)
+
+        headers = {'ETag': entry.etag, 'Cache-Control': self.cache_control,
+                   'Vary': 'Accept-Encoding' if variant is None else 'Accept, Accept-Encoding'}
+        if_none_match = request.headers.get('if-none-match', '')
+        if entry.etag in (tag.strip() for tag in if_none_match.split(',')) or if_none_match.strip() == '*':
+            return Response(status_code=304, headers=headers)
+
+        encoding, body = entry.select(request.headers.get('accept-encoding', ''))
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,175 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from metrics import span
+
+# Points for P1..P10; sprint races and fastest-lap points are not simulated
+RACE_POINTS = np.array([25, 18, 15, 12, 10, 8, 6, 4, 2, 1], dtype=np.float64)
+
+# Seasons simulated per chunk; chunks get independent child seeds
+CHUNK_SIZE = 5000
+
+# Floor for model probabilities, so every driver keeps a non-zero weight
+MIN_PROBABILITY = 1e-6
+
+
+def podium_matrix(model, driver_ids, constructor_ids):
+    """Return P[i, g]: podium probability of field entry i starting from grid slot g + 1.
+
+    One predict_proba call scores every (driver, grid slot) pair of the field.
+    """
+    n = len(driver_ids)
+    grid = np.tile(np.arange(1, n + 1), n)
+    rows = pd.DataFrame({
+        'driverId': np.repeat(driver_ids, n),
+        'constructorId': np.repeat(constructor_ids, n),
+        'grid': grid,
+    })
+    with span('predict_proba'):
+        probabilities = model.predict_proba(rows)[:, 1].reshape(n, n)
+    return np.clip(probabilities, MIN_PROBABILITY, 1.0)
+
+
+def _plackett_luce_ranks(log_weights, rng):
+    """Sample one finishing order per row; return each entry's 0-based rank.
+
+    Adding Gumbel noise to log weights and sorting draws an order where each
+    next place goes to a remaining entry with probability proportional to
+    its weight.
+    """
+    keys = log_weights + rng.gumbel(size=log_weights.shape)
+    order = np.argsort(-keys, axis=1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(order.shape[1])[None, :], axis=1)
+    return ranks
+
+
+def simulate_chunk(probabilities, team_index, n_teams, remaining_races, driver_points, constructor_points,
+                   n_seasons, seed):
+    """Simulate n_seasons seasons at once; return title counts and summed final points."""
+    rng = np.random.default_rng(seed)
+    n = probabilities.shape[0]
+    points_by_rank = np.zeros(n)
+    points_by_rank[:min(n, len(RACE_POINTS))] = RACE_POINTS[:n]
+    log_probabilities = np.log(probabilities)
+    # Qualifying pace: mean podium chance over all grid slots
+    log_strength = np.log(probabilities.mean(axis=1))[None, :]
+    entries = np.arange(n)[None, :]
+
+    points = np.broadcast_to(driver_points, (n_seasons, n)).astype(np.float64)
+    for _ in range(remaining_races):
+        grid = _plackett_luce_ranks(np.broadcast_to(log_strength, (n_seasons, n)), rng)
+        finish = _plackett_luce_ranks(log_probabilities[entries, grid], rng)
+        points += points_by_rank[finish]
+
+    # Simulated race points go to each entry's team through a one-hot (entry x team) matrix
+    membership = np.zeros((n, n_teams))
+    membership[np.arange(n), team_index] = 1.0
+    team_points = (points - driver_points[None, :]) @ membership + constructor_points[None, :]
+
+    # Ties go to the entry listed first
+    driver_titles = np.bincount(points.argmax(axis=1), minlength=n)
+    constructor_titles = np.bincount(team_points.argmax(axis=1), minlength=n_teams)
+    return driver_titles, points.sum(axis=0), constructor_titles, team_points.sum(axis=0)
+
+
+def simulation_pool(processes):
+    """Return a process pool for simulation chunks, meant to be created once and reused.
+
+    Workers start from a forkserver (spawn where that is unavailable) rather
+    than by forking the caller, which in the API is a multithreaded server.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    return ProcessPoolExecutor(max_workers=processes, mp_context=context)
+
+
+class SeasonSimulator:
+    """Monte Carlo simulation of the rest of a season from the podium model.
+
+    Every remaining race samples a grid from each driver's overall podium
+    chance and a finishing order weighted by the model's podium probability
+    from that grid slot, then awards race points. Championship odds are the
+    share of simulated seasons each driver and constructor wins.
+    """
+
+    def __init__(self, model, driver_ids, constructor_ids, remaining_races, driver_points=None,
+                 constructor_points=None):
+        self.driver_ids = np.asarray(driver_ids, dtype=np.int64)
+        self.constructor_ids, self.team_index = np.unique(np.asarray(constructor_ids, dtype=np.int64),
+                                                          return_inverse=True)
+        self.remaining_races = int(remaining_races)
+        self.driver_points = np.zeros(len(self.driver_ids)) if driver_points is None else \
+            np.asarray(driver_points, dtype=np.float64)
+        self.constructor_points = np.zeros(len(self.constructor_ids)) if constructor_points is None else \
+            np.asarray(constructor_points, dtype=np.float64)
+        self.probabilities = podium_matrix(model, self.driver_ids, np.asarray(constructor_ids, dtype=np.int64))
+
+    def run(self, n_seasons, seed=None, pool=None, chunk_size=CHUNK_SIZE):
+        """Simulate n_seasons seasons and return title probabilities and expected points.
+
+        Seasons are split into fixed chunks, each with a child of the seed, so
+        a given seed gives the same result whether or not the chunks are
+        spread over `pool`, a process pool from simulation_pool().
+        """
+        sizes = [chunk_size] * (n_seasons // chunk_size)
+        if n_seasons % chunk_size:
+            sizes.append(n_seasons % chunk_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        args = [(self.probabilities, self.team_index, len(self.constructor_ids), self.remaining_races,
+                 self.driver_points, self.constructor_points, size, chunk_seed)
+                for size, chunk_seed in zip(sizes, seeds)]
+
+        with span('simulate'):
+            if pool is not None and len(args) > 1:
+                chunks = list(pool.map(simulate_chunk, *zip(*args)))
+            else:
+                chunks = [simulate_chunk(*chunk_args) for chunk_args in args]
+
+        driver_titles, driver_points, constructor_titles, constructor_points = (sum(parts) for parts in zip(*chunks))
+        return {
+            'driver_title_probability': driver_titles / n_seasons,
+            'driver_expected_points': driver_points / n_seasons,
+            'constructor_title_probability': constructor_titles / n_seasons,
+            'constructor_expected_points': constructor_points / n_seasons,
+        }
+
+
+def season_field(year, season_results, races_df, driver_standings, constructor_standings):
+    """Return the field, current standings and remaining race count for a season.
+
+    season_results holds the race results with their year, partitioned by
+    year, and the standings tables are partitioned by raceId (see
+    history_index.PartitionedTable). For a season in the data, the field is
+    the line-up of its latest completed race and the standings are the
+    points after that race. Later seasons start from zero points with the
+    most recent line-up and the most recent season's number of races,
+    unless their calendar is already known.
+    """
+    last_year = season_results.keys()[-1]
+    field_year = min(year, last_year)
+    completed = season_results.get(field_year)
+    if completed.empty:
+        raise LookupError("Season not found")
+
+    rounds = races_df.set_index('raceId')['round']
+    last_race = completed.loc[completed['raceId'].map(rounds).idxmax(), 'raceId']
+    line_up = completed[completed['raceId'] == last_race].sort_values('positionOrder')
+    driver_ids = line_up['driverId'].to_numpy(dtype=np.int64)
+    constructor_ids = line_up['constructorId'].to_numpy(dtype=np.int64)
+
+    calendar = races_df[races_df['year'] == year]
+    if year > last_year:
+        remaining = len(calendar) if len(calendar) else int((races_df['year'] == last_year).sum())
+        return driver_ids, constructor_ids, remaining, None, None
+
+    remaining = int((calendar['round'] > rounds[last_race]).sum())
+    driver_points = driver_standings.get(last_race).set_index('driverId')['points'] \
+        .reindex(driver_ids, fill_value=0).to_numpy()
+    teams = np.unique(constructor_ids)
+    constructor_points = constructor_standings.get(last_race).set_index('constructorId')['points'] \
+        .reindex(teams, fill_value=0).to_numpy()
+    return driver_ids, constructor_ids, remaining, driver_points, constructor_points
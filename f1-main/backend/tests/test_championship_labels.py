@@ -0,0 +1,80 @@
+"""Regression tests for championship_labels against the labelling it replaced."""
+import os
+
+import pandas as pd
+import pytest
+
+from championship_labels import label_champions, season_champions
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'daasets')
+
+
+def merge_champions(standings, id_col):
+    """Champions as train_championship_models.py found them: a merge on each season's maximum points."""
+    season_max_points = standings.groupby('year')['points'].max().reset_index()
+    return season_max_points.merge(
+        standings[['year', 'points', id_col]],
+        on=['year', 'points'],
+        how='left'
+    ).drop_duplicates(subset=['year'])
+
+
+def merge_labels(frame, standings, id_col):
+    champions = merge_champions(standings, id_col)
+    champions['is_champion'] = 1
+    labelled = frame.merge(champions[['year', id_col, 'is_champion']], on=['year', id_col], how='left')
+    return labelled['is_champion'].fillna(0).astype(int).to_numpy()
+
+
+def lambda_labels(season_points, id_col):
+    """Labels as train_wdc_model.py computed them: idxmax per season, then a row-wise lookup."""
+    champions = season_points.loc[season_points.groupby('year')['points'].idxmax()]
+    return season_points.apply(
+        lambda row: 1 if row[id_col] in champions[champions['year'] == row['year']][id_col].values else 0,
+        axis=1
+    ).to_numpy()
+
+
+@pytest.fixture
+def tied_standings():
+    # 2001 ends in a tie on maximum points between drivers 3 and 1; the first row in order wins
+    return pd.DataFrame({
+        'year': [2000, 2000, 2000, 2001, 2001, 2001, 2002],
+        'driverId': [1, 2, 3, 3, 1, 2, 2],
+        'points': [10.0, 30.0, 20.0, 50.0, 50.0, 40.0, 0.0],
+    })
+
+
+def test_season_champions_matches_merge(tied_standings):
+    champions = season_champions(tied_standings, 'driverId').reset_index(drop=True)
+    expected = merge_champions(tied_standings, 'driverId')[['year', 'driverId']].reset_index(drop=True)
+    pd.testing.assert_frame_equal(champions, expected)
+    assert champions['driverId'].tolist() == [2, 3, 2]
+
+
+def test_label_champions_matches_merge(tied_standings):
+    champions = season_champions(tied_standings, 'driverId')
+    labels = label_champions(tied_standings, champions, 'driverId')
+    assert labels.tolist() == merge_labels(tied_standings, tied_standings, 'driverId').tolist()
+    assert labels.tolist() == [0, 1, 0, 1, 0, 0, 1]
+
+
+def test_label_champions_matches_lambda(tied_standings):
+    champions = season_champions(tied_standings, 'driverId')
+    labels = label_champions(tied_standings, champions, 'driverId')
+    assert labels.tolist() == lambda_labels(tied_standings, 'driverId').tolist()
+
+
+@pytest.mark.skipif(not os.path.exists(os.path.join(DATASET_DIR, 'driver_standings.csv')), reason='needs daasets/')
+@pytest.mark.parametrize('table, id_col', [('driver_standings', 'driverId'),
+                                           ('constructor_standings', 'constructorId')])
+def test_labels_match_on_recorded_seasons(table, id_col):
+    races = pd.read_csv(os.path.join(DATASET_DIR, 'races.csv'), usecols=['raceId', 'year'])
+    standings = pd.read_csv(os.path.join(DATASET_DIR, f'{table}.csv')).merge(races, on='raceId', how='left')
+    season_points = standings.groupby(['year', id_col])['points'].max().reset_index()
+
+    labels = label_champions(season_points, season_champions(standings, id_col), id_col)
+    assert labels.tolist() == merge_labels(season_points, standings, id_col).tolist()
+
+    points_labels = label_champions(season_points, season_champions(season_points, id_col), id_col)
+    assert points_labels.tolist() == lambda_labels(season_points, id_col).tolist()
@@ -0,0 +1,40 @@
+"""CompactForest predictions against the sklearn forests they were exported from."""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from compact_forest import CompactForest, compact_path, export_model, load_model
+
+
+@pytest.fixture
+def training_data():
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(400, 5))
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) + rng.normal(scale=0.1, size=len(X))
+    return X, y
+
+
+def test_regressor_matches_sklearn_predict(training_data, tmp_path):
+    X, y = training_data
+    model = RandomForestRegressor(n_estimators=25, random_state=42).fit(X[:300], y[:300])
+    model_path = str(tmp_path / 'regressor.joblib')
+
+    assert export_model(model, model_path) == compact_path(model_path)
+    forest = load_model(model_path)
+
+    assert isinstance(forest, CompactForest)
+    np.testing.assert_allclose(forest.predict(X[300:]), model.predict(X[300:]), rtol=1e-9)
+
+
+def test_classifier_matches_sklearn_predict_proba(training_data, tmp_path):
+    X, y = training_data
+    labels = (y > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=25, random_state=42).fit(X[:300], labels[:300])
+    model_path = str(tmp_path / 'classifier.joblib')
+
+    export_model(model, model_path)
+    forest = load_model(model_path)
+
+    # Leaf distributions are stored as float32
+    np.testing.assert_allclose(forest.predict_proba(X[300:]), model.predict_proba(X[300:]), atol=1e-6)
+    assert forest.predict(X[300:]).tolist() == model.predict(X[300:]).tolist()
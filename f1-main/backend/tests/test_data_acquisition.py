@@ -0,0 +1,55 @@
+"""fetch_f1_data against a stubbed session source, without FastF1 or the network."""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_acquisition import RESULT_COLUMNS, fetch_f1_data
+
+
+class StubSessionSource:
+    """Canned results for two seasons; 2021 round 2 has not been run yet."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def round_count(self, season):
+        return {2020: 2, 2021: 2}[season]
+
+    def race_results(self, season, round_num):
+        with self._lock:
+            self.calls.append((season, round_num))
+        if (season, round_num) == (2021, 2):
+            return 'Future Grand Prix', pd.DataFrame()
+        return f'Grand Prix {season}-{round_num}', pd.DataFrame({
+            'FullName': [' Driver A ', 'Driver B'],
+            'TeamName': ['Team A', 'Team B '],
+            'GridPosition': [1.0, 2.0],
+            # A retirement without a classified position is dropped
+            'Position': [1.0, np.nan] if round_num == 1 else [2.0, 1.0],
+            'Points': [25.0, 0.0] if round_num == 1 else [18.0, 25.0],
+        })
+
+
+def test_fetch_builds_rows_in_race_order(tmp_path):
+    source = StubSessionSource()
+    df = fetch_f1_data([2020, 2021], workers=3, cache_dir=str(tmp_path), source=source)
+
+    assert list(df.columns) == RESULT_COLUMNS
+    assert list(zip(df['Season'], df['Round'])) == [(2020, 1), (2020, 2), (2020, 2), (2021, 1)]
+    assert df['DriverName'].tolist() == ['Driver A', 'Driver A', 'Driver B', 'Driver A']
+    assert df['TeamName'].tolist() == ['Team A', 'Team A', 'Team B', 'Team A']
+    assert df['FinalPosition'].tolist() == [1.0, 2.0, 1.0, 1.0]
+    assert sorted(source.calls) == [(2020, 1), (2020, 2), (2021, 1), (2021, 2)]
+
+
+def test_rerun_fetches_only_uncached_races(tmp_path):
+    first = fetch_f1_data([2020, 2021], cache_dir=str(tmp_path), source=StubSessionSource())
+
+    source = StubSessionSource()
+    second = fetch_f1_data([2020, 2021], cache_dir=str(tmp_path), source=source)
+
+    # Races with results come from the cache; the empty one is asked for again
+    assert source.calls == [(2021, 2)]
+    pd.testing.assert_frame_equal(second, first)
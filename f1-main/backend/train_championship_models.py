@@ -3,22 +3,51 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import accuracy_score, precision_score, recall_score, confusion_matrix
 from sklearn.preprocessing import StandardScaler
+import argparse
 import joblib
 import os
 import numpy as np
+from functools import cached_property
+
+from championship_search import search_championship_model
+from compact_forest import export_model
+from championship_labels import label_champions, season_champions
+from dataset_loader import load_dataset
+from metrics import registry, span
+from pace_features import (
+    PACE_MODEL_COLS,
+    QUALIFYING_COLUMNS,
+    pace_features,
+    pace_model_features,
+    pit_stop_entries,
+    qualifying_laps,
+)
+from reference_data import REFERENCE_COLUMNS, ReferenceData
+
+WDC_FEATURE_COLS = ['total_points', 'avg_points', 'max_points', 'avg_position', 'best_position',
+                    'avg_grid', 'total_laps', 'avg_laps', 'seasons_experience', 'age']
+CONSTRUCTORS_FEATURE_COLS = ['total_points', 'avg_points', 'max_points', 'avg_position', 'best_position',
+                             'avg_grid', 'total_laps', 'avg_laps', 'seasons_experience', 'num_drivers']
+
+def load_and_preprocess_data(load_qualifying=True):
+    """Load and preprocess historical F1 data for championship predictions.
 
-def load_and_preprocess_data():
-    """Load and preprocess historical F1 data for championship predictions."""
+    Only the pace features use qualifying data, and FeaturePipeline loads it
+    when they are first built, so callers that only need the season features
+    can pass load_qualifying=False to skip reading it. Each table is loaded
+    with only the columns the features read.
+    """
 
    
-    results_df = pd.read_csv('../daasets/results.csv')
-    driver_standings_df = pd.read_csv('../daasets/driver_standings.csv')
-    constructor_standings_df = pd.read_csv('../daasets/constructor_standings.csv')
-    drivers_df = pd.read_csv('../daasets/drivers.csv')
-    constructors_df = pd.read_csv('../daasets/constructors.csv')
-    races_df = pd.read_csv('../daasets/races.csv')
-    circuits_df = pd.read_csv('../daasets/circuits.csv')
-    qualifying_df = pd.read_csv('../daasets/qualifying.csv')
+    results_df = load_dataset('results', columns=['raceId', 'driverId', 'constructorId', 'grid', 'positionOrder',
+                                                  'points', 'laps'])
+    driver_standings_df = load_dataset('driver_standings', columns=['raceId', 'driverId', 'points'])
+    constructor_standings_df = load_dataset('constructor_standings', columns=['raceId', 'constructorId', 'points'])
+    drivers_df = load_dataset('drivers', columns=REFERENCE_COLUMNS['drivers'] + ['dob'])
+    constructors_df = load_dataset('constructors', columns=REFERENCE_COLUMNS['constructors'])
+    races_df = load_dataset('races', columns=['raceId', 'year', 'round', 'circuitId'])
+    circuits_df = load_dataset('circuits', columns=['circuitId', 'country'])
+    qualifying_df = load_dataset('qualifying', columns=QUALIFYING_COLUMNS) if load_qualifying else None
 
    
     results_df = results_df[results_df['positionOrder'] > 0]
@@ -31,30 +60,69 @@ def load_and_preprocess_data():
 
     return results_with_race, driver_standings_df, constructor_standings_df, drivers_df, constructors_df, races_df, circuits_df, qualifying_df
 
-def create_driver_features(results_with_race, driver_standings_df, drivers_df, races_df):
-    """Create comprehensive driver features for WDC prediction."""
+def aggregate_season_partials(results_with_race):
+    """Aggregate race results once per (year, driverId, constructorId).
+
+    Driver and constructor season stats are both roll-ups of these partials,
+    so the race-level results only need a single groupby.
+    """
+
+    return results_with_race.groupby(['year', 'driverId', 'constructorId']).agg(
+        points_sum=('points', 'sum'),
+        points_max=('points', 'max'),
+        position_sum=('positionOrder', 'sum'),
+        position_min=('positionOrder', 'min'),
+        grid_sum=('grid', 'sum'),
+        laps_sum=('laps', 'sum'),
+        races=('raceId', 'size')
+    ).reset_index()
+
+def rollup_season_sums(season_partials, key):
+    """Roll season partials up to per-(year, key) running sums, counts and extremes."""
+
+    return season_partials.groupby(['year', key]).agg(
+        total_points=('points_sum', 'sum'),
+        max_points=('points_max', 'max'),
+        position_sum=('position_sum', 'sum'),
+        best_position=('position_min', 'min'),
+        grid_sum=('grid_sum', 'sum'),
+        total_laps=('laps_sum', 'sum'),
+        races=('races', 'sum')
+    ).reset_index()
+
+def rollup_season_stats(season_partials, key):
+    """Roll season partials up to per-(year, key) season stats."""
+
+    stats = rollup_season_sums(season_partials, key)
+    stats['avg_points'] = stats['total_points'] / stats['races']
+    stats['avg_position'] = stats['position_sum'] / stats['races']
+    stats['avg_grid'] = stats['grid_sum'] / stats['races']
+    stats['avg_laps'] = stats['total_laps'] / stats['races']
+
+    return stats[['year', key, 'total_points', 'avg_points', 'max_points',
+                  'avg_position', 'best_position', 'avg_grid', 'total_laps', 'avg_laps']]
+
+def create_driver_features(results_with_race, driver_standings_df, drivers_df, races_df, season_partials=None):
+    """Create comprehensive driver features for WDC prediction.
+
+    Pass season_partials from aggregate_season_partials() to reuse a shared aggregation.
+    """
+
+    if season_partials is None:
+        season_partials = aggregate_season_partials(results_with_race)
 
   
     driver_standings_with_year = driver_standings_df.merge(races_df[['raceId', 'year']], on='raceId', how='left')
 
-    driver_season_stats = results_with_race.groupby(['year', 'driverId']).agg({
-        'points': ['sum', 'mean', 'max'],
-        'positionOrder': ['mean', 'min'],
-        'grid': ['mean'],
-        'laps': ['sum', 'mean']
-    }).reset_index()
-
-  
-    driver_season_stats.columns = ['year', 'driverId', 'total_points', 'avg_points', 'max_points',
-                                   'avg_position', 'best_position', 'avg_grid', 'total_laps', 'avg_laps']
+    driver_season_stats = rollup_season_stats(season_partials, 'driverId')
 
  
-    driver_experience = results_with_race.groupby('driverId')['year'].nunique().reset_index()
+    driver_experience = season_partials.groupby('driverId')['year'].nunique().reset_index()
     driver_experience.columns = ['driverId', 'seasons_experience']
 
   
     driver_age = drivers_df[['driverId', 'dob']].merge(
-        results_with_race[['driverId', 'year']].drop_duplicates(),
+        season_partials[['driverId', 'year']].drop_duplicates(),
         on='driverId', how='right'
     )
     driver_age['dob'] = pd.to_datetime(driver_age['dob'])
@@ -69,28 +137,20 @@ def create_driver_features(results_with_race, driver_standings_df, drivers_df, r
     driver_features = driver_features.fillna(0)
 
   
-    season_max_points = driver_standings_with_year.groupby('year')['points'].max().reset_index()
+    # Label each season's points leader as champion
+    season_champions_df = season_champions(driver_standings_with_year, 'driverId')
+    driver_features['is_champion'] = label_champions(driver_features, season_champions_df, 'driverId')
 
-    season_champions = season_max_points.merge(
-        driver_standings_with_year[['year', 'points', 'driverId']],
-        on=['year', 'points'],
-        how='left'
-    ).drop_duplicates(subset=['year'])
-
-    season_champions['is_champion'] = 1
+    return driver_features
 
-   
-    driver_features = driver_features.merge(
-        season_champions[['year', 'driverId', 'is_champion']],
-        on=['year', 'driverId'],
-        how='left'
-    )
-    driver_features['is_champion'] = driver_features['is_champion'].fillna(0)
+def create_constructor_features(results_with_race, constructor_standings_df, constructors_df, season_partials=None):
+    """Create comprehensive constructor features for Constructors' Championship prediction.
 
-    return driver_features
+    Pass season_partials from aggregate_season_partials() to reuse a shared aggregation.
+    """
 
-def create_constructor_features(results_with_race, constructor_standings_df, constructors_df):
-    """Create comprehensive constructor features for Constructors' Championship prediction."""
+    if season_partials is None:
+        season_partials = aggregate_season_partials(results_with_race)
 
    
     constructor_standings_with_year = constructor_standings_df.merge(
@@ -99,23 +159,14 @@ def create_constructor_features(results_with_race, constructor_standings_df, con
     )
 
    
-    constructor_season_stats = results_with_race.groupby(['year', 'constructorId']).agg({
-        'points': ['sum', 'mean', 'max'],
-        'positionOrder': ['mean', 'min'],
-        'grid': ['mean'],
-        'laps': ['sum', 'mean']
-    }).reset_index()
-
-   
-    constructor_season_stats.columns = ['year', 'constructorId', 'total_points', 'avg_points', 'max_points',
-                                        'avg_position', 'best_position', 'avg_grid', 'total_laps', 'avg_laps']
+    constructor_season_stats = rollup_season_stats(season_partials, 'constructorId')
 
   
-    constructor_experience = results_with_race.groupby('constructorId')['year'].nunique().reset_index()
+    constructor_experience = season_partials.groupby('constructorId')['year'].nunique().reset_index()
     constructor_experience.columns = ['constructorId', 'seasons_experience']
 
    
-    drivers_per_team = results_with_race.groupby(['year', 'constructorId'])['driverId'].nunique().reset_index()
+    drivers_per_team = season_partials.groupby(['year', 'constructorId'])['driverId'].nunique().reset_index()
     drivers_per_team.columns = ['year', 'constructorId', 'num_drivers']
 
    
@@ -125,66 +176,129 @@ def create_constructor_features(results_with_race, constructor_standings_df, con
     # Fill missing values
     constructor_features = constructor_features.fillna(0)
 
-    # Determine Constructors' Championship winners - get max points per season
-    season_max_points = constructor_standings_with_year.groupby('year')['points'].max().reset_index()
-
-    season_constructor_champions = season_max_points.merge(
-        constructor_standings_with_year[['year', 'points', 'constructorId']],
-        on=['year', 'points'],
-        how='left'
-    ).drop_duplicates(subset=['year'])
-
-    season_constructor_champions['is_champion'] = 1
-
-    # Merge target variable
-    constructor_features = constructor_features.merge(
-        season_constructor_champions[['year', 'constructorId', 'is_champion']],
-        on=['year', 'constructorId'],
-        how='left'
-    )
-    constructor_features['is_champion'] = constructor_features['is_champion'].fillna(0)
+    # Determine Constructors' Championship winners
+    season_constructor_champions = season_champions(constructor_standings_with_year, 'constructorId')
+    constructor_features['is_champion'] = label_champions(constructor_features, season_constructor_champions, 'constructorId')
 
     return constructor_features
 
-def train_wdc_model():
-    """Train World Drivers' Championship prediction model."""
-
-    # Load and preprocess data
-    data = load_and_preprocess_data()
-    results_with_race, driver_standings_df, constructor_standings_df, drivers_df, constructors_df, races_df, circuits_df, qualifying_df = data
-
-    # Create driver features
-    driver_features = create_driver_features(results_with_race, driver_standings_df, drivers_df, races_df)
-
-    # Prepare features and target
-    feature_cols = ['total_points', 'avg_points', 'max_points', 'avg_position', 'best_position',
-                    'avg_grid', 'total_laps', 'avg_laps', 'seasons_experience', 'age']
-
-    X = driver_features[feature_cols]
-    y = driver_features['is_champion']
+class FeaturePipeline:
+    """Loads the championship datasets once and memoizes every derived frame.
+
+    Training and prediction share one pipeline, so a full train-and-predict
+    run reads the CSVs and aggregates the race results exactly once. `data`
+    may be given up front in the shape load_and_preprocess_data() returns,
+    e.g. to build features over a synthetic or truncated history.
+    """
+
+    def __init__(self, data=None):
+        if data is not None:
+            self.data = data
+
+    @cached_property
+    def data(self):
+        return load_and_preprocess_data(load_qualifying=False)
+
+    @property
+    def results_with_race(self):
+        return self.data[0]
+
+    @property
+    def drivers_df(self):
+        return self.data[3]
+
+    @property
+    def constructors_df(self):
+        return self.data[4]
+
+    @cached_property
+    def season_partials(self):
+        return aggregate_season_partials(self.results_with_race)
+
+    @cached_property
+    def driver_features(self):
+        results_with_race, driver_standings_df, _, drivers_df, _, races_df, _, _ = self.data
+        with span('features'):
+            return create_driver_features(results_with_race, driver_standings_df, drivers_df, races_df,
+                                          season_partials=self.season_partials)
+
+    @cached_property
+    def constructor_features(self):
+        results_with_race, _, constructor_standings_df, _, constructors_df, _, _, _ = self.data
+        with span('features'):
+            return create_constructor_features(results_with_race, constructor_standings_df, constructors_df,
+                                               season_partials=self.season_partials)
+
+    @cached_property
+    def qualifying_laps(self):
+        qualifying_df = self.data[7]
+        if qualifying_df is None:
+            qualifying_df = load_dataset('qualifying', columns=QUALIFYING_COLUMNS)
+        with span('features'):
+            return qualifying_laps(qualifying_df, self.data[5])
+
+    @cached_property
+    def pit_stops(self):
+        return pit_stop_entries(load_dataset('pit_stops', columns=['raceId', 'driverId', 'milliseconds']),
+                                self.results_with_race)
+
+    @cached_property
+    def driver_pace_features(self):
+        """Per-(year, driverId) qualifying pace and pit-stop stats; see pace_features.PACE_FEATURE_COLS."""
+        with span('features'):
+            return pace_features(self.qualifying_laps, self.pit_stops, 'driverId')
+
+    @cached_property
+    def constructor_pace_features(self):
+        """Per-(year, constructorId) qualifying pace and pit-stop stats."""
+        with span('features'):
+            return pace_features(self.qualifying_laps, self.pit_stops, 'constructorId')
+
+    def model_features(self, key, feature_cols):
+        """Season features per key ('driverId' or 'constructorId'), with pace features joined if feature_cols use them."""
+        features = self.driver_features if key == 'driverId' else self.constructor_features
+        if set(PACE_MODEL_COLS).isdisjoint(feature_cols):
+            return features
+        pace = self.driver_pace_features if key == 'driverId' else self.constructor_pace_features
+        return pace_model_features(features, pace, key)
+
+    @cached_property
+    def reference(self):
+        return ReferenceData(self.drivers_df, self.constructors_df)
+
+def model_feature_cols(scaler, default):
+    """Columns a saved scaler was fitted on, in order; default for scalers fitted on plain arrays."""
+    return list(getattr(scaler, 'feature_names_in_', default))
+
+def fit_holdout_model(X, y, title, n_jobs=-1):
+    """Fit the default forest on a stratified 80% split and report holdout and 5-fold CV metrics."""
 
     # Scale features
     scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    with span('scale'):
+        X_scaled = scaler.fit_transform(X)
 
     # Train-test split
     X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42, stratify=y)
 
-    # Train RandomForestClassifier
-    model = RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced')
-    model.fit(X_train, y_train)
+    # Train RandomForestClassifier on every core
+    model = RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced', n_jobs=n_jobs)
+    with span('fit'):
+        model.fit(X_train, y_train)
 
-    # Cross-validation
-    cv_scores = cross_val_score(model, X_scaled, y, cv=5, scoring='accuracy')
+    # Cross-validation, folds fitted in parallel
+    with span('cross_validate'):
+        cv_scores = cross_val_score(model, X_scaled, y, cv=5, scoring='accuracy', n_jobs=n_jobs)
 
     # Evaluate the model
-    y_pred = model.predict(X_test)
+    with span('predict'):
+        y_pred = model.predict(X_test)
     accuracy = accuracy_score(y_test, y_pred)
     precision = precision_score(y_test, y_pred)
     recall = recall_score(y_test, y_pred)
     conf_matrix = confusion_matrix(y_test, y_pred)
 
-    print("=== World Drivers' Championship Model ===")
+    print(f"=== {title} Model ===")
     print(f"Cross-validation accuracy: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
     print(f"Test accuracy: {accuracy:.4f}")
     print(f"Precision: {precision:.4f}")
@@ -192,69 +306,120 @@ def train_wdc_model():
     print("Confusion Matrix:")
     print(conf_matrix)
 
-    # Save the model and scaler
+    # Serving predicts a handful of rows per call; a thread pool there only adds overhead
+    model.set_params(n_jobs=None)
+    return model, scaler
+
+def fit_searched_model(X, y, years, title, n_jobs=-1, n_splits=5):
+    """Search forest and gradient boosting configs over season-based folds and refit the best."""
+
+    model, scaler, ranking = search_championship_model(X, y, years, n_splits=n_splits, n_jobs=n_jobs)
+
+    print(f"=== {title} Model (season-based search, {n_splits} folds) ===")
+    print(f"{'hit rate':>9} {'avg prec':>9}  candidate")
+    for entry in ranking[:5]:
+        print(f"{entry['champion_hit_rate']:>9.4f} {entry['average_precision']:>9.4f}  {entry['candidate']}")
+    print(f"Selected {ranking[0]['candidate']} out of {len(ranking)} candidates")
+    return model, scaler
+
+def fit_championship_model(features, feature_cols, title, search=False, n_jobs=-1):
+    X = features[feature_cols]
+    y = features['is_champion']
+    if search:
+        return fit_searched_model(X, y, features['year'], title, n_jobs=n_jobs)
+    return fit_holdout_model(X, y, title, n_jobs=n_jobs)
+
+def save_championship_model(model, scaler, name):
     os.makedirs('backend/models', exist_ok=True)
-    joblib.dump(model, 'backend/models/wdc_model.joblib')
-    joblib.dump(scaler, 'backend/models/wdc_scaler.joblib')
-    print("WDC model and scaler saved")
+    joblib.dump(model, f'backend/models/{name}_model.joblib')
+    export_model(model, f'backend/models/{name}_model.joblib')
+    joblib.dump(scaler, f'backend/models/{name}_scaler.joblib')
 
-    return model, scaler, feature_cols
+def train_wdc_model(pipeline=None, search=False, n_jobs=-1, pace=False):
+    """Train World Drivers' Championship prediction model.
 
-def train_constructors_model():
-    """Train Constructors' Championship prediction model."""
+    With search=True the model is chosen by a season-based hyperparameter
+    search instead of the default forest; n_jobs sets the cores used.
+    pace=True adds the qualifying pace and pit-stop features
+    (pace_features.PACE_MODEL_COLS).
+    """
 
     # Load and preprocess data
-    data = load_and_preprocess_data()
-    results_with_race, driver_standings_df, constructor_standings_df, drivers_df, constructors_df, races_df, circuits_df, qualifying_df = data
+    pipeline = pipeline or FeaturePipeline()
 
-    # Create constructor features
-    constructor_features = create_constructor_features(results_with_race, constructor_standings_df, constructors_df)
+    # Create driver features
+    feature_cols = WDC_FEATURE_COLS + (PACE_MODEL_COLS if pace else [])
+    driver_features = pipeline.model_features('driverId', feature_cols)
 
-    # Prepare features and target
-    feature_cols = ['total_points', 'avg_points', 'max_points', 'avg_position', 'best_position',
-                    'avg_grid', 'total_laps', 'avg_laps', 'seasons_experience', 'num_drivers']
+    model, scaler = fit_championship_model(driver_features, feature_cols, "World Drivers' Championship",
+                                           search=search, n_jobs=n_jobs)
 
-    X = constructor_features[feature_cols]
-    y = constructor_features['is_champion']
+    # Save the model and scaler
+    save_championship_model(model, scaler, 'wdc')
+    print("WDC model and scaler saved")
 
-    # Scale features
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    return model, scaler, feature_cols
 
-    # Train-test split
-    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42, stratify=y)
+def train_constructors_model(pipeline=None, search=False, n_jobs=-1, pace=False):
+    """Train Constructors' Championship prediction model.
 
-    # Train RandomForestClassifier
-    model = RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced')
-    model.fit(X_train, y_train)
+    Takes the same search, n_jobs and pace options as train_wdc_model().
+    """
 
-    # Cross-validation
-    cv_scores = cross_val_score(model, X_scaled, y, cv=5, scoring='accuracy')
+    # Load and preprocess data
+    pipeline = pipeline or FeaturePipeline()
 
-    # Evaluate the model
-    y_pred = model.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred)
-    recall = recall_score(y_test, y_pred)
-    conf_matrix = confusion_matrix(y_test, y_pred)
+    # Create constructor features
+    feature_cols = CONSTRUCTORS_FEATURE_COLS + (PACE_MODEL_COLS if pace else [])
+    constructor_features = pipeline.model_features('constructorId', feature_cols)
 
-    print("=== Constructors' Championship Model ===")
-    print(f"Cross-validation accuracy: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
-    print(f"Test accuracy: {accuracy:.4f}")
-    print(f"Precision: {precision:.4f}")
-    print(f"Recall: {recall:.4f}")
-    print("Confusion Matrix:")
-    print(conf_matrix)
+    model, scaler = fit_championship_model(constructor_features, feature_cols, "Constructors' Championship",
+                                           search=search, n_jobs=n_jobs)
 
     # Save the model and scaler
-    os.makedirs('backend/models', exist_ok=True)
-    joblib.dump(model, 'backend/models/constructors_model.joblib')
-    joblib.dump(scaler, 'backend/models/constructors_scaler.joblib')
+    save_championship_model(model, scaler, 'constructors')
     print("Constructors' model and scaler saved")
 
     return model, scaler, feature_cols
 
-def predict_championships(year: int):
+def score_championship_candidates(features, feature_cols, model, scaler):
+    """Scale and score candidate rows in one predict_proba pass; returns (predicted, champion_probability)."""
+
+    with span('scale'):
+        X_scaled = scaler.transform(features[feature_cols])
+    with span('predict_proba'):
+        probabilities = model.predict_proba(X_scaled)
+    predictions = model.classes_[probabilities.argmax(axis=1)]
+    return predictions.astype(bool), probabilities[:, 1]
+
+def championship_results(entity_ids, predictions, probabilities, names, id_key, name_key, fallback):
+    """Build result dicts for candidates, keeping the order they are given in."""
+
+    confidence = np.select([probabilities > 0.7, probabilities > 0.4], ['high', 'medium'], 'low')
+    return [
+        {
+            id_key: entity_id,
+            name_key: names.get(entity_id, f"{fallback} {entity_id}"),
+            'predicted_champion': predicted,
+            'champion_probability': probability,
+            'confidence': level
+        }
+        for entity_id, predicted, probability, level in zip(
+            entity_ids.tolist(), predictions.tolist(), probabilities.tolist(), confidence.tolist()
+        )
+    ]
+
+def rank_championship_candidates(features, feature_cols, model, scaler, id_col, names, id_key, name_key, fallback):
+    """Score one season of features and return results sorted by champion probability."""
+
+    predictions, probabilities = score_championship_candidates(features, feature_cols, model, scaler)
+    # Stable, so candidates with equal probabilities keep their feature order
+    order = np.argsort(-probabilities, kind='stable')
+    entity_ids = features[id_col].to_numpy().astype(int)
+    return championship_results(entity_ids[order], predictions[order], probabilities[order],
+                                names, id_key, name_key, fallback)
+
+def predict_championships(year: int, pipeline=None):
     """Generate predictions for championships for a given year."""
 
     # Load models and scalers
@@ -264,87 +429,57 @@ def predict_championships(year: int):
     constructors_scaler = joblib.load('backend/models/constructors_scaler.joblib')
 
     # Load data
-    data = load_and_preprocess_data()
-    results_with_race, driver_standings_df, constructor_standings_df, drivers_df, constructors_df, races_df, circuits_df, qualifying_df = data
+    pipeline = pipeline or FeaturePipeline()
+
+    # Models trained with --pace-features expect the pace columns too
+    wdc_feature_cols = model_feature_cols(wdc_scaler, WDC_FEATURE_COLS)
+    constructors_feature_cols = model_feature_cols(constructors_scaler, CONSTRUCTORS_FEATURE_COLS)
 
     # Create driver features for the specified year (using 2023 data as proxy)
-    driver_features_2023 = create_driver_features(results_with_race, driver_standings_df, drivers_df, races_df)
+    driver_features_2023 = pipeline.model_features('driverId', wdc_feature_cols)
     driver_features_year = driver_features_2023[driver_features_2023['year'] == 2023].copy()
     driver_features_year['year'] = year
 
     # Create constructor features for the specified year
-    constructor_features_2023 = create_constructor_features(results_with_race, constructor_standings_df, constructors_df)
+    constructor_features_2023 = pipeline.model_features('constructorId', constructors_feature_cols)
     constructor_features_year = constructor_features_2023[constructor_features_2023['year'] == 2023].copy()
     constructor_features_year['year'] = year
 
-    # WDC Features
-    wdc_feature_cols = ['total_points', 'avg_points', 'max_points', 'avg_position', 'best_position',
-                        'avg_grid', 'total_laps', 'avg_laps', 'seasons_experience', 'age']
-    X_wdc_year = driver_features_year[wdc_feature_cols]
-    X_wdc_year_scaled = wdc_scaler.transform(X_wdc_year)
-
-    # Constructors' Features
-    constructors_feature_cols = ['total_points', 'avg_points', 'max_points', 'avg_position', 'best_position',
-                                 'avg_grid', 'total_laps', 'avg_laps', 'seasons_experience', 'num_drivers']
-    X_constructors_year = constructor_features_year[constructors_feature_cols]
-    X_constructors_year_scaled = constructors_scaler.transform(X_constructors_year)
-
-    # Make predictions
-    wdc_predictions = wdc_model.predict(X_wdc_year_scaled)
-    wdc_probabilities = wdc_model.predict_proba(X_wdc_year_scaled)
-
-    constructors_predictions = constructors_model.predict(X_constructors_year_scaled)
-    constructors_probabilities = constructors_model.predict_proba(X_constructors_year_scaled)
-
     # Get driver and constructor names
-    driver_names = drivers_df.set_index('driverId')[['forename', 'surname']].apply(lambda x: f"{x['forename']} {x['surname']}", axis=1)
-    constructor_names = constructors_df.set_index('constructorId')['name']
-
-    # WDC Results
-    wdc_results = []
-    for i, (idx, row) in enumerate(driver_features_year.iterrows()):
-        driver_id = int(row['driverId'])
-        driver_name = driver_names.get(driver_id, f"Driver {driver_id}")
-        prob_champion = wdc_probabilities[i][1]
-        wdc_results.append({
-            'driver_id': driver_id,
-            'driver_name': driver_name,
-            'predicted_champion': bool(wdc_predictions[i]),
-            'champion_probability': float(prob_champion),
-            'confidence': 'high' if prob_champion > 0.7 else 'medium' if prob_champion > 0.4 else 'low'
-        })
-
-    # Sort by probability
-    wdc_results.sort(key=lambda x: x['champion_probability'], reverse=True)
-
-    # Constructors' Results
-    constructors_results = []
-    for i, (idx, row) in enumerate(constructor_features_year.iterrows()):
-        constructor_id = int(row['constructorId'])
-        constructor_name = constructor_names.get(constructor_id, f"Constructor {constructor_id}")
-        prob_champion = constructors_probabilities[i][1]
-        constructors_results.append({
-            'constructor_id': constructor_id,
-            'constructor_name': constructor_name,
-            'predicted_champion': bool(constructors_predictions[i]),
-            'champion_probability': float(prob_champion),
-            'confidence': 'high' if prob_champion > 0.7 else 'medium' if prob_champion > 0.4 else 'low'
-        })
-
-    # Sort by probability
-    constructors_results.sort(key=lambda x: x['champion_probability'], reverse=True)
+    driver_names = pipeline.reference.driver_names
+    constructor_names = pipeline.reference.constructor_names
+
+    wdc_results = rank_championship_candidates(
+        driver_features_year, wdc_feature_cols, wdc_model, wdc_scaler,
+        'driverId', driver_names, 'driver_id', 'driver_name', 'Driver'
+    )
+    constructors_results = rank_championship_candidates(
+        constructor_features_year, constructors_feature_cols, constructors_model, constructors_scaler,
+        'constructorId', constructor_names, 'constructor_id', 'constructor_name', 'Constructor'
+    )
 
     return wdc_results, constructors_results
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the championship models and predict 2030.")
+    parser.add_argument('--search', action='store_true',
+                        help='pick each model by a season-based search over forest and boosting configs')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='cores to train on (-1 for all)')
+    parser.add_argument('--pace-features', action='store_true',
+                        help='also train on qualifying pace and pit-stop features')
+    args = parser.parse_args()
+
+    # One pipeline for the whole run, so the CSVs are read once
+    pipeline = FeaturePipeline()
+
     print("Training World Drivers' Championship model...")
-    train_wdc_model()
+    train_wdc_model(pipeline, search=args.search, n_jobs=args.n_jobs, pace=args.pace_features)
 
     print("\nTraining Constructors' Championship model...")
-    train_constructors_model()
+    train_constructors_model(pipeline, search=args.search, n_jobs=args.n_jobs, pace=args.pace_features)
 
     print("\nGenerating 2030 predictions...")
-    wdc_preds, constructors_preds = predict_championships(2030)
+    wdc_preds, constructors_preds = predict_championships(2030, pipeline)
 
     print("\n=== 2030 World Drivers' Championship Predictions ===")
     for pred in wdc_preds[:5]:  # Top 5
@@ -352,4 +487,7 @@ if __name__ == "__main__":
 
     print("\n=== 2030 Constructors' Championship Predictions ===")
     for pred in constructors_preds[:5]:  # Top 5
-        print(f"{pred['constructor_name']}: {pred['champion_probability']:.3f} ({pred['confidence']})")
\ No newline at end of file
+        print(f"{pred['constructor_name']}: {pred['champion_probability']:.3f} ({pred['confidence']})")
+
+    print("\n=== Stage timings ===")
+    print(registry.stage_summary())
\ No newline at end of file
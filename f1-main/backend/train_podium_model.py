@@ -1,13 +1,19 @@
-import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, confusion_matrix
 import joblib
 import os
 
+from compact_forest import export_forest
+from dataset_loader import load_dataset
+
+# Bounded trees: fewer, shallower nodes and a better test AUC than unbounded depth
+PODIUM_MAX_DEPTH = 16
+PODIUM_MIN_SAMPLES_LEAF = 5
+
 def train_podium_model():
    
-    results_df = pd.read_csv('../daasets/results.csv')
+    results_df = load_dataset('results')
 
  
     data = results_df[['driverId', 'constructorId', 'grid', 'positionOrder']].copy()
@@ -27,7 +33,8 @@ def train_podium_model():
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
     # Train RandomForestClassifier
-    model = RandomForestClassifier(random_state=42)
+    model = RandomForestClassifier(random_state=42, max_depth=PODIUM_MAX_DEPTH,
+                                   min_samples_leaf=PODIUM_MIN_SAMPLES_LEAF)
     model.fit(X_train, y_train)
 
     # Evaluate the model
@@ -46,6 +53,7 @@ def train_podium_model():
     # Save the model
     os.makedirs('backend/models', exist_ok=True)
     joblib.dump(model, 'backend/models/podium_model.joblib')
+    export_forest(model, 'backend/models/podium_model.joblib')
     print("Model saved to backend/models/podium_model.joblib")
 
 if __name__ == "__main__":
@@ -1,14 +1,17 @@
-import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, confusion_matrix
 import joblib
 import os
 
+from compact_forest import export_model
+from championship_labels import label_champions, season_champions
+from dataset_loader import load_dataset
+
 def train_wdc_model():
    
-    standings_df = pd.read_csv('../daasets/driver_standings.csv')
-    races_df = pd.read_csv('../daasets/races.csv')
+    standings_df = load_dataset('driver_standings')
+    races_df = load_dataset('races')
 
   
     standings_df = standings_df.merge(races_df[['raceId', 'year']], on='raceId', how='left')
@@ -16,13 +19,9 @@ def train_wdc_model():
     season_points = standings_df.groupby(['year', 'driverId'])['points'].max().reset_index()
 
 
-    champions = season_points.loc[season_points.groupby('year')['points'].idxmax()]
-
-  
-    season_points['is_champion'] = season_points.apply(
-        lambda row: 1 if row['driverId'] in champions[champions['year'] == row['year']]['driverId'].values else 0,
-        axis=1
-    )
+    # Label each season's points leader as champion
+    champions = season_champions(season_points, 'driverId')
+    season_points['is_champion'] = label_champions(season_points, champions, 'driverId')
 
     
     X = season_points[['year', 'driverId', 'points']]
@@ -32,8 +31,9 @@ def train_wdc_model():
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
     
-    model = RandomForestClassifier(random_state=42)
+    model = RandomForestClassifier(random_state=42, n_jobs=-1)
     model.fit(X_train, y_train)
+    model.set_params(n_jobs=None)
 
     y_pred = model.predict(X_test)
     accuracy = accuracy_score(y_test, y_pred)
@@ -48,8 +48,9 @@ def train_wdc_model():
     print(conf_matrix)
 
     os.makedirs('backend/models', exist_ok=True)
-    joblib.dump(model, 'backend/models/wdc_model.joblib')
-    print("Model saved to backend/models/wdc_model.joblib")
+    joblib.dump(model, 'backend/models/wdc_points_model.joblib')
+    export_model(model, 'backend/models/wdc_points_model.joblib')
+    print("Model saved to backend/models/wdc_points_model.joblib")
 
 if __name__ == "__main__":
     train_wdc_model()
\ No newline at end of file
@@ -0,0 +1,48 @@
+import axios from 'axios';
+
+// Column arrays with dictionary-encoded names, served by the /analytics endpoints on request
+export const COLUMNAR_MEDIA_TYPE = 'application/vnd.f1.columnar+json';
+
+interface DictionaryColumn {
+  dictionary: (string | null)[];
+  indices: (number | null)[];
+}
+
+type Column = (number | string | boolean | null)[] | DictionaryColumn;
+
+export interface ColumnarPayload {
+  length: number;
+  columns: Record<string, Column>;
+}
+
+function isColumnar(data: unknown): data is ColumnarPayload {
+  return typeof data === 'object' && data !== null && !Array.isArray(data) && 'columns' in data && 'length' in data;
+}
+
+// Rebuild row objects from a columnar payload, decoding dictionary columns
+export function fromColumnar<T>(payload: ColumnarPayload): T[] {
+  const names = Object.keys(payload.columns);
+  const values = names.map((name) => {
+    const column = payload.columns[name];
+    if (Array.isArray(column)) return column;
+    return column.indices.map((index) => (index === null ? null : column.dictionary[index]));
+  });
+
+  const rows = new Array<T>(payload.length);
+  for (let i = 0; i < payload.length; i++) {
+    const row: Record<string, unknown> = {};
+    for (let j = 0; j < names.length; j++) {
+      row[names[j]] = values[j][i];
+    }
+    rows[i] = row as T;
+  }
+  return rows;
+}
+
+// GET an analytics listing as rows, asking for the columnar format and accepting plain JSON too
+export async function fetchAnalytics<T>(url: string): Promise<T[]> {
+  const response = await axios.get(url, {
+    headers: { Accept: `${COLUMNAR_MEDIA_TYPE}, application/json;q=0.9` },
+  });
+  return isColumnar(response.data) ? fromColumnar<T>(response.data) : response.data;
+}
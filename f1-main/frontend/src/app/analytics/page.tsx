@@ -17,6 +17,7 @@ import {
   Legend,
 } from 'chart.js';
 import { Bar, Line } from 'react-chartjs-2';
+import { fetchAnalytics } from './columnar';
 
 ChartJS.register(
   CategoryScale,
@@ -167,15 +168,15 @@ export default function AnalyticsDashboard() {
 
   const fetchAnalyticsData = async () => {
     try {
-      const [driversRes, teamsRes, podiumsRes] = await Promise.all([
-        axios.get('http://localhost:8000/analytics/drivers'),
-        axios.get('http://localhost:8000/analytics/teams'),
-        axios.get('http://localhost:8000/analytics/podiums')
+      const [driverRows, teamRows, podiumRows] = await Promise.all([
+        fetchAnalytics<DriverPerformance>('http://localhost:8000/analytics/drivers'),
+        fetchAnalytics<TeamStanding>('http://localhost:8000/analytics/teams'),
+        fetchAnalytics<PodiumData>('http://localhost:8000/analytics/podiums')
       ]);
 
-      setDriverPerformance(driversRes.data);
-      setTeamStandings(teamsRes.data);
-      setPodiumData(podiumsRes.data);
+      setDriverPerformance(driverRows);
+      setTeamStandings(teamRows);
+      setPodiumData(podiumRows);
     } catch (err) {
       setError('Failed to load analytics data');
     } finally {
@@ -211,16 +212,16 @@ export default function AnalyticsDashboard() {
     try {
       setLoading(true);
       if (type === 'driver') {
-        const [driversRes, podiumsRes] = await Promise.all([
-          axios.get(`http://localhost:8000/analytics/drivers?driverId=${id}`),
-          axios.get(`http://localhost:8000/analytics/podiums?driverId=${id}`)
+        const [driverRows, podiumRows] = await Promise.all([
+          fetchAnalytics<DriverPerformance>(`http://localhost:8000/analytics/drivers?driverId=${id}`),
+          fetchAnalytics<PodiumData>(`http://localhost:8000/analytics/podiums?driverId=${id}`)
         ]);
-        setDriverPerformance(driversRes.data);
-        setPodiumData(podiumsRes.data);
+        setDriverPerformance(driverRows);
+        setPodiumData(podiumRows);
         setTeamStandings([]);
       } else {
-        const teamsRes = await axios.get(`http://localhost:8000/analytics/teams?constructorId=${id}`);
-        setTeamStandings(teamsRes.data);
+        const teamRows = await fetchAnalytics<TeamStanding>(`http://localhost:8000/analytics/teams?constructorId=${id}`);
+        setTeamStandings(teamRows);
         setDriverPerformance([]);
         setPodiumData([]);
       }
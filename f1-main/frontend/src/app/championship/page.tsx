@@ -15,6 +15,11 @@ interface Driver {
   name: string;
 }
 
+interface Constructor {
+  constructorId: number;
+  name: string;
+}
+
 interface PredictionResult {
   prediction: number;
   champion_probability: number;
@@ -57,6 +62,12 @@ interface ChampionshipPredictions {
   };
 }
 
+interface ScenarioResult extends ChampionshipPredictions {
+  scenario: string;
+  year: number;
+}
+
+const CHAMPIONSHIP_YEARS = [2025, 2026, 2027, 2028, 2029, 2030];
 
 export default function ChampionshipPrediction() {
   // State hooks
@@ -65,11 +76,64 @@ export default function ChampionshipPrediction() {
   const [error, setError] = useState<string>('');
   const [selectedChampionshipYear, setSelectedChampionshipYear] = useState<number>(2030);
 
+  // What-if comparison state
+  const [drivers, setDrivers] = useState<Driver[]>([]);
+  const [constructors, setConstructors] = useState<Constructor[]>([]);
+  const [scenarioDriver, setScenarioDriver] = useState<{value: number, label: string} | null>(null);
+  const [scenarioTeam, setScenarioTeam] = useState<{value: number, label: string} | null>(null);
+  const [scenarioPoints, setScenarioPoints] = useState<number>(0);
+  const [scenarioResults, setScenarioResults] = useState<ScenarioResult[]>([]);
+  const [loadingScenarios, setLoadingScenarios] = useState(false);
+  const [scenarioError, setScenarioError] = useState<string>('');
+
   useEffect(() => {
     // We only fetch the main predictions, as the custom form was removed.
     fetchChampionshipPredictions();
+    fetchScenarioOptions();
   }, []); // Note: Removed dependency on selectedChampionshipYear to fetch on load
 
+  const fetchScenarioOptions = async () => {
+    try {
+      const [driversRes, constructorsRes] = await Promise.all([
+        axios.get('http://localhost:8000/drivers'),
+        axios.get('http://localhost:8000/constructors')
+      ]);
+      setDrivers(driversRes.data);
+      setConstructors(constructorsRes.data);
+    } catch (err) {
+      setScenarioError('Failed to load drivers and teams');
+    }
+  };
+
+  // Baseline and what-if for every year come back from a single request
+  const fetchScenarioComparison = async () => {
+    setLoadingScenarios(true);
+    setScenarioError('');
+    const scenarios = [];
+    if (scenarioDriver && (scenarioTeam || scenarioPoints !== 0)) {
+      scenarios.push({
+        name: 'what-if',
+        driver_teams: scenarioTeam ? { [scenarioDriver.value]: scenarioTeam.value } : {},
+        points: scenarioPoints !== 0 ? { [scenarioDriver.value]: scenarioPoints } : {}
+      });
+    }
+    try {
+      const response = await axios.post('http://localhost:8000/predict/championships/scenarios', {
+        years: [selectedChampionshipYear],
+        scenarios
+      });
+      setScenarioResults(response.data.results);
+    } catch (err: any) {
+      setScenarioError(err.response?.data?.detail || 'Failed to compare scenarios');
+      setScenarioResults([]);
+    } finally {
+      setLoadingScenarios(false);
+    }
+  };
+
+  const scenarioNames = Array.from(new Set(scenarioResults.map((r) => r.scenario)));
+  const scenarioYears = Array.from(new Set(scenarioResults.map((r) => r.year)));
+
   const fetchChampionshipPredictions = async () => {
     setLoadingChampionship(true);
     setError(''); // Clear previous errors
@@ -147,7 +211,7 @@ export default function ChampionshipPrediction() {
                     }}
                     className="f1-input max-w-xs inline-block" // Use new input style
                   >
-                    {[2025, 2026, 2027, 2028, 2029, 2030].map((year) => (
+                    {CHAMPIONSHIP_YEARS.map((year) => (
                       <option key={year} value={year} className="text-neutral-900 font-medium">
                         {year}
                       </option>
@@ -273,7 +337,115 @@ export default function ChampionshipPrediction() {
               )}
             </div>
 
-            {/* Custom Prediction Section has been removed as per previous request */}
+            {/* Scenario Comparison */}
+            <div className="p-10 bg-gray-50 rounded-2xl border-2 border-gray-200 shadow-inner">
+              <div className="text-center mb-10">
+                <h2 className="text-4xl font-bold text-neutral-900 mb-3">
+                  What-If Comparison
+                </h2>
+                <p className="text-neutral-700 text-lg font-medium">
+                  Move a driver to another team or adjust their points, and compare the {selectedChampionshipYear} season against the baseline
+                </p>
+                <p className="text-neutral-600 text-base mt-2">
+                  Seasons without recorded results are projected from the 2023 season, so every future year gives the same result
+                </p>
+              </div>
+
+              <div className="grid lg:grid-cols-3 gap-8 mb-8">
+                <div className="space-y-3">
+                  <label className="block text-lg font-bold text-neutral-900">Driver</label>
+                  <Select
+                    value={scenarioDriver}
+                    onChange={setScenarioDriver}
+                    options={drivers.map(driver => ({ value: driver.driverId, label: driver.name }))}
+                    placeholder="Select a driver..."
+                    className="text-lg"
+                    isClearable
+                  />
+                </div>
+                <div className="space-y-3">
+                  <label className="block text-lg font-bold text-neutral-900">Move To Team</label>
+                  <Select
+                    value={scenarioTeam}
+                    onChange={setScenarioTeam}
+                    options={constructors.map(constructor => ({ value: constructor.constructorId, label: constructor.name }))}
+                    placeholder="Keep current team"
+                    className="text-lg"
+                    isClearable
+                  />
+                </div>
+                <div className="space-y-3">
+                  <label className="block text-lg font-bold text-neutral-900">Points Adjustment</label>
+                  <input
+                    type="number"
+                    value={scenarioPoints}
+                    onChange={(e) => setScenarioPoints(Number(e.target.value))}
+                    className="f1-input"
+                  />
+                </div>
+              </div>
+
+              <div className="text-center mb-8">
+                <button
+                  onClick={fetchScenarioComparison}
+                  disabled={loadingScenarios}
+                  className="f1-button-primary"
+                >
+                  {loadingScenarios ? 'Comparing...' : 'Compare Scenarios'}
+                </button>
+              </div>
+
+              {scenarioError && !loadingScenarios && (
+                <p className="text-center text-red-700 font-semibold text-xl mb-6">{scenarioError}</p>
+              )}
+
+              {scenarioResults.length > 0 && (
+                <div className="overflow-x-auto">
+                  <table className="w-full bg-white rounded-xl border-2 border-gray-200">
+                    <thead>
+                      <tr className="border-b-2 border-gray-200">
+                        <th className="py-3 px-4 text-left font-bold text-neutral-900">Year</th>
+                        {scenarioNames.map((name) => (
+                          <th key={name} className="py-3 px-4 text-left font-bold text-neutral-900 capitalize">{name}</th>
+                        ))}
+                      </tr>
+                    </thead>
+                    <tbody>
+                      {scenarioYears.map((year) => (
+                        <tr key={year} className="border-b border-gray-200">
+                          <td className="py-3 px-4 font-semibold text-neutral-800">{year}</td>
+                          {scenarioNames.map((name) => {
+                            const result = scenarioResults.find((r) => r.scenario === name && r.year === year);
+                            const driver = result?.world_drivers_championship.top_prediction;
+                            const team = result?.constructors_championship.top_prediction;
+                            return (
+                              <td key={name} className="py-3 px-4 text-neutral-800">
+                                {driver && (
+                                  <div className="font-semibold">
+                                    {driver.driver_name}{' '}
+                                    <span className={getConfidenceColor(driver.confidence)}>
+                                      {(driver.champion_probability * 100).toFixed(1)}%
+                                    </span>
+                                  </div>
+                                )}
+                                {team && (
+                                  <div className="text-sm">
+                                    {team.constructor_name}{' '}
+                                    <span className={getConfidenceColor(team.confidence)}>
+                                      {(team.champion_probability * 100).toFixed(1)}%
+                                    </span>
+                                  </div>
+                                )}
+                              </td>
+                            );
+                          })}
+                        </tr>
+                      ))}
+                    </tbody>
+                  </table>
+                </div>
+              )}
+            </div>
             
           </div>
         </div>